@@ -0,0 +1,487 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+
+Benchmarks the hot paths of python_translate on synthetic catalogues and
+reports ops/sec, latency percentiles and peak memory.
+
+    python benchmarks/suite.py --sizes 1000 100000 --output results.json
+    python benchmarks/suite.py --filter trans --compare results.json
+
+Catalogues are generated from a fixed seed, so runs with the same sizes
+measure the same data. Each catalogue spreads its messages over three
+domains and belongs to a fr_FR -> fr -> en fallback chain: en defines
+every message, fr half of them and fr_FR a tenth.
+
+Latencies are measured call by call, so the timer overhead (well below a
+microsecond) is included in those of the fastest operations. Peak memory
+is the peak of memory allocated by Python while the benchmark is set up
+and run for the first time, as reported by tracemalloc. MO files are
+memory-mapped and decoded on access, so loading them does not decode
+messages.
+"""
+
+import os
+import sys
+import gc
+import json
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import datetime
+import timeit
+import multiprocessing
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_translate import loaders
+from python_translate import dumpers
+from python_translate.instrumentation import MetricsCollector
+from python_translate.operations import DiffOperation, MergeOperation
+from python_translate.selector import select_message, PluralizationRules
+from python_translate.translations import Translator, MessageCatalogue
+
+SEED = 20151024
+DOMAINS = ['messages', 'admin', 'validators']
+CHAIN = [('fr_FR', 10), ('fr', 2), ('en', 1)]
+CHOICE = '{0} No apples|{1} One apple|]1,19] {count} apples|[20,Inf[ Many apples'
+PLURAL_LOCALES = ['en', 'fr', 'pl', 'ru', 'ar', 'cs', 'ga', 'sl', 'lt', 'ja']
+
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=True):
+    """
+    Registers a benchmark. The decorated function is called with the
+    Dataset and returns the operation to time, a callable without arguments.
+    """
+    def decorator(setup):
+        BENCHMARKS.append((name, setup, sizes))
+        return setup
+    return decorator
+
+
+class Dataset(object):
+
+    """
+    Synthetic messages of a given size, generated on demand and shared by
+    the benchmarks of that size.
+    """
+
+    def __init__(self, size, directory):
+        self.size = size
+        self.directory = directory
+        self._messages = None
+        self._files = {}
+
+    @property
+    def messages(self):
+        """
+        dict[str, dict[str, str]]: messages of the en catalogue by domain
+        """
+        if self._messages is None:
+            rnd = random.Random(SEED)
+            self._messages = dict((domain, {}) for domain in DOMAINS)
+            for i in range(self.size):
+                kind = rnd.random()
+                if kind < 0.1:
+                    message = CHOICE
+                elif kind < 0.4:
+                    message = 'Hello {name}, you have {count} new messages (%d)' % i
+                else:
+                    message = 'Message number %d' % i
+                self._messages[DOMAINS[i % len(DOMAINS)]]['section%d.key%d' % (i // 100, i)] = message
+        return self._messages
+
+    @property
+    def tree(self):
+        """
+        dict: messages of every domain of the en catalogue, nested by the
+        parts of "domain.id", as DictLoader.flatten() takes them
+        """
+        tree = {}
+        for domain in DOMAINS:
+            for id, message in self.messages[domain].items():
+                node = tree
+                parts = ('%s.%s' % (domain, id)).split('.')
+                for part in parts[:-1]:
+                    node = node.setdefault(part, {})
+                node[parts[-1]] = message
+        return tree
+
+    def ids(self, count=1000, domain='messages', choice=False):
+        """
+        Returns ids of choice messages, or of the other messages, of the
+        domain picked at random, with a fixed seed.
+        """
+        messages = self.messages[domain]
+        ids = sorted(id for id in messages if (messages[id] == CHOICE) == choice)
+        rnd = random.Random(SEED + 1)
+        return [rnd.choice(ids) for _ in range(count)]
+
+    def catalogue_messages(self, locale, domain=None):
+        """
+        Returns the messages the catalogue of a locale of the fallback chain
+        defines.
+        """
+        step = dict(CHAIN)[locale]
+        result = {}
+        for name in DOMAINS if domain is None else [domain]:
+            messages = sorted(self.messages[name].items())
+            result[name] = dict(
+                (id, message if locale == 'en' else '%s (%s)' % (message, locale))
+                for id, message in messages[::step])
+        return result if domain is None else result[domain]
+
+    def catalogue(self, locale):
+        return MessageCatalogue(locale, self.catalogue_messages(locale))
+
+    def translator(self):
+        translator = Translator(CHAIN[0][0])
+        translator.set_fallback_locales([CHAIN[-1][0]])
+        translator.add_loader('dict', loaders.DictLoader())
+        for locale, _ in CHAIN:
+            for domain, messages in self.catalogue_messages(locale).items():
+                translator.add_resource('dict', messages, locale, domain)
+        return translator
+
+    def file(self, dumper):
+        """
+        Dumps the messages of every domain of the en catalogue to a single
+        file with the dumper, once.
+
+        @rtype: str
+        @return: Path of the file
+        """
+        extension = dumper.get_extension()
+        if extension not in self._files:
+            directory = os.path.join(self.directory, 'files-%d' % self.size)
+            if not os.path.isdir(directory):
+                os.mkdir(directory)
+            messages = {}
+            for domain in DOMAINS:
+                messages.update(self.messages[domain])
+            catalogue = MessageCatalogue('en', {'messages': messages})
+            dumper.dump(catalogue, {'path': directory})
+            self._files[extension] = os.path.join(
+                directory, dumper.get_relative_path('messages', 'en'))
+        return self._files[extension]
+
+
+def cycle(values):
+    """
+    Returns a function returning the values one after another, endlessly.
+    """
+    state = {'index': 0}
+    count = len(values)
+
+    def next_value():
+        index = state['index']
+        state['index'] = (index + 1) % count
+        return values[index]
+    return next_value
+
+
+@benchmark('translator.trans')
+def bench_trans(data):
+    translator = data.translator()
+    next_id = cycle(data.ids())
+    translator.trans(next_id())
+    return lambda: translator.trans(next_id(), {'name': 'Adam', 'count': 3})
+
+
+@benchmark('translator.trans_instrumented')
+def bench_trans_instrumented(data):
+    translator = data.translator()
+    translator.instrumentation = MetricsCollector(0.01)
+    next_id = cycle(data.ids())
+    translator.trans(next_id())
+    return lambda: translator.trans(next_id(), {'name': 'Adam', 'count': 3})
+
+
+@benchmark('translator.trans_missing')
+def bench_trans_missing(data):
+    translator = data.translator()
+    next_id = cycle(['missing.key%d' % i for i in range(1000)])
+    translator.trans(next_id())
+    return lambda: translator.trans(next_id())
+
+
+@benchmark('translator.trans_explicit_locale_domain')
+def bench_trans_domain(data):
+    translator = data.translator()
+    next_id = cycle(data.ids(domain='admin'))
+    translator.trans(next_id(), domain='admin', locale='fr')
+    return lambda: translator.trans(next_id(), domain='admin', locale='fr')
+
+
+@benchmark('translator.transchoice')
+def bench_transchoice(data):
+    translator = data.translator()
+    next_id = cycle(data.ids(choice=True))
+    next_number = cycle(list(range(30)))
+    translator.transchoice(next_id(), 1)
+    return lambda: translator.transchoice(next_id(), next_number())
+
+
+@benchmark('selector.select_message', sizes=False)
+def bench_select_message(data):
+    next_number = cycle(list(range(30)))
+    next_locale = cycle(PLURAL_LOCALES)
+    return lambda: select_message(CHOICE, next_number(), next_locale())
+
+
+@benchmark('selector.PluralizationRules.get', sizes=False)
+def bench_pluralization_rules(data):
+    next_number = cycle(list(range(200)))
+    next_locale = cycle(PLURAL_LOCALES + ['pt_BR', 'fr_FR', 'unknown'])
+    return lambda: PluralizationRules.get(next_number(), next_locale())
+
+
+def loader_benchmark(name, loader, dumper):
+    @benchmark('loaders.' + name)
+    def bench_loader(data):
+        path = data.file(dumper)
+        return lambda: loader.load(path, 'en')
+    return bench_loader
+
+
+@benchmark('loaders.DictLoader')
+def bench_dict_loader(data):
+    loader = loaders.DictLoader()
+    messages = data.messages['messages']
+    return lambda: loader.load(messages, 'en')
+
+
+@benchmark('loaders.DictLoader.flatten')
+def bench_dict_loader_flatten(data):
+    loader = loaders.DictLoader()
+    tree = data.tree
+    return lambda: loader.flatten(tree)
+
+
+def streaming_json_loader():
+    loader = loaders.JSONFileLoader()
+    loader.streaming = True
+    return loader
+
+
+def native_po_loader():
+    loader = loaders.PoFileLoader()
+    loader.native = True
+    return loader
+
+loader_benchmark('JSONFileLoader', loaders.JSONFileLoader(), dumpers.JSONFileDumper())
+loader_benchmark('JSONFileLoader(streaming)', streaming_json_loader(), dumpers.JSONFileDumper())
+loader_benchmark('YamlFileLoader', loaders.YamlFileLoader(), dumpers.YamlFileDumper())
+loader_benchmark('PoFileLoader', loaders.PoFileLoader(), dumpers.PoFileDumper())
+loader_benchmark('PoFileLoader(native)', native_po_loader(), dumpers.PoFileDumper())
+loader_benchmark('MoFileLoader', loaders.MoFileLoader(), dumpers.MoFileDumper())
+
+
+def dumper_benchmark(dumper):
+    @benchmark('dumpers.' + dumper.__class__.__name__)
+    def bench_dumper(data):
+        directory = tempfile.mkdtemp(dir=data.directory)
+        dumper.backup = False
+        catalogue = data.catalogue('en')
+        return lambda: dumper.dump(catalogue, {'path': directory})
+    return bench_dumper
+
+for _dumper in [dumpers.JSONFileDumper(), dumpers.YamlFileDumper(),
+                dumpers.PoFileDumper(), dumpers.MoFileDumper()]:
+    dumper_benchmark(_dumper)
+
+
+def operation_benchmark(operation):
+    @benchmark('operations.' + operation.__name__)
+    def bench_operation(data):
+        # the target drops half of the messages of the source, changes the
+        # others and adds new ones
+        source = data.catalogue('en')
+        target = MessageCatalogue('en', data.catalogue_messages('fr'))
+        target.add(dict(('new.key%d' % i, 'New %d' % i) for i in range(data.size // 10)))
+
+        def run():
+            result = operation(source, target)
+            result.get_domains()
+            return result.get_result()
+        return run
+    return bench_operation
+
+operation_benchmark(DiffOperation)
+operation_benchmark(MergeOperation)
+
+
+@benchmark('extractors.PythonExtractor')
+def bench_python_extractor(data):
+    from python_translate.extractors.python import PythonExtractor
+
+    lines = []
+    for i, id in enumerate(sorted(data.messages['messages'])):
+        if i % 3 == 0:
+            lines.append("tranzchoice('%s', count, {'name': name})" % id)
+        else:
+            lines.append("_('%s', {'count': %d})" % (id, i))
+    source = '\n'.join(lines)
+    extractor = PythonExtractor()
+    return lambda: extractor.extract_translations(source)
+
+
+def percentile(values, fraction):
+    """
+    @type values: list[float]
+    @param values: Sorted values
+    """
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def run_benchmark(setup, data, min_time, min_runs, max_runs):
+    """
+    @rtype: dict
+    """
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    try:
+        operation = setup(data)
+        operation()
+    finally:
+        peak = None
+        if tracemalloc is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    timer = timeit.default_timer
+    latencies = []
+    deadline = timer() + min_time
+    while len(latencies) < max_runs and (
+            len(latencies) < min_runs or timer() < deadline):
+        start = timer()
+        operation()
+        latencies.append(timer() - start)
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'runs': len(latencies),
+        'ops_per_sec': len(latencies) / total if total else None,
+        'mean': total / len(latencies),
+        'min': latencies[0],
+        'p50': percentile(latencies, 0.5),
+        'p90': percentile(latencies, 0.9),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1],
+        'peak_memory': peak,
+    }
+
+
+def format_duration(seconds):
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return '%.2f%s' % (seconds / scale, unit)
+    return '%.0fns' % (seconds / 1e-9)
+
+
+def format_memory(size):
+    if size is None:
+        return '-'
+    for unit, scale in [('GB', 1 << 30), ('MB', 1 << 20), ('KB', 1 << 10)]:
+        if size >= scale:
+            return '%.1f%s' % (size / float(scale), unit)
+    return '%dB' % size
+
+
+def load_baseline(path):
+    with open(path) as f:
+        results = json.load(f)['results']
+    return dict(((r['name'], r['size']), r) for r in results if 'error' not in r)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[1].replace('\n', ' '))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='number of messages of the synthetic catalogues')
+    parser.add_argument('--filter', default=None,
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help='seconds to run each benchmark for, at least')
+    parser.add_argument('--min-runs', type=int, default=3)
+    parser.add_argument('--max-runs', type=int, default=100000)
+    parser.add_argument('--output', default=None,
+                        help='write results to this JSON file')
+    parser.add_argument('--compare', default=None,
+                        help='JSON file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.compare) if args.compare else {}
+    directory = tempfile.mkdtemp()
+    results = []
+    try:
+        print('{0:<42}{1:>9}{2:>14}{3:>10}{4:>10}{5:>10}{6:>10}{7:>9}'.format(
+            'benchmark', 'size', 'ops/sec', 'p50', 'p90', 'p99', 'memory',
+            'change' if baseline else ''))
+        for size in args.sizes:
+            data = Dataset(size, directory)
+            for name, setup, sized in BENCHMARKS:
+                if args.filter and args.filter not in name:
+                    continue
+                if not sized and size != args.sizes[0]:
+                    continue
+                result_size = size if sized else None
+
+                try:
+                    result = run_benchmark(
+                        setup, data, args.min_time, args.min_runs, args.max_runs)
+                except ImportError as e:
+                    results.append({'name': name, 'size': result_size, 'error': str(e)})
+                    print('{0:<42}{1:>9}  skipped: {2}'.format(
+                        name, result_size or '-', e))
+                    continue
+
+                result['name'] = name
+                result['size'] = result_size
+                results.append(result)
+
+                change = ''
+                previous = baseline.get((name, result_size))
+                if previous is not None and previous.get('ops_per_sec'):
+                    change = '%+.1f%%' % (
+                        100.0 * (result['ops_per_sec'] / previous['ops_per_sec'] - 1))
+                print('{0:<42}{1:>9}{2:>14.1f}{3:>10}{4:>10}{5:>10}{6:>10}{7:>9}'.format(
+                    name, result_size or '-', result['ops_per_sec'],
+                    format_duration(result['p50']), format_duration(result['p90']),
+                    format_duration(result['p99']), format_memory(result['peak_memory']),
+                    change))
+                sys.stdout.flush()
+            del data
+    finally:
+        shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'date': datetime.datetime.utcnow().isoformat(),
+                'python': platform.python_implementation() + ' ' + platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': multiprocessing.cpu_count(),
+                'seed': SEED,
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
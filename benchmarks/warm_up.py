@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+
+Compares loading YAML catalogues of many locales one by one with
+Translator.warm_up() using an increasing number of workers.
+
+    python benchmarks/warm_up.py --locales 60 --messages 1000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_translate import loaders
+from python_translate.translations import Translator
+
+
+def generate(directory, locales, messages):
+    for locale in locales:
+        with open(os.path.join(directory, locale + '.yml'), 'w') as f:
+            for i in range(messages):
+                f.write('section{0}:\n  key{1}: "Message {1} in {2}"\n'.format(
+                    i // 10, i, locale))
+
+
+def create_translator(directory, locales):
+    translator = Translator('en')
+    translator.add_loader('yml', loaders.YamlFileLoader())
+    for locale in locales:
+        translator.add_resource(
+            'yml', os.path.join(directory, locale + '.yml'), locale)
+    return translator
+
+
+def measure(directory, locales, load, repeat):
+    best = None
+    for _ in range(repeat):
+        translator = create_translator(directory, locales)
+        start = time.time()
+        load(translator)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[-2])
+    parser.add_argument('--locales', type=int, default=60)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--workers', type=int, nargs='+',
+        default=sorted(set([1, 2, 4, multiprocessing.cpu_count()])))
+    args = parser.parse_args()
+
+    locales = ['l{0:02d}'.format(i) for i in range(args.locales)]
+    directory = tempfile.mkdtemp()
+    try:
+        generate(directory, locales, args.messages)
+
+        def serial(translator):
+            for locale in locales:
+                translator.get_catalogue(locale)
+
+        baseline = measure(directory, locales, serial, args.repeat)
+        print('{0} locales x {1} messages, {2} CPUs'.format(
+            args.locales, args.messages, multiprocessing.cpu_count()))
+        print('{0:<22}{1:>10}{2:>10}'.format('loading', 'seconds', 'speedup'))
+        print('{0:<22}{1:>10.3f}{2:>10.2f}'.format('serial', baseline, 1))
+
+        for executor in ['process', 'thread']:
+            for workers in args.workers:
+                def parallel(translator):
+                    translator.warm_up(locales, workers, executor)
+
+                elapsed = measure(directory, locales, parallel, args.repeat)
+                print('{0:<22}{1:>10.3f}{2:>10.2f}'.format(
+                    '{0} x {1}'.format(executor, workers),
+                    elapsed,
+                    baseline / elapsed))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
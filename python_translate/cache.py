@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+from python_translate.mofile import MoFile, MoMessages, write_mo_file
+
+# For python 2 compatibility
+try:
+    unicode
+except NameError:
+    unicode = str
+
+CACHE_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(resource):
+    """
+    Returns what identifies the current contents of a file resource.
+
+    @type resource: mixed
+    @param resource: A resource
+
+    @rtype: tuple|None
+    @return: (mtime, size) of the file or None if resource is not a file
+    """
+    if not isinstance(resource, (str, unicode)):
+        return None
+    try:
+        stat = os.stat(resource)
+    except (OSError, ValueError):
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class CatalogueCache(object):
+
+    """
+    Stores fully merged catalogues in a directory, one compiled file per
+    locale.
+
+    Files use the MO format: every message is stored under its domain as
+    msgctxt, and the header entry lists the domains and resources of the
+    catalogue. Messages a MO file can not hold (ids or values that are not
+    strings, ids with NUL or \x04 characters) are stored in the header as
+    JSON, with their types. Cached catalogues are memory-mapped when loaded and their
+    messages are decoded on first access (see python_translate.mofile).
+
+    Attributes:
+        directory  str
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get_key(self, locale, parts):
+        """
+        Hashes everything a cached catalogue depends on.
+
+        @type locale: str
+        @type parts: list
+        @param parts: reprs of these values identify the catalogue inputs
+
+        @rtype: str
+        """
+        digest = hashlib.sha1()
+        digest.update(repr((CACHE_VERSION, locale, parts)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def has(self, locale, key):
+        """
+        Checks if a catalogue is cached under the key.
+
+        @type locale: str
+        @type key: str
+
+        @rtype: bool
+        """
+        return os.path.isfile(self._get_path(locale, key))
+
+    def load(self, locale, key, catalogue):
+        """
+        Loads cached messages into an empty catalogue.
+
+        @type locale: str
+        @type key: str
+
+        @type catalogue: MessageCatalogue
+        @param catalogue: An empty catalogue
+
+        @rtype: bool
+        @return: False if there is no valid cache entry for the key
+        """
+        path = self._get_path(locale, key)
+        if not os.path.isfile(path):
+            return False
+
+        try:
+            mo = MoFile(path)
+            metadata = json.loads(mo.translation(0).decode('utf-8'))
+        except (ValueError, EnvironmentError):
+            return False
+
+        values = {}
+        for domain, id, message in metadata.get('values', ()):
+            values.setdefault(domain, {})[id] = message
+        for domain in metadata['domains']:
+            catalogue.add(MoMessages(
+                mo, catalogue.case_sensitive, domain, values.get(domain)), domain)
+        for resource in metadata['resources']:
+            catalogue.add_resource(resource)
+
+        return True
+
+    def dump(self, catalogue, key):
+        """
+        Writes a catalogue to the cache. Catalogues with messages that can
+        not be stored (values JSON can not encode, NUL or \\x04 characters
+        in domains) are not cached, and a warning is logged.
+
+        @type catalogue: MessageCatalogue
+        @type key: str
+
+        @rtype: bool
+        @return: True if the catalogue was written
+        """
+        entries = []
+        values = []
+        for domain, messages in catalogue.messages.items():
+            if u'\x00' in domain or u'\x04' in domain:
+                logger.warning(
+                    'Not caching the "%s" catalogue: invalid domain %r',
+                    catalogue.locale, domain)
+                return False
+            prefix = domain.encode('utf-8') + b'\x04'
+            for id, message in messages.items():
+                if not isinstance(id, (str, unicode)) \
+                        or not isinstance(message, (str, unicode)) \
+                        or u'\x00' in id or u'\x04' in id:
+                    values.append((domain, id, message))
+                else:
+                    entries.append(
+                        (prefix + id.encode('utf-8'), message.encode('utf-8')))
+
+        metadata = {
+            'domains': list(catalogue.messages.keys()),
+            'resources': [unicode(r) for r in catalogue.get_resources()],
+            'values': values,
+        }
+        try:
+            header = json.dumps(metadata)
+        except (TypeError, ValueError) as e:
+            logger.warning(
+                'Not caching the "%s" catalogue: %s', catalogue.locale, e)
+            return False
+        entries.append((b'', header.encode('utf-8')))
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            write_mo_file(tmp_path, entries)
+            path = self._get_path(catalogue.locale, key)
+            getattr(os, 'replace', os.rename)(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        self._remove_stale(catalogue.locale, key)
+
+        return True
+
+    def _get_prefix(self, locale):
+        return 'catalogue-{0}-'.format(
+            hashlib.sha1((locale or '').encode('utf-8')).hexdigest()[:16])
+
+    def _get_path(self, locale, key):
+        return os.path.join(
+            self.directory, '{0}{1}.mo'.format(self._get_prefix(locale), key))
+
+    def _remove_stale(self, locale, key):
+        prefix = self._get_prefix(locale)
+        current = os.path.basename(self._get_path(locale, key))
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and filename != current:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import string
+import collections
+
+_formatter = string.Formatter()
+
+
+class MessageTemplate(object):
+
+    """
+    A message compiled into literal chunks and placeholder references, so
+    formatting it does not need to parse the message again.
+
+    Messages using placeholders that can not be resolved by a plain
+    parameter lookup (positional fields, attribute or item access, nested
+    format specs) are formatted with string.Formatter as a whole.
+
+    Attributes:
+        message  str         The source message
+        chunks   list|None   Literal strings and (name, conversion, spec)
+                             tuples, None when the message needs the
+                             generic formatter
+    """
+
+    __slots__ = ('message', 'chunks')
+
+    def __init__(self, message):
+        self.message = message
+        self.chunks = self._compile(message)
+
+    def format(self, parameters):
+        """
+        Substitutes parameters into the message. Missing parameters are
+        replaced by an empty string.
+
+        @type parameters: dict
+        @param parameters: A dict of parameters for the message
+
+        @rtype: str
+        @return: Formatted message
+        """
+        if self.chunks is None:
+            return _formatter.vformat(
+                self.message,
+                (),
+                collections.defaultdict(str, **parameters)
+            )
+
+        result = []
+        for chunk in self.chunks:
+            if chunk.__class__ is tuple:
+                name, conversion, spec = chunk
+                value = parameters.get(name, '')
+                if conversion is not None:
+                    value = _formatter.convert_field(value, conversion)
+                result.append(format(value, spec))
+            else:
+                result.append(chunk)
+
+        return ''.join(result)
+
+    @staticmethod
+    def _compile(message):
+        chunks = []
+        for literal, name, spec, conversion in _formatter.parse(message):
+            if literal:
+                chunks.append(literal)
+            if name is None:
+                continue
+            if not name or name.isdigit() or '.' in name or '[' in name \
+                    or '{' in spec:
+                return None
+            chunks.append((name, conversion, spec))
+
+        return chunks
+
+
+def compile_message(message):
+    """
+    Compiles a message into a MessageTemplate.
+
+    @type message: str
+    @param message: The message
+
+    @rtype: MessageTemplate
+    @raises: ValueError If the message is not a valid format string
+    """
+    return MessageTemplate(message)
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import random
+import threading
+import collections
+
+from python_translate.translations import MessageCatalogue
+
+# For python 2 compatibility
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+class Instrumentation(object):
+
+    """
+    Receives events of a Translator it is set on (see
+    Translator.instrumentation). Every method does nothing, subclasses
+    override the ones they need.
+
+    Lookups are reported for the calls sample() accepts, only those calls
+    have their formatting timed. Loads are always reported.
+
+    Hooks are called from the threads translating, they must not raise.
+    Every method translating messages reports its lookups, one sample()
+    call per message. Use CompositeInstrumentation to set several
+    instrumentations on a translator.
+    """
+
+    def sample(self):
+        """
+        Decides whether a call to trans() or transchoice() is reported.
+
+        @rtype: bool
+        """
+        return True
+
+    def lookup(self, locale, domain, id, found_locale, hops):
+        """
+        Called for each message looked up.
+
+        @type locale: str
+        @param locale: The requested locale
+
+        @type domain: str
+        @type id: str
+
+        @type found_locale: str|None
+        @param found_locale: Locale of the catalogue defining the message,
+                             None if the id is returned unchanged
+
+        @type hops: int
+        @param hops: Fallback catalogues walked to find the message, 0 if it
+                     is found in the catalogue of the requested locale or
+                     is missing
+        """
+
+    def formatted(self, seconds):
+        """
+        Called with the time spent selecting and formatting a message.
+        """
+
+    def resource_loaded(self, locale, format, resource, domain, seconds):
+        """
+        Called after a loader loaded a resource.
+
+        @type format: str
+        @param format: Name of the loader
+
+        @param resource: The resource, as registered with add_resource()
+        """
+
+    def catalogue_loaded(self, locale, seconds):
+        """
+        Called after the catalogue of a locale is loaded, from its resources
+        or from the cache, its fallback catalogues excluded.
+        """
+
+
+class CompositeInstrumentation(Instrumentation):
+
+    """
+    Forwards the events of a translator to several instrumentations, e.g. a
+    MetricsCollector and a MissingTranslationCollector.
+
+    Each instrumentation keeps its own sampling: the lookup and formatting
+    time of a call are only forwarded to the instrumentations whose
+    sample() accepted it. Loads are forwarded to all of them.
+
+    Attributes:
+        instrumentations  list[Instrumentation]
+    """
+
+    def __init__(self, instrumentations):
+        """
+        @type instrumentations: iterable[Instrumentation]
+        """
+        self.instrumentations = list(instrumentations)
+        # instrumentations that sampled the current call of each thread
+        self._sampled = threading.local()
+        super(CompositeInstrumentation, self).__init__()
+
+    def sample(self):
+        sampled = [i for i in self.instrumentations if i.sample()]
+        self._sampled.instrumentations = sampled
+        return bool(sampled)
+
+    def _get_sampled(self):
+        return getattr(self._sampled, 'instrumentations', self.instrumentations)
+
+    def lookup(self, locale, domain, id, found_locale, hops):
+        for instrumentation in self._get_sampled():
+            instrumentation.lookup(locale, domain, id, found_locale, hops)
+
+    def formatted(self, seconds):
+        for instrumentation in self._get_sampled():
+            instrumentation.formatted(seconds)
+
+    def resource_loaded(self, locale, format, resource, domain, seconds):
+        for instrumentation in self.instrumentations:
+            instrumentation.resource_loaded(locale, format, resource, domain, seconds)
+
+    def catalogue_loaded(self, locale, seconds):
+        for instrumentation in self.instrumentations:
+            instrumentation.catalogue_loaded(locale, seconds)
+
+
+class MetricsCollector(Instrumentation):
+
+    """
+    Aggregates the events of one or more translators in memory, to be
+    scraped with snapshot().
+
+    With a sample rate below 1, only that fraction of trans() and
+    transchoice() calls is recorded and lookup counts are extrapolated
+    from the sampled calls.
+
+    Attributes:
+        sample_rate  float  Fraction of the calls recorded, from 0 to 1
+    """
+
+    def __init__(self, sample_rate=1.0):
+        """
+        @type sample_rate: float
+        @raises: ValueError If the sample rate is not between 0 and 1
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('The sample rate must be between 0 and 1')
+
+        self.sample_rate = sample_rate
+        self._random = random.random
+        self._lock = threading.Lock()
+        self.reset()
+        super(MetricsCollector, self).__init__()
+
+    def sample(self):
+        return self.sample_rate >= 1 or self._random() < self.sample_rate
+
+    def lookup(self, locale, domain, id, found_locale, hops):
+        if found_locale is None:
+            kind = 'misses'
+        elif hops:
+            kind = 'fallbacks'
+        else:
+            kind = 'hits'
+
+        with self._lock:
+            self._lookups[(locale, domain, kind)] += 1
+            if hops:
+                self._hops[hops] += 1
+
+    def formatted(self, seconds):
+        with self._lock:
+            self._format.add(seconds)
+
+    def resource_loaded(self, locale, format, resource, domain, seconds):
+        if not isinstance(resource, (str, unicode)):
+            resource = '<{0}>'.format(type(resource).__name__)
+
+        with self._lock:
+            timing = self._resources.get((locale, domain, format, resource))
+            if timing is None:
+                timing = self._resources[(locale, domain, format, resource)] = _Timing()
+            timing.add(seconds)
+
+    def catalogue_loaded(self, locale, seconds):
+        with self._lock:
+            timing = self._catalogues.get(locale)
+            if timing is None:
+                timing = self._catalogues[locale] = _Timing()
+            timing.add(seconds)
+
+    def reset(self):
+        """
+        Forgets everything recorded so far.
+        """
+        with self._lock:
+            self._lookups = collections.Counter()
+            self._hops = collections.Counter()
+            self._format = _Timing()
+            self._resources = {}
+            self._catalogues = {}
+
+    def snapshot(self, reset=False):
+        """
+        Returns what was recorded so far, as plain lists and dicts that can
+        be serialized to JSON.
+
+        @type reset: bool
+        @param reset: Whether to forget what is returned
+
+        @rtype: dict
+        """
+        with self._lock:
+            lookups, hops, format = self._lookups, self._hops, self._format
+            resources, catalogues = self._resources, self._catalogues
+            if reset:
+                self._lookups = collections.Counter()
+                self._hops = collections.Counter()
+                self._format = _Timing()
+                self._resources = {}
+                self._catalogues = {}
+            else:
+                lookups, hops = lookups.copy(), hops.copy()
+                format = format.copy()
+                resources = dict((k, v.copy()) for k, v in resources.items())
+                catalogues = dict((k, v.copy()) for k, v in catalogues.items())
+
+        scale = 1.0 / self.sample_rate if self.sample_rate else 0
+        counts = {}
+        for (locale, domain, kind), count in lookups.items():
+            entry = counts.setdefault((locale, domain), {
+                'locale': locale, 'domain': domain,
+                'hits': 0, 'fallbacks': 0, 'misses': 0})
+            entry[kind] = int(round(count * scale))
+
+        return {
+            'sample_rate': self.sample_rate,
+            'lookups': sorted(
+                counts.values(), key=lambda e: (e['locale'], e['domain'])),
+            'fallback_hops': dict(
+                (hops, int(round(count * scale))) for hops, count in hops.items()),
+            'format': format.as_dict(),
+            'resources': [
+                dict(timing.as_dict(), locale=locale, domain=domain,
+                     format=format_name, resource=resource)
+                for (locale, domain, format_name, resource), timing
+                in sorted(resources.items())],
+            'catalogues': [
+                dict(timing.as_dict(), locale=locale)
+                for locale, timing in sorted(catalogues.items())],
+        }
+
+
+class MissingTranslationCollector(Instrumentation):
+
+    """
+    Records the (locale, domain, id) triples of missing messages, in bounded
+    memory whatever the ids looked up.
+
+    The most frequent misses are tracked with the space-saving algorithm:
+    at most `capacity` triples are kept, and a new triple replaces the least
+    frequent one when the collector is full, inheriting its count. The
+    count of a triple is thus an upper bound of its actual count, by at
+    most its error. Every triple missing more than 1/capacity of the times
+    is guaranteed to be tracked.
+
+    Attributes:
+        capacity    int  Number of triples tracked
+        max_length  int  Longer ids are not tracked, only counted in ignored
+        ignored     int  Number of misses of ids longer than max_length
+    """
+
+    def __init__(self, capacity=1000, max_length=1000):
+        """
+        @type capacity: int
+        @type max_length: int
+        @raises: ValueError If the capacity is not positive
+        """
+        if capacity < 1:
+            raise ValueError('The capacity must be positive')
+
+        self.capacity = capacity
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self.reset()
+        super(MissingTranslationCollector, self).__init__()
+
+    def lookup(self, locale, domain, id, found_locale, hops):
+        if found_locale is not None:
+            return
+        key = (locale, domain, id)
+        with self._lock:
+            if len(id) > self.max_length:
+                self.ignored += 1
+                return
+
+            counters = self._counters
+            buckets = self._buckets
+            counter = counters.get(key)
+            if counter is None:
+                if len(counters) < self.capacity:
+                    counter = counters[key] = [0, 0]
+                    self._min = 0
+                else:
+                    # replace a least frequent triple
+                    bucket = buckets[self._min]
+                    evicted = next(iter(bucket))
+                    self._remove(evicted, self._min)
+                    counter = counters[key] = [self._min, self._min]
+                    del counters[evicted]
+            else:
+                self._remove(key, counter[0])
+
+            counter[0] += 1
+            count = counter[0]
+            bucket = buckets.get(count)
+            if bucket is None:
+                bucket = buckets[count] = {}
+            bucket[key] = True
+            if self._min not in buckets:
+                self._min = count
+
+    def _remove(self, key, count):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def reset(self):
+        """
+        Forgets everything recorded so far.
+        """
+        with self._lock:
+            # counters map triples to [count, error], buckets map counts to
+            # the triples having them
+            self._counters = {}
+            self._buckets = {}
+            self._min = 0
+            self.ignored = 0
+
+    def get_missing(self, locale=None):
+        """
+        Returns the tracked misses, most frequent first.
+
+        @type locale: str|None
+        @param locale: Only return misses of this locale
+
+        @rtype: list[(str, str, str, int, int)]
+        @return: (locale, domain, id, count, error) tuples
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+
+        missing = [
+            (key[0], key[1], key[2], counter[0], counter[1])
+            for key, counter in counters
+            if locale is None or key[0] == locale]
+        missing.sort(key=lambda m: (-m[3], m[0], m[1], m[2]))
+        return missing
+
+    def get_catalogue(self, locale):
+        """
+        Returns the tracked misses of a locale as a catalogue, each message
+        translated by its id, to be written with a dumper.
+
+        @type locale: str
+        @rtype: MessageCatalogue
+        """
+        messages = {}
+        for _, domain, id, _, _ in self.get_missing(locale):
+            messages.setdefault(domain, {})[id] = id
+        return MessageCatalogue(locale, messages)
+
+
+class _Timing(object):
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self, count=0, total=0.0, max=0.0):
+        self.count = count
+        self.total = total
+        self.max = max
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def copy(self):
+        return _Timing(self.count, self.total, self.max)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+        }
@@ -11,12 +11,29 @@ files that were distributed with this source code.
 """
 
 
+import re
 import sys
+import codecs
 import os.path
 import yaml
 import json
-import collections
+from json.decoder import scanstring
 import python_translate.translations
+from python_translate.mofile import MoFile, MoMessages
+from python_translate.utils import CaseInsensitiveIndex
+import python_translate.pofile as pofile
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+# The libyaml based loader is several times faster than the pure Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
 
 class NotFoundResourceException(Exception):
     pass
@@ -124,7 +141,7 @@ class DictLoader(Loader):
 
         return catalogue
 
-    def flatten(self, messages, parent_key=''):
+    def flatten(self, messages, parent_key='', output=None):
         """
         Flattens an nested array of translations.
 
@@ -133,42 +150,171 @@ class DictLoader(Loader):
         Becomes:
           'key.key2.key3' => 'value'
 
-        This function takes an array by reference and will modify it
+        Nested mappings are walked with an explicit stack, depth first, so
+        that any depth is supported and keys keep the order of the
+        recursive walk (the last value of a key wins).
 
         @type messages: dict
         @param messages: The dict that will be flattened
 
         @type parent_key: str
-        @param parent_key: Current path being parsed, used internally for recursive calls
+        @param parent_key: Prefix of the keys
+
+        @type output: MutableMapping
+        @param output: Mapping the flattened messages are written to, e.g.
+                       the messages of a catalogue domain; a new dict by
+                       default
+
+        @rtype: MutableMapping
+        @return: output
         """
-        items = []
-        sep = '.'
-        for k, v in list(messages.items()):
-            new_key = "{0}{1}{2}".format(parent_key, sep, k) if parent_key else k
-            if isinstance(v, collections.MutableMapping):
-                items.extend(list(self.flatten(v, new_key).items()))
+        if output is None:
+            output = {}
+
+        join = '{0}.{1}'.format
+        stack = [(parent_key, iter(list(messages.items())))]
+        while stack:
+            prefix, items = stack[-1]
+            for k, v in items:
+                key = join(prefix, k) if prefix else k
+                if isinstance(v, MutableMapping):
+                    stack.append((key, iter(v.items())))
+                    break
+                output[key] = v
             else:
-                items.append((new_key, v))
-        return dict(items)
+                stack.pop()
+
+        return output
 
 
 class YamlFileLoader(DictLoader, FileMixin):
 
+    """
+    Loads YAML files, with the libyaml bindings of PyYAML when they are
+    available (see YAML_LOADER).
+
+    Nested mappings are flattened from the events of the parser, without
+    building the nested dicts. Files using aliases, merge keys, sequences,
+    duplicate keys, tagged mappings or more than one document are loaded
+    with yaml.load() and flattened afterwards instead.
+    """
+
     def load(self, resource, locale, domain='messages'):
-        messages = yaml.safe_load(self.read_file(resource))
-        if messages is None:
-            messages = {}
-        
+        self.assert_valid_path(resource)
 
-        if not isinstance(messages, dict):
-            raise InvalidResourceException(
-                'The file passed to YamlLoader must be a YAML array')
+        with open(resource, 'rb') as file:
+            try:
+                messages = self.flatten_events(file)
+            except _Unsupported:
+                file.seek(0)
+                messages = yaml.load(file, Loader=YAML_LOADER)
+                if messages is None:
+                    messages = {}
+
+                if not isinstance(messages, dict):
+                    raise InvalidResourceException(
+                        'The file passed to YamlLoader must be a YAML array')
+                messages = self.flatten(messages)
 
-        catalogue = super(YamlFileLoader, self).load(messages, locale, domain)
+        catalogue = python_translate.translations.MessageCatalogue(locale)
+        catalogue.add(messages, domain)
         catalogue.add_resource(resource)
 
         return catalogue
 
+    def flatten_events(self, stream):
+        """
+        Parses a YAML document whose root is a mapping and flattens it as
+        flatten() would, from the events of the parser.
+
+        @type stream: file|str
+        @param stream: The YAML document
+
+        @rtype: dict
+        @raises: yaml.YAMLError If the document is invalid
+        """
+        loader = YAML_LOADER(stream)
+        try:
+            return self._flatten_events(loader)
+        finally:
+            loader.dispose()
+
+    def _flatten_events(self, loader):
+        get_event = loader.get_event
+        messages = {}
+
+        get_event()
+        if not loader.check_event(yaml.DocumentStartEvent):
+            raise _Unsupported()
+        get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise _Unsupported()
+        _check_mapping(get_event())
+
+        # (prefix, keys) of the mappings being flattened
+        stack = []
+        prefix, keys = '', set()
+        while True:
+            event = get_event()
+            if isinstance(event, yaml.MappingEndEvent):
+                if not stack:
+                    break
+                prefix, keys = stack.pop()
+                continue
+
+            if not isinstance(event, yaml.ScalarEvent):
+                raise _Unsupported()
+            key = _construct_scalar(loader, event)
+            if key in keys:
+                # the last value replaces nested mappings as a whole
+                raise _Unsupported()
+            keys.add(key)
+            key = "{0}.{1}".format(prefix, key) if prefix else key
+
+            event = get_event()
+            if isinstance(event, yaml.ScalarEvent):
+                messages[key] = _construct_scalar(loader, event)
+            elif isinstance(event, yaml.MappingStartEvent):
+                _check_mapping(event)
+                stack.append((prefix, keys))
+                prefix, keys = key, set()
+            else:
+                raise _Unsupported()
+
+        get_event()
+        if not loader.check_event(yaml.StreamEndEvent):
+            raise _Unsupported()
+
+        return messages
+
+
+class _Unsupported(Exception):
+
+    """
+    Raised when a document cannot be flattened while it is parsed.
+    """
+
+
+def _check_mapping(event):
+    if event.tag not in (None, '!', 'tag:yaml.org,2002:map'):
+        raise _Unsupported()
+
+
+def _construct_scalar(loader, event):
+    """
+    Constructs the value of a scalar event, as yaml.load() would.
+    """
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+    constructor = loader.yaml_constructors.get(tag)
+    if constructor is None or tag == 'tag:yaml.org,2002:merge':
+        raise _Unsupported()
+
+    return constructor(loader, yaml.ScalarNode(
+        tag, event.value, event.start_mark, event.end_mark, event.style))
+
+
 class DummyLoader(DictLoader, FileMixin):
     
     def load(self, resource, locale, domain='messages'):
@@ -181,7 +327,38 @@ class DummyLoader(DictLoader, FileMixin):
 
 class JSONFileLoader(DictLoader, FileMixin):
 
+    """
+    Loads JSON files.
+
+    Set streaming to True to read files in chunks and flatten objects while
+    they are parsed, so that neither the file nor nested dicts are held in
+    memory. Documents that cannot be flattened this way (invalid ones,
+    duplicate keys, a root that is not an object) are loaded as a whole
+    instead, with the same results and errors.
+
+    Attributes:
+        streaming   bool  Parse files in chunks
+        chunk_size  int   Bytes read at once when streaming
+    """
+
+    streaming = False
+    chunk_size = 65536
+
     def load(self, resource, locale, domain='messages'):
+        if self.streaming:
+            self.assert_valid_path(resource)
+            catalogue = python_translate.translations.MessageCatalogue(locale)
+            catalogue.add({}, domain)
+            with open(resource, 'rb') as file:
+                try:
+                    self.flatten_stream(file, catalogue.messages[domain])
+                except _Unsupported:
+                    catalogue = None
+
+            if catalogue is not None:
+                catalogue.add_resource(resource)
+                return catalogue
+
         contents = self.read_file(resource)
         if contents == "":
             messages = None
@@ -205,10 +382,189 @@ class JSONFileLoader(DictLoader, FileMixin):
 
         return catalogue
 
+    def flatten_stream(self, file, output=None):
+        """
+        Parses a UTF-8 encoded JSON document whose root is an object, reading
+        it in chunks, and flattens it as flatten() would.
+
+        @type file: file
+        @param file: A file opened in binary mode
+
+        @type output: MutableMapping
+        @param output: Mapping the flattened messages are written to, e.g.
+                       the messages of a catalogue domain; a new dict by
+                       default. It is partially written if parsing fails.
+
+        @rtype: MutableMapping
+        @return: output
+        @raises: _Unsupported If the document is invalid or cannot be
+                 flattened while it is parsed
+        """
+        if output is None:
+            output = {}
+
+        reader = _JSONReader(file, self.chunk_size)
+        try:
+            return self._flatten_stream(reader, output)
+        except ValueError:
+            # invalid UTF-8
+            raise _Unsupported()
+
+    def _flatten_stream(self, reader, messages):
+        join = '{0}.{1}'.format
+
+        if reader.skip() != '{':
+            raise _Unsupported()
+        reader.position += 1
+
+        # (prefix, keys) of the objects being flattened
+        stack = []
+        prefix, keys = '', set()
+        char = reader.skip()
+        while True:
+            if char == '"':
+                key = reader.string()
+                if key in keys:
+                    # the last value replaces nested objects as a whole
+                    raise _Unsupported()
+                keys.add(key)
+                if reader.skip() != ':':
+                    raise _Unsupported()
+                reader.position += 1
+                key = join(prefix, key) if prefix else key
+
+                char = reader.skip()
+                if char == '"':
+                    messages[key] = reader.string()
+                elif char == '{':
+                    reader.position += 1
+                    stack.append((prefix, keys))
+                    prefix, keys = key, set()
+                    char = reader.skip()
+                    continue
+                else:
+                    messages[key] = reader.value()
+                char = reader.skip()
+            elif char != '}':
+                raise _Unsupported()
+
+            while char == '}':
+                reader.position += 1
+                if not stack:
+                    if reader.skip() is not None:
+                        raise _Unsupported()
+                    return messages
+                prefix, keys = stack.pop()
+                char = reader.skip()
+
+            if char != ',':
+                raise _Unsupported()
+            reader.position += 1
+            char = reader.skip()
+            if char != '"':
+                raise _Unsupported()
+
+
+class _JSONReader(object):
+
+    """
+    Decodes a UTF-8 encoded binary file in chunks, for
+    JSONFileLoader.flatten_stream(). The text consumed is dropped from the
+    buffer when the next chunk is read.
+    """
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = u''
+        self.position = 0
+        self.eof = False
+
+    def read(self):
+        """
+        Appends the next chunk to the buffer.
+
+        @raises: _Unsupported At the end of the file
+        """
+        if self.eof:
+            raise _Unsupported()
+        data = self.file.read(self.chunk_size)
+        self.eof = not data
+        self.buffer = self.buffer[self.position:] + self.decoder.decode(data, self.eof)
+        self.position = 0
+
+    def skip(self):
+        """
+        Skips whitespace.
+
+        @rtype: str|None
+        @return: The next character, None at the end of the file
+        """
+        while True:
+            self.position = _JSON_WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return None
+            self.read()
+
+    def string(self):
+        """
+        Decodes the string starting at the position.
+        """
+        while True:
+            try:
+                value, end = scanstring(self.buffer, self.position + 1)
+            except ValueError:
+                self.read()
+                continue
+            self.position = end
+            return value
+
+    def value(self):
+        """
+        Decodes the value starting at the position, which is not an object
+        nor a string.
+        """
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, self.position)
+            except ValueError:
+                self.read()
+                continue
+            if not self.eof and \
+                    _JSON_NUMBER_TAIL.match(self.buffer, end).end() == len(self.buffer):
+                # a number may go on in the next chunk
+                self.read()
+                continue
+            self.position = end
+            return value
+
 
 class PoFileLoader(DictLoader, FileMixin):
 
+    """
+    Loads portable object (PO) files with polib.
+
+    Set native to True to use the built-in streaming parser of
+    python_translate.pofile instead, which does not need polib and does not
+    build polib's object graph for the file.
+
+    Attributes:
+        native  bool  Use the built-in PO parser
+    """
+
+    native = False
+
     def load(self, resource, locale, domain='messages'):
+        if self.native:
+            catalogue = python_translate.translations.MessageCatalogue(locale)
+            catalogue.add(self._parse_native(resource), domain)
+            catalogue.add_resource(resource)
+
+            return catalogue
+
         messages = self.parse(resource)
 
         catalogue = super(PoFileLoader, self).load(messages, locale, domain)
@@ -249,6 +605,29 @@ class PoFileLoader(DictLoader, FileMixin):
 
         return messages
 
+    def _parse_native(self, resource):
+        """
+        Parses given resource with the built-in PO parser
+
+        @type resource: str
+        @param resource: resource
+
+        @rtype: CaseInsensitiveIndex
+        """
+        self.assert_valid_path(resource)
+
+        messages = CaseInsensitiveIndex()
+        try:
+            with open(resource, 'rb') as f:
+                for id, message in pofile.iter_messages(f):
+                    messages[id] = message
+        except (ValueError, LookupError) as e:
+            self.rethrow(
+                "Invalid resource {0}".format(resource),
+                InvalidResourceException)
+
+        return messages
+
     def _load_contents(self, polib, resource):
         """
         Parses portable object (PO) format using polib
@@ -268,6 +647,37 @@ class PoFileLoader(DictLoader, FileMixin):
 
 class MoFileLoader(PoFileLoader):
 
+    """
+    Loads machine object (MO) files.
+
+    By default files are memory-mapped by python_translate.mofile and
+    messages are decoded on first access, without polib. Set native to
+    False to parse files with polib instead.
+
+    Attributes:
+        native  bool  Use the built-in MO reader
+    """
+
+    native = True
+
+    def load(self, resource, locale, domain='messages'):
+        if not self.native:
+            return super(MoFileLoader, self).load(resource, locale, domain)
+
+        self.assert_valid_path(resource)
+        try:
+            mo = MoFile(resource)
+        except (ValueError, LookupError, UnicodeDecodeError) as e:
+            self.rethrow(
+                "Invalid resource {0}".format(resource),
+                InvalidResourceException)
+
+        catalogue = python_translate.translations.MessageCatalogue(locale)
+        catalogue.add(MoMessages(mo), domain)
+        catalogue.add_resource(resource)
+
+        return catalogue
+
     def _load_contents(self, polib, resource):
         """
         Parses machine object (MO) format using polib
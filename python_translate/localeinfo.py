@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+
+Resolves locale strings once to what is derived from them, so that hot
+paths only do a dict lookup.
+"""
+
+import re
+
+LOCALE_REGEX = re.compile('^[a-z0-9@_\\.\\-]*$', re.I)
+
+# LocaleInfo of valid locales by locale string. Locales may come from user
+# input: invalid ones are never remembered, and the dict starts over once
+# full so that it can not be filled for good
+_infos = {}
+_INFOS_LIMIT = 1024
+
+# Incremented by clear(), so that a record resolved while rules changed is
+# not remembered
+_generation = [0]
+
+
+class LocaleInfo(object):
+
+    """
+    What is derived from a locale string.
+
+    Attributes:
+        locale    str       The locale string
+        language  str       Base language, e.g. "fr" for "fr_FR"
+        valid     bool      Whether the locale matches LOCALE_REGEX
+        plural    callable  Plural rule of the locale (see
+                            selector.PluralizationRules)
+    """
+
+    __slots__ = ('locale', 'language', 'valid', 'plural')
+
+    def __init__(self, locale, language, valid, plural):
+        self.locale = locale
+        self.language = language
+        self.valid = valid
+        self.plural = plural
+
+    def __repr__(self):
+        return '<LocaleInfo {0}>'.format(self.locale)
+
+
+def get_locale_info(locale):
+    """
+    Returns the LocaleInfo of a locale, resolving it on first use. Only
+    valid locales are remembered. Meant to be called on every lookup: a
+    remembered locale costs a single dict lookup.
+
+    @type locale: str
+    @rtype: LocaleInfo
+    """
+    info = _infos.get(locale)
+    if info is None:
+        info = _resolve(locale)
+    return info
+
+
+def clear_locale_infos():
+    """
+    Forgets every resolved locale. Called when plural rules change.
+    """
+    _generation[0] += 1
+    _infos.clear()
+
+
+def _resolve(locale):
+    from python_translate.selector import PluralizationRules, _no_plural
+
+    generation = _generation[0]
+    info = LocaleInfo(
+        locale,
+        locale.split('_')[0],
+        LOCALE_REGEX.match(locale) is not None,
+        PluralizationRules._rules.get(
+            PluralizationRules._normalize(locale), _no_plural))
+
+    if info.valid and generation == _generation[0]:
+        if len(_infos) >= _INFOS_LIMIT:
+            _infos.clear()
+        _infos[locale] = info
+    return info
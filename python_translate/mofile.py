@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import re
+import mmap
+import codecs
+import struct
+
+from python_translate.utils import CaseInsensitiveIndex
+
+MAGIC = 0x950412de
+HEADER_SIZE = 28
+CHARSET_REGEX = re.compile(br'charset=([^\s;]+)', re.I)
+
+
+def hash_string(key):
+    """
+    Hashes a key the way GNU gettext does for the MO hash table.
+
+    @type key: bytes
+    @rtype: int
+    """
+    hval = 0
+    for char in bytearray(key):
+        hval = ((hval << 4) + char) & 0xffffffff
+        g = hval & 0xf0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+class MoFile(object):
+
+    """
+    Read-only, memory-mapped machine object (MO) file.
+
+    Only the header is parsed when the file is opened. Strings are read from
+    the offset tables on demand, and exact lookups use the hash table of the
+    file when it has one.
+
+    Reading a mapped file that is truncated in place crashes the process
+    (SIGBUS), so the size of the mapped file is checked before strings are
+    read: a ValueError is raised instead. Files should be replaced (written
+    to a temporary file and renamed) rather than rewritten, and a changed
+    file opened again.
+
+    Attributes:
+        path     str
+        charset  str  Encoding declared in the header entry, UTF-8 by default
+    """
+
+    def __init__(self, path):
+        """
+        @type path: str
+        @param path: Path to the MO file
+
+        @raises: ValueError If the file is not a valid MO file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            self._size = f.tell()
+            if self._size < HEADER_SIZE:
+                raise ValueError('"{0}" is not a valid MO file'.format(path))
+            # the map keeps its own handle on the file, see _assert_intact()
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._closed = False
+
+        self._parse_header()
+        self._entries = None
+        self.charset = self._read_charset()
+
+    def _parse_header(self):
+        buffer = self._buffer
+        magic, = struct.unpack('<I', buffer[:4])
+        if magic == MAGIC:
+            order = '<'
+        elif magic == struct.unpack('>I', struct.pack('<I', MAGIC))[0]:
+            order = '>'
+        else:
+            raise ValueError(
+                '"{0}" is not a valid MO file (bad magic number)'.format(self.path))
+
+        revision, self.length, originals, translations, hash_size, hash_offset = \
+            struct.unpack(order + '6I', buffer[4:HEADER_SIZE])
+        if revision >> 16 not in (0, 1):
+            raise ValueError(
+                'Unsupported MO file revision {0} in "{1}"'.format(revision, self.path))
+
+        size = len(buffer)
+        if originals + 8 * self.length > size \
+                or translations + 8 * self.length > size \
+                or hash_offset + 4 * hash_size > size:
+            raise ValueError('"{0}" is truncated'.format(self.path))
+
+        self._order = order
+        self._originals = originals
+        self._translations = translations
+        self._hash_size = hash_size if hash_size > 2 else 0
+        self._hash_offset = hash_offset
+
+    def _read_charset(self):
+        if self.length and self.original(0) == b'':
+            index = 0
+        else:
+            index = self.find(b'')
+        if index is not None:
+            match = CHARSET_REGEX.search(self.translation(index))
+            if match:
+                # template headers declare ``charset=CHARSET``; like polib,
+                # fall back to UTF-8 for anything codecs doesn't know
+                try:
+                    charset = match.group(1).decode('ascii')
+                    codecs.lookup(charset)
+                except (UnicodeDecodeError, LookupError):
+                    return 'UTF-8'
+                return charset
+        return 'UTF-8'
+
+    def _assert_intact(self):
+        if self._closed:
+            raise ValueError('"{0}" is closed'.format(self.path))
+        if self._buffer.size() < self._size:
+            raise ValueError('"{0}" was truncated'.format(self.path))
+
+    def _string(self, table, index):
+        self._assert_intact()
+        length, offset = struct.unpack_from(
+            self._order + '2I', self._buffer, table + 8 * index)
+        if offset + length > len(self._buffer):
+            raise ValueError('"{0}" is truncated'.format(self.path))
+        return self._buffer[offset:offset + length]
+
+    def __len__(self):
+        return self.length
+
+    def original(self, index):
+        """
+        Returns the raw original string of an entry.
+
+        @rtype: bytes
+        """
+        return self._string(self._originals, index)
+
+    def translation(self, index):
+        """
+        Returns the raw translation string of an entry.
+
+        @rtype: bytes
+        """
+        return self._string(self._translations, index)
+
+    def translation_forms(self, index):
+        """
+        Returns the decoded translation of an entry, split into plural forms.
+
+        @rtype: list[str]
+        """
+        return self.translation(index).decode(self.charset).split(u'\x00')
+
+    def find(self, key):
+        """
+        Looks up the entry of an exact original string (the msgid, prefixed
+        by msgctxt and \\x04 for entries with a context).
+
+        @type key: bytes
+        @rtype: int|None
+        @return: Index of the entry or None if it is not found
+        """
+        self._assert_intact()
+        if self._hash_size:
+            size = self._hash_size
+            hval = hash_string(key)
+            idx = hval % size
+            incr = 1 + (hval % (size - 2))
+            while True:
+                nstr, = struct.unpack_from(
+                    self._order + 'I', self._buffer, self._hash_offset + 4 * idx)
+                if nstr == 0:
+                    return None
+                nstr -= 1
+                if nstr < self.length and \
+                        self.original(nstr).split(b'\x00', 1)[0] == key:
+                    return nstr
+                if idx >= size - incr:
+                    idx -= size - incr
+                else:
+                    idx += incr
+
+        # originals are sorted by GNU msgfmt, fall back to a binary search
+        lo, hi = 0, self.length
+        while lo < hi:
+            mid = (lo + hi) // 2
+            original = self.original(mid).split(b'\x00', 1)[0]
+            if original < key:
+                lo = mid + 1
+            elif original > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def entries(self):
+        """
+        Returns the decoded ids of all entries, in file order. Translations
+        are not decoded.
+
+        @rtype: list[(str|None, str, str|None, int)]
+        @return: (msgctxt, msgid, msgid_plural, index) tuples
+        """
+        if self._entries is None:
+            self._assert_intact()
+            entries = []
+            charset = self.charset
+            buffer = self._buffer
+            table = struct.unpack_from(
+                '{0}{1}I'.format(self._order, 2 * self.length),
+                buffer, self._originals)
+            if any(table[i] + table[i + 1] > len(buffer)
+                   for i in range(0, len(table), 2)):
+                raise ValueError('"{0}" is truncated'.format(self.path))
+            for index in range(self.length):
+                offset = table[2 * index + 1]
+                original = buffer[offset:offset + table[2 * index]].decode(charset)
+                context = None
+                if u'\x04' in original:
+                    context, original = original.split(u'\x04', 1)
+                plural = None
+                if u'\x00' in original:
+                    original, plural = original.split(u'\x00', 1)
+                entries.append((context, original, plural, index))
+            self._entries = entries
+        return self._entries
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        """
+        Unmaps and closes the file. Reading strings afterwards raises a
+        ValueError.
+        """
+        if not self._closed:
+            self._closed = True
+            self._buffer.close()
+
+
+def _next_prime(number):
+    number |= 1
+    while any(number % i == 0 for i in range(3, int(number ** 0.5) + 1, 2)):
+        number += 2
+    return number
+
+
+def write_mo_file(path, entries):
+    """
+    Writes a little-endian MO file with a hash table.
+
+    @type path: str
+    @param path: Path of the file to write
+
+    @type entries: iterable[(bytes, bytes)]
+    @param entries: (original, translation) pairs. Plural entries join their
+                    msgids and their forms with NUL bytes, entries with a
+                    context prefix the original with msgctxt and \\x04.
+    """
+    entries = sorted(entries)
+    length = len(entries)
+    hash_size = max(_next_prime((length * 4) // 3), 3)
+
+    originals = HEADER_SIZE
+    translations = originals + 8 * length
+    hash_offset = translations + 8 * length
+    offset = hash_offset + 4 * hash_size
+
+    original_table = []
+    translation_table = []
+    strings = []
+    for original, _ in entries:
+        original_table.extend((len(original), offset))
+        strings.append(original + b'\x00')
+        offset += len(original) + 1
+    for _, translation in entries:
+        translation_table.extend((len(translation), offset))
+        strings.append(translation + b'\x00')
+        offset += len(translation) + 1
+
+    hash_table = [0] * hash_size
+    for index, (original, _) in enumerate(entries):
+        hval = hash_string(original.split(b'\x00', 1)[0])
+        idx = hval % hash_size
+        if hash_table[idx]:
+            incr = 1 + (hval % (hash_size - 2))
+            while hash_table[idx]:
+                if idx >= hash_size - incr:
+                    idx -= hash_size - incr
+                else:
+                    idx += incr
+        hash_table[idx] = index + 1
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack(
+            '<7I', MAGIC, 0, length, originals, translations, hash_size, hash_offset))
+        f.write(struct.pack('<{0}I'.format(2 * length), *original_table))
+        f.write(struct.pack('<{0}I'.format(2 * length), *translation_table))
+        f.write(struct.pack('<{0}I'.format(hash_size), *hash_table))
+        f.write(b''.join(strings))
+
+
+SINGULAR = 0
+FIRST_FORM = 1
+ALL_FORMS = 2
+
+
+class MoMessages(CaseInsensitiveIndex):
+
+    """
+    Messages of a MO file, exposed like the messages of a catalogue domain.
+
+    Ids are indexed the first time the mapping is queried, translations are
+    decoded the first time they are read. Messages are the ones the polib
+    based PoFileLoader would produce: msgstr for singular entries and, for
+    plural entries, the first form under msgid and all forms joined with a
+    pipe under msgid_plural.
+
+    Message contexts are ignored unless context is given, in which case
+    only the entries with that msgctxt are exposed. When contexts are
+    ignored, an entry without a msgctxt takes precedence over the entries
+    having one for the same id, whether the ids are indexed or not.
+
+    Writes and full iteration decode all remaining messages first.
+    """
+
+    def __init__(self, mo, case_sensitive=False, context=None, messages=None):
+        """
+        @type mo: MoFile
+
+        @type context: str|None
+        @param context: The msgctxt of the entries to expose
+
+        @type messages: dict|None
+        @param messages: Messages that are not in the file, e.g. values that
+                         are not strings
+        """
+        super(MoMessages, self).__init__(case_sensitive=case_sensitive)
+        self._mo = mo
+        self._context = context
+        self._pending = None
+        for key, value in (messages or {}).items():
+            super(MoMessages, self).__setitem__(key, value)
+
+    def _index(self):
+        if self._pending is None:
+            pending = {}
+            # ids of the entries without a context, which entries with a
+            # context do not replace
+            plain = set()
+            fold = self.fold
+            mo = self._mo
+            for context, msgid, plural, index in mo.entries():
+                if self._context is not None and context != self._context:
+                    continue
+                if plural is not None:
+                    found = [(plural, index, ALL_FORMS)]
+                    if msgid and mo.translation(index).find(b'\x00') != -1:
+                        found.insert(0, (msgid, index, FIRST_FORM))
+                elif msgid:
+                    found = [(msgid, index, SINGULAR)]
+                else:
+                    continue
+
+                for entry in found:
+                    folded = fold(entry[0])
+                    if context is None or self._context is not None:
+                        plain.add(folded)
+                    elif folded in plain:
+                        continue
+                    pending[folded] = entry
+            for folded in self._values:
+                pending.pop(folded, None)
+            self._pending = pending
+        return self._pending
+
+    def _decode(self, folded, key, index, kind):
+        if kind == SINGULAR:
+            value = self._mo.translation(index).decode(self._mo.charset)
+        elif kind == FIRST_FORM:
+            value = self._mo.translation_forms(index)[0]
+        else:
+            value = u'|'.join(self._mo.translation_forms(index))
+        self._values[folded] = value
+        if self._keys is not None:
+            self._keys[folded] = key
+        return value
+
+    def _find(self, key):
+        # exact lookups through the hash table of the file, only valid
+        # before the ids are indexed and when the keys are not folded
+        if self._context is not None:
+            original = u'{0}\x04{1}'.format(self._context, key)
+        else:
+            original = key
+        index = self._mo.find(original.encode(self._mo.charset))
+        if index is None:
+            return None
+        original = self._mo.original(index)
+        if b'\x00' in original or (self._context is None and b'\x04' in original):
+            return None
+        return self._decode(key, key, index, SINGULAR)
+
+    def _materialize(self):
+        pending = self._index()
+        for folded, (key, index, kind) in list(pending.items()):
+            self._decode(folded, key, index, kind)
+        pending.clear()
+
+    def __getitem__(self, key):
+        folded = self.fold(key)
+        try:
+            return self._values[folded]
+        except KeyError:
+            pass
+        if self._pending is None and self._keys is None:
+            value = self._find(key)
+            if value is not None:
+                return value
+        try:
+            key, index, kind = self._index()[folded]
+        except KeyError:
+            # decoded by another thread in the meantime
+            return self._values[folded]
+        value = self._decode(folded, key, index, kind)
+        self._pending.pop(folded, None)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        folded = self.fold(key)
+        # checked again after the index: another thread may have decoded
+        # the message, moving it from the index to the values, in between
+        return folded in self._values or folded in self._index() \
+            or folded in self._values
+
+    def __len__(self):
+        return len(self._values) + len(self._index())
+
+    def __setitem__(self, key, value):
+        self._materialize()
+        super(MoMessages, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._materialize()
+        super(MoMessages, self).__delitem__(key)
+
+    def __iter__(self):
+        self._materialize()
+        return super(MoMessages, self).__iter__()
+
+    def items(self):
+        self._materialize()
+        return super(MoMessages, self).items()
+
+    def values(self):
+        self._materialize()
+        return super(MoMessages, self).values()
+
+    def lower_items(self):
+        self._materialize()
+        return super(MoMessages, self).lower_items()
+
+    def update(self, other=(), **kwargs):
+        self._materialize()
+        super(MoMessages, self).update(other, **kwargs)
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, MoMessages):
+            other._materialize()
+        return super(MoMessages, self).__eq__(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # memory maps can not be pickled, messages are sent decoded
+        return CaseInsensitiveIndex, (dict(self.items()), self.case_sensitive)
+
+    def close(self):
+        """
+        Closes the MO file, shared with the copies of the messages. Messages
+        decoded so far can still be read.
+        """
+        self._mo.close()
+
+    def copy(self):
+        """
+        Returns a lazy copy sharing the memory-mapped file.
+        """
+        copy = MoMessages(self._mo, self.case_sensitive, self._context)
+        copy._values = self._values.copy()
+        if self._keys is not None:
+            copy._keys = self._keys.copy()
+        if self._pending is not None:
+            copy._pending = self._pending.copy()
+        return copy
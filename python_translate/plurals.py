@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+
+Compiles plural rules written in the syntax of the Unicode CLDR
+(http://unicode.org/reports/tr35/tr35-numbers.html#Language_Plural_Rules)
+to Python functions.
+"""
+
+import re
+from decimal import Decimal
+
+# For python 2 compatibility
+try:
+    unicode
+except NameError:
+    unicode = str
+
+try:
+    long
+except NameError:
+    long = int
+
+CATEGORIES = ('zero', 'one', 'two', 'few', 'many', 'other')
+OPERANDS = ('n', 'i', 'v', 'w', 'f', 't', 'c', 'e')
+
+TOKEN_REGEX = re.compile(r'\s*(?:(\d+)|(\.\.)|(!=|=|%|,)|([a-z]+))')
+SAMPLES_REGEX = re.compile(r'@(integer|decimal).*$', re.S)
+RULE_REGEX = re.compile(r'^\s*(zero|one|two|few|many|other)\s*:\s*(.*?)\s*$', re.S)
+
+
+def operands(number):
+    """
+    Returns the CLDR plural operands of a number.
+
+    Integers, and floats with an integral value, have no visible fraction
+    digits. Pass a string or a Decimal to keep trailing zeros visible
+    (e.g. "1.0").
+
+    @type number: int|float|Decimal|str
+
+    @rtype: tuple
+    @return: (n, i, v, w, f, t, c, e)
+    """
+    if isinstance(number, (int, long)):
+        number = abs(number)
+        return number, number, 0, 0, 0, 0, 0, 0
+
+    if isinstance(number, float):
+        if number.is_integer():
+            number = abs(long(number))
+            return number, number, 0, 0, 0, 0, 0, 0
+        text = repr(abs(number))
+    elif isinstance(number, Decimal):
+        text = '{0:f}'.format(abs(number))
+    else:
+        text = unicode(number).strip().lstrip('+-')
+
+    try:
+        if 'e' in text.lower():
+            text = '{0:f}'.format(Decimal(text))
+        integer, _, fraction = text.partition('.')
+        i = long(integer or 0)
+        f = long(fraction) if fraction else 0
+    except Exception:
+        raise ValueError('"{0}" is not a number'.format(number))
+
+    stripped = fraction.rstrip('0')
+    n = float(text) if fraction else i
+    return (n, i, len(fraction), len(stripped), f,
+            long(stripped) if stripped else 0, 0, 0)
+
+
+class PluralRule(object):
+
+    """
+    A compiled set of plural rules. Calling it with a number returns the
+    index of the number's plural category in `categories`.
+
+    Integers take a dedicated code path, where the operands v, w, f, t, c
+    and e are known to be 0, and the plural index of small non-negative
+    integers is precomputed.
+
+    Attributes:
+        rules       dict[str, str]  Conditions by category
+        categories  list[str]       Categories of the rules in CLDR order,
+                                    "other" last
+    """
+
+    table_size = 128
+
+    def __init__(self, rules):
+        """
+        @type rules: str|dict
+        @param rules: "category: condition; ..." or a dict of conditions by
+                      category. Samples (@integer, @decimal) are ignored.
+
+        @raises: ValueError If a rule cannot be parsed
+        """
+        self.rules = parse_rules(rules)
+        self.categories = [c for c in CATEGORIES if c in self.rules]
+        if 'other' not in self.categories:
+            self.categories.append('other')
+
+        conditions = [
+            (index, _Parser(self.rules[category]).parse())
+            for index, category in enumerate(self.categories)
+            if category != 'other']
+
+        self._function = _compile(conditions, len(self.categories) - 1, False)
+        self._integer = _compile(conditions, len(self.categories) - 1, True)
+        integer = self._integer
+        self._table = [integer(number) for number in range(self.table_size)]
+
+    def __call__(self, number):
+        if type(number) is int:
+            if 0 <= number < self.table_size:
+                return self._table[number]
+            return self._integer(number if number >= 0 else -number)
+
+        return self._function(*operands(number))
+
+    def category(self, number):
+        """
+        Returns the plural category of a number, e.g. "one".
+
+        @rtype: str
+        """
+        return self.categories[self(number)]
+
+    def __repr__(self):
+        return '<PluralRule {0}>'.format(
+            '; '.join('{0}: {1}'.format(c, self.rules[c])
+                      for c in self.categories if c in self.rules))
+
+
+_compiled = {}
+
+
+def compile_rule(rules):
+    """
+    Compiles plural rules in the CLDR syntax, reusing the rule compiled
+    earlier for the same rules.
+
+        compile_rule('one: i = 1 and v = 0')
+        compile_rule({'one': 'n = 1', 'few': 'n % 100 = 3..10'})
+
+    @type rules: str|dict
+
+    @rtype: PluralRule
+    @raises: ValueError If a rule cannot be parsed
+    """
+    key = rules if isinstance(rules, (str, unicode)) \
+        else tuple(sorted(rules.items()))
+    rule = _compiled.get(key)
+    if rule is None:
+        rule = _compiled[key] = PluralRule(rules)
+    return rule
+
+
+def parse_rules(rules):
+    """
+    Splits "category: condition; ..." rules, removing samples.
+
+    @type rules: str|dict
+    @rtype: dict[str, str]
+    @raises: ValueError
+    """
+    if not isinstance(rules, dict):
+        parts = [part for part in rules.split(';') if part.strip()]
+        rules = {}
+        for part in parts:
+            match = RULE_REGEX.match(part)
+            if not match:
+                raise ValueError('Invalid plural rule "{0}"'.format(part.strip()))
+            rules[match.group(1)] = match.group(2)
+
+    parsed = {}
+    for category, condition in rules.items():
+        if category not in CATEGORIES:
+            raise ValueError('Unknown plural category "{0}"'.format(category))
+        condition = SAMPLES_REGEX.sub('', condition).strip()
+        if category == 'other':
+            if condition:
+                raise ValueError('The "other" category cannot have a condition')
+            continue
+        if not condition:
+            raise ValueError('Missing condition for category "{0}"'.format(category))
+        parsed[category] = condition
+    return parsed
+
+
+class _Parser(object):
+
+    """
+    Parses a condition to a Python expression of the operands.
+
+        condition     = and_condition ('or' and_condition)*
+        and_condition = relation ('and' relation)*
+        relation      = operand ('%' value)? ('=' | '!=') range_list
+        range_list    = (value | value '..' value) (',' range_list)*
+    """
+
+    def __init__(self, condition):
+        self.condition = condition
+        self.tokens = []
+        position = 0
+        while position < len(condition):
+            match = TOKEN_REGEX.match(condition, position)
+            if not match:
+                if condition[position:].strip():
+                    self.error()
+                break
+            self.tokens.append(match.group(match.lastindex))
+            position = match.end()
+        self.position = 0
+
+    def error(self):
+        raise ValueError('Invalid plural condition "{0}"'.format(self.condition))
+
+    def next(self, expected=None):
+        if self.position >= len(self.tokens):
+            self.error()
+        token = self.tokens[self.position]
+        if expected is not None and token != expected:
+            self.error()
+        self.position += 1
+        return token
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def parse(self):
+        """
+        @rtype: list[list[(str, int|None, bool, list)]]
+        @return: Relations of the and-conditions of the or-condition
+        """
+        condition = [self.parse_and()]
+        while self.peek() == 'or':
+            self.next()
+            condition.append(self.parse_and())
+        if self.peek() is not None:
+            self.error()
+        return condition
+
+    def parse_and(self):
+        relations = [self.parse_relation()]
+        while self.peek() == 'and':
+            self.next()
+            relations.append(self.parse_relation())
+        return relations
+
+    def parse_relation(self):
+        operand = self.next()
+        if operand not in OPERANDS:
+            self.error()
+        modulus = None
+        if self.peek() == '%':
+            self.next()
+            modulus = self.parse_value()
+        operator = self.next()
+        if operator not in ('=', '!='):
+            self.error()
+
+        ranges = [self.parse_range()]
+        while self.peek() == ',':
+            self.next()
+            ranges.append(self.parse_range())
+        return operand, modulus, operator == '=', ranges
+
+    def parse_range(self):
+        low = self.parse_value()
+        if self.peek() == '..':
+            self.next()
+            return low, self.parse_value()
+        return low, low
+
+    def parse_value(self):
+        token = self.next()
+        if not token.isdigit():
+            self.error()
+        return int(token)
+
+
+def _compile(conditions, other, integer):
+    """
+    Generates the function returning the index of the first category whose
+    condition holds.
+
+    @type integer: bool
+    @param integer: Generate the function of non-negative integers, taking
+                    the number as only argument
+    """
+    branches = []
+    for index, condition in conditions:
+        source = ' or '.join(
+            '(' + ' and '.join(_relation(r, integer) for r in relations) + ')'
+            for relations in condition)
+        branches.append('{0} if {1} else '.format(index, source))
+
+    arguments = 'n' if integer else ', '.join(OPERANDS)
+    source = 'lambda {0}: {1}{2}'.format(arguments, ''.join(branches), other)
+    return eval(compile(source, '<plural rule>', 'eval'), {})
+
+
+def _relation(relation, integer):
+    operand, modulus, equals, ranges = relation
+    if integer:
+        expression = '0' if operand not in ('n', 'i') else 'n'
+    else:
+        expression = operand
+    if modulus is not None:
+        expression = '{0} % {1}'.format(expression, modulus)
+
+    # n may have a fraction, it only belongs to ranges when it is integral
+    check_integral = operand == 'n' and not integer
+
+    values = [low for low, high in ranges if low == high]
+    tests = []
+    if values:
+        if len(values) == 1:
+            tests.append('{0} == {1}'.format(expression, values[0]))
+        else:
+            tests.append('{0} in ({1})'.format(
+                expression, ', '.join(str(v) for v in values)))
+    for low, high in ranges:
+        if low != high:
+            test = '{0} <= {1} <= {2}'.format(low, expression, high)
+            if check_integral:
+                test = '({0} and {1} % 1 == 0)'.format(test, expression)
+            tests.append(test)
+
+    test = tests[0] if len(tests) == 1 else '(' + ' or '.join(tests) + ')'
+    return test if equals else 'not ' + test
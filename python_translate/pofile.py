@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import re
+import codecs
+
+ESCAPE_REGEX = re.compile(r'\\(\\|n|t|r|v|b|f|")')
+PLURAL_KEYWORD_REGEX = re.compile(r'^msgstr\[(\d+)\]$')
+CHARSET_REGEX = re.compile(r'charset=([^\s;]+)', re.I)
+
+ESCAPES = {
+    'n': '\n',
+    't': '\t',
+    'r': '\r',
+    'v': '\v',
+    'b': '\b',
+    'f': '\f',
+    '\\': '\\',
+    '"': '"',
+}
+
+MSGCTXT = 0
+MSGID = 1
+MSGID_PLURAL = 2
+MSGSTR = 3
+
+
+def _unescape_match(match):
+    return ESCAPES[match.group(1)]
+
+
+def unescape(string):
+    """
+    Unescapes a PO string the same way polib does.
+
+    @type string: str
+    @rtype: str
+    """
+    if '\\' not in string:
+        return string
+    return ESCAPE_REGEX.sub(_unescape_match, string)
+
+
+class PoSyntaxError(ValueError):
+    pass
+
+
+def _known_encoding(charset):
+    # template headers declare ``charset=CHARSET``; like polib, fall back
+    # to UTF-8 for anything codecs doesn't know
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return 'UTF-8'
+    return charset
+
+
+def iter_entries(lines):
+    """
+    Parses portable object (PO) lines, yielding entries one at a time.
+
+    Comments, flags and references are skipped; obsolete (#~) entries are
+    kept, like polib does. Lines are expected as bytes, decoded as UTF-8
+    unless the header entry declares another charset.
+
+    @type lines: iterable[bytes]
+    @param lines: Lines of a PO file, e.g. a file opened in binary mode
+
+    @rtype: iterable[(str|None, str, str|None, list[str])]
+    @return: (msgctxt, msgid, msgid_plural, msgstr forms) tuples
+
+    @raises: PoSyntaxError
+    """
+    encoding = 'utf-8'
+    entry = None
+    field = None
+    forms = None
+    lineno = 0
+    sub = ESCAPE_REGEX.sub
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.decode(encoding).strip()
+        if not line:
+            continue
+        if lineno == 1:
+            line = line.lstrip(u'\ufeff')
+        first = line[0]
+        if first == '#':
+            if not line.startswith('#~'):
+                continue
+            line = line[2:].lstrip()
+            if not line or line[0] != 'm' and line[0] != '"':
+                continue
+            first = line[0]
+
+        if first == '"':
+            keyword = None
+            value = line
+        else:
+            keyword, _, value = line.partition(' ')
+            value = value.lstrip()
+
+        if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+            raise PoSyntaxError('Syntax error on line {0}'.format(lineno))
+        value = value[1:-1]
+        if '\\' in value:
+            value = sub(_unescape_match, value)
+
+        if keyword is None:
+            if field is None:
+                raise PoSyntaxError('Syntax error on line {0}'.format(lineno))
+            if field.__class__ is int:
+                entry[field] += value
+            else:
+                forms[field[1]] += value
+        elif keyword == 'msgid' or keyword == 'msgctxt':
+            if entry is not None and (entry[MSGSTR] is not None or forms):
+                yield _finish(entry, forms)
+                if not entry[MSGID] and entry[MSGSTR]:
+                    charset = CHARSET_REGEX.search(entry[MSGSTR])
+                    if charset:
+                        encoding = _known_encoding(charset.group(1))
+                entry = None
+            if entry is None:
+                entry = [None, None, None, None]
+                forms = {}
+            field = MSGID if keyword == 'msgid' else MSGCTXT
+            entry[field] = value
+        elif entry is None or entry[MSGID] is None:
+            raise PoSyntaxError('Syntax error on line {0}'.format(lineno))
+        elif keyword == 'msgstr':
+            field = MSGSTR
+            entry[field] = value
+        elif keyword == 'msgid_plural':
+            field = MSGID_PLURAL
+            entry[field] = value
+        else:
+            match = PLURAL_KEYWORD_REGEX.match(keyword)
+            if not match:
+                raise PoSyntaxError('Syntax error on line {0}'.format(lineno))
+            field = ('msgstr', int(match.group(1)))
+            forms[field[1]] = value
+
+    if entry is not None:
+        if entry[MSGID] is None:
+            raise PoSyntaxError('Unexpected end of file')
+        yield _finish(entry, forms)
+
+
+def _finish(entry, forms):
+    context, msgid, plural, msgstr = entry
+    if plural is not None:
+        msgstr = [forms[n] for n in sorted(forms)]
+    elif msgstr is None:
+        msgstr = []
+    else:
+        msgstr = [msgstr]
+    return context, msgid, plural, msgstr
+
+
+def iter_messages(lines):
+    """
+    Parses PO lines into catalogue messages: msgstr for singular entries
+    and, for plural entries, the first form under msgid and all forms
+    joined with a pipe under msgid_plural.
+
+    @type lines: iterable[bytes]
+    @rtype: iterable[(str, str)]
+    @return: (id, message) tuples
+    """
+    for context, msgid, plural, msgstr in iter_entries(lines):
+        if plural is not None:
+            if msgid and len(msgstr) > 1:
+                yield msgid, msgstr[0]
+            yield plural, '|'.join(msgstr)
+        elif msgid:
+            yield msgid, msgstr[0] if msgstr else ''
@@ -13,6 +13,15 @@ files that were distributed with this source code.
 import re
 from decimal import Decimal
 from collections import OrderedDict
+from python_translate.utils import LRUCache
+from python_translate.plurals import compile_rule
+import python_translate.localeinfo as localeinfo
+
+# For python 2 compatibility
+try:
+    unicode
+except NameError:
+    unicode = str
 
 INTERVAL_REGEX = re.compile("""
     ({\s*
@@ -31,6 +40,68 @@ INTERVAL_REGEX = re.compile("""
 INTERVAL_MESSAGE_REGEX = re.compile("(?P<interval>{0})\s*(?P<message>.*?)$".format(INTERVAL_REGEX.pattern), re.X)
 STANDARD_RULES_REGEX = re.compile("^\w+:\s*(.*?)$", re.X)
 
+class Interval(object):
+
+    """
+    A math interval parsed from its string representation, e.g. {1,2,3},
+    [1,Inf[ or ]-Inf,0].
+
+    Attributes:
+        members          frozenset|None  Numbers of a {a,b,c} interval
+        left             float
+        right            float
+        left_inclusive   bool
+        right_inclusive  bool
+    """
+
+    __slots__ = (
+        'members',
+        'left',
+        'right',
+        'left_inclusive',
+        'right_inclusive')
+
+    def __init__(self, interval):
+        """
+        @type interval: str
+        @param interval: An interval
+
+        @raises: ValueError
+        """
+        interval = interval.strip()
+        match = INTERVAL_REGEX.match(interval)
+        if not match:
+            raise ValueError('%s is not a valid interval', interval)
+        if match.groups()[0]:
+            # Decimal hashes and compares equal to ints and floats of the
+            # same value, so members can be looked up with a plain number
+            self.members = frozenset(
+                Decimal(nb.strip()) for nb in match.groups()[1].split(","))
+        else:
+            self.members = None
+            self.left = float(match.group('left'))
+            self.right = float(match.group('right'))
+            self.left_inclusive = '[' == match.group('left_delimiter')
+            self.right_inclusive = ']' == match.group('right_delimiter')
+
+    def contains(self, number):
+        """
+        Tests if the given number is in the interval.
+
+        @type number: int
+        @param number: A number
+
+        @rtype: bool
+        """
+        if self.members is not None:
+            if isinstance(number, (str, unicode)):
+                number = Decimal(number)
+            return number in self.members
+
+        return (number >= self.left if self.left_inclusive else number > self.left) \
+           and (number <= self.right if self.right_inclusive else number < self.right)
+
+
 def test_interval(number, interval):
     """
      Tests if the given number is in the math interval.
@@ -47,21 +118,139 @@ def test_interval(number, interval):
      @rtype: bool
      @raises: ValueError
     """
-    interval = interval.strip()
-    match = INTERVAL_REGEX.match(interval)
-    if not match:
-        raise ValueError('%s is not a valid interval', interval)
-    if match.groups()[0]:
-        for nb in match.groups()[1].split(","):
-            if Decimal(nb.strip()) == Decimal(number):
-                return True
-    else:
-        left_number = float(match.group('left'))
-        right_number = float(match.group('right'))
-        return (number >= left_number if '[' == match.group('left_delimiter') else number > left_number) \
-           and (number <= right_number if ']' == match.group('right_delimiter') else number < right_number)
-
-    return False
+    return Interval(interval).contains(number)
+
+
+class ChoiceMessage(object):
+
+    """
+    A choice message split into its explicit interval rules and standard
+    (indexed) rules. Built once per message string, see compile_choice().
+
+    Attributes:
+        message         str
+        explicit_rules  list[(Interval, str)]
+        standard_rules  list[str]
+        single_part     bool  True if the message has no pipe separator
+    """
+
+    __slots__ = ('message', 'explicit_rules', 'standard_rules', 'single_part')
+
+    def __init__(self, message):
+        parts = message.split("|")
+        explicit_rules = OrderedDict()
+        standard_rules = []
+        for part in parts:
+            part = part.strip()
+
+            match_interval = INTERVAL_MESSAGE_REGEX.match(part)
+            match_standard = STANDARD_RULES_REGEX.match(part)
+            if match_interval:
+                explicit_rules[match_interval.group('interval')] = match_interval.group('message')
+            elif match_standard:
+                standard_rules.append(match_standard.groups()[0])
+            else:
+                standard_rules.append(part)
+
+        self.message = message
+        self.explicit_rules = [
+            (Interval(interval), m) for interval, m in explicit_rules.items()]
+        self.standard_rules = standard_rules
+        self.single_part = len(parts) == 1
+
+    def select(self, number, locale, position=None):
+        """
+        Returns the portion of the message matching the given number.
+
+        @type number: int
+        @param number: The number of items represented for the message
+
+        @type locale: str
+        @param locale: The locale to use for choosing
+
+        @type position: int|None
+        @param position: The plural position of the number in the locale,
+                         if already known (see PluralizationRules.get_many)
+
+        @rtype: str
+        @raises: ValueError
+        """
+        # try to match an explicit rule, then to the standard ones
+        for interval, m in self.explicit_rules:
+            if interval.contains(number):
+                return m
+
+        return self.select_standard(number, locale, position)
+
+    def select_explicit(self, number):
+        """
+        Returns the portion of the first explicit rule matching the number.
+
+        @type number: int
+
+        @rtype: str|None
+        @return: None if no explicit rule matches
+        """
+        for interval, m in self.explicit_rules:
+            if interval.contains(number):
+                return m
+        return None
+
+    def select_standard(self, number, locale, position=None):
+        """
+        Returns the standard rule of the plural position of the number,
+        ignoring explicit rules.
+
+        @type position: int|None
+        @param position: The plural position of the number in the locale,
+                         if already known
+
+        @rtype: str
+        @raises: ValueError
+        """
+        if position is None:
+            position = PluralizationRules.get(number, locale)
+        if len(self.standard_rules) <= position:
+            # when there's exactly one rule given, and that rule is a standard
+            # rule, use this rule
+            if self.single_part and len(self.standard_rules) > 0:
+                return self.standard_rules[0]
+            raise ValueError('Unable to choose a translation for "%s" with locale "%s" for value "%s". '
+                             'Double check that this translation has the correct plural options (e.g. '
+                             '"There is one apple|There are {{count}} apples").' % (self.message, locale, number))
+
+        return self.standard_rules[position]
+
+
+_choice_messages = LRUCache(4096)
+
+
+def _no_plural(number):
+    return 0
+
+
+# types of numbers whose plural position only depends on their value;
+# Decimals and strings with trailing zeros may not share the position of
+# an equal integer
+_CACHEABLE_TYPES = (int, float)
+
+def compile_choice(message):
+    """
+    Returns the ChoiceMessage for a message, reusing the one compiled
+    earlier for the same message string.
+
+    @type message: str
+    @param message: The message being translated
+
+    @rtype: ChoiceMessage
+    @raises: ValueError If an interval of the message is not valid
+    """
+    choice = _choice_messages.get(message)
+    if choice is None:
+        choice = ChoiceMessage(message)
+        _choice_messages.set(message, choice)
+
+    return choice
 
 
 def select_message(message, number, locale):
@@ -95,37 +284,43 @@ def select_message(message, number, locale):
     @rtype: str
     @raises: ValueError
     """
-    parts = message.split("|")
-    explicit_rules = OrderedDict()
-    standard_rules = []
-    for part in parts:
-        part = part.strip()
-
-        match_interval = INTERVAL_MESSAGE_REGEX.match(part)
-        match_standard = STANDARD_RULES_REGEX.match(part)
-        if match_interval:
-            explicit_rules[match_interval.group('interval')] = match_interval.group('message')
-        elif match_standard:
-            standard_rules.append(match_standard.groups()[0])
-        else:
-            standard_rules.append(part)
+    return compile_choice(message).select(number, locale)
 
-    # try to match an explicit rule, then to the standard ones
-    for interval, m in list(explicit_rules.items()):
-        if test_interval(number, interval):
-            return m
 
-    position = PluralizationRules.get(number, locale)
-    if len(standard_rules) <= position:
-        # when there's exactly one rule given, and that rule is a standard
-        # rule, use this rule
-        if len(parts) == 1 and len(standard_rules) > 0:
-            return standard_rules[0]
-        raise ValueError('Unable to choose a translation for "%s" with locale "%s" for value "%s". '
-                         'Double check that this translation has the correct plural options (e.g. '
-                         '"There is one apple|There are {{count}} apples").' % (message, locale, number))
+def select_messages(message, numbers, locale):
+    """
+    Returns what select_message() would return for each of the numbers,
+    computing their plural positions in bulk.
+
+    @type message: str
+
+    @type numbers: iterable
+    @param numbers: A sequence or array.array of numbers
 
-    return standard_rules[position]
+    @type locale: str
+
+    @rtype: list[str]
+    @raises: ValueError
+    """
+    choice = compile_choice(message)
+    if not hasattr(numbers, '__len__'):
+        numbers = list(numbers)
+    selected = []
+    # plural positions are only computed for the numbers no explicit rule
+    # matches
+    remaining = []
+    for number in numbers:
+        m = choice.select_explicit(number)
+        if m is None:
+            remaining.append(len(selected))
+        selected.append(m if m is not None else number)
+    if remaining:
+        if len(remaining) < len(selected):
+            numbers = [selected[i] for i in remaining]
+        positions = PluralizationRules.get_many(numbers, locale)
+        for i, number, position in zip(remaining, numbers, positions):
+            selected[i] = choice.select_standard(number, locale, position)
+    return selected
 
 
 
@@ -133,6 +328,12 @@ class PluralizationRules(object):
     """
     Returns the plural rules for a given locale.
 
+    Rules are resolved once per locale string, later calls only look the
+    locale up in a dict. The rules of the Unicode CLDR can be used instead
+    of the default ones with load_cldr(); with them, the position of a
+    number is the index of its plural category among the categories of the
+    locale, in the order zero, one, two, few, many, other.
+
     Attributes:
         rules  list
     """
@@ -252,33 +453,47 @@ class PluralizationRules(object):
         @rtype: int
         @return: The plural position
         """
-        if locale == 'pt_BR':
-            # temporary set a locale for brazilian
-            locale = 'xbr'
-
-        if len(locale) > 3:
-            locale = locale.split("_")[0]
+        rule = localeinfo.get_locale_info(locale).plural
 
-        rule = PluralizationRules._rules.get(locale, lambda _: 0)
         _return = rule(number)
         if not isinstance(_return, int) or _return < 0:
             return 0
         return _return
 
     @staticmethod
-    def set(rule, locale):
+    def get_many(numbers, locale):
         """
-        Overrides the default plural rule for a given locale.
+        Returns the plural positions of many numbers of the same locale. The
+        locale is resolved once and the rule is only called once for each
+        distinct integer or float.
 
-        @type rule: str
-        @param rule: Callable
+        @type numbers: iterable
+        @param numbers: A sequence or array.array of numbers
 
         @type locale: str
         @param locale: The locale
 
-        @raises: ValueError
+        @rtype: list[int]
         """
+        rule = localeinfo.get_locale_info(locale).plural
+
+        known = {}
+        positions = []
+        append = positions.append
+        for number in numbers:
+            cacheable = type(number) in _CACHEABLE_TYPES
+            position = known.get(number) if cacheable else None
+            if position is None:
+                position = rule(number)
+                if not isinstance(position, int) or position < 0:
+                    position = 0
+                if cacheable:
+                    known[number] = position
+            append(position)
+        return positions
 
+    @staticmethod
+    def _normalize(locale):
         if locale == 'pt_BR':
             # temporary set a locale for brazilian
             locale = 'xbr'
@@ -286,7 +501,58 @@ class PluralizationRules(object):
         if len(locale) > 3:
             locale = locale.split("_")[0]
 
+        return locale
+
+    @staticmethod
+    def set(rule, locale):
+        """
+        Overrides the default plural rule for a given locale.
+
+        @type rule: callable|str|dict
+        @param rule: Callable returning the plural position of a number, or
+                     rules in the CLDR syntax, e.g.
+                     "one: i = 1 and v = 0; few: i = 2..4 and v = 0"
+                     (see python_translate.plurals.compile_rule)
+
+        @type locale: str
+        @param locale: The locale
+
+        @raises: ValueError
+        """
+        locale = PluralizationRules._normalize(locale)
+
+        if isinstance(rule, (str, unicode, dict)):
+            rule = compile_rule(rule)
+
         if not hasattr(rule, '__call__'):
             raise ValueError('The given rule can not be called')
 
         PluralizationRules._rules[locale] = rule
+        localeinfo.clear_locale_infos()
+
+    @staticmethod
+    def load_cldr(locales=None):
+        """
+        Replaces the rules of the given locales, or of every locale the CLDR
+        defines rules for, by the CLDR rules bundled in python_translate.cldr.
+        Unlike the default rules, CLDR rules also handle decimal numbers
+        (floats, Decimals or numeric strings).
+
+        Messages need one form per plural category of the locale, e.g.
+        "one|few|many|other" in Russian or Polish.
+
+        @type locales: list[str]|None
+
+        @raises: KeyError If the CLDR has no rules for a locale
+        """
+        from python_translate.cldr import CARDINAL_RULES
+
+        if locales is None:
+            locales = list(CARDINAL_RULES)
+            # pt_BR is registered as xbr
+            locales.append('pt_BR')
+
+        for locale in locales:
+            rules = CARDINAL_RULES[
+                'pt' if locale == 'pt_BR' else PluralizationRules._normalize(locale)]
+            PluralizationRules.set(rules, locale)
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import json
+import mmap
+import zlib
+import struct
+import tempfile
+
+# For python 2 compatibility
+try:
+    unicode
+except NameError:
+    unicode = str
+
+MAGIC = b'PTSC'
+VERSION = 1
+HEADER = struct.Struct('<4s4I')
+BUCKET = struct.Struct('<2I')
+ENTRY = struct.Struct('<6I')
+SEPARATOR = b'\x04'
+
+
+def _hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+
+def _encode_key(locale, domain, id):
+    return SEPARATOR.join(
+        (locale.encode('utf-8'), domain.encode('utf-8'), id.encode('utf-8')))
+
+
+def write_shared_catalogues(path, catalogues):
+    """
+    Compiles catalogues, with their fallback catalogues, into a single
+    read-only file to be opened with SharedCatalogues.
+
+    Messages of every locale and domain share one hash table keyed by
+    locale, domain and message id. Ids are lowercased unless all the
+    catalogues are case-sensitive.
+
+    @type path: str
+    @param path: Path of the file to write, replaced atomically
+
+    @type catalogues: iterable[MessageCatalogue]
+
+    @raises: ValueError If a message is not a string, or if a locale, domain
+             or id contains a \\x04 character
+    """
+    chain = []
+    seen = set()
+    for catalogue in catalogues:
+        while catalogue is not None and catalogue.locale not in seen:
+            seen.add(catalogue.locale)
+            chain.append(catalogue)
+            catalogue = catalogue.fallback_catalogue
+
+    case_sensitive = all(c.case_sensitive for c in chain)
+    locales = {}
+    entries = {}
+    for catalogue in chain:
+        locale = catalogue.locale
+        fallback = catalogue.fallback_catalogue
+        locales[locale] = {
+            'fallback': None if fallback is None else fallback.locale,
+            'domains': catalogue.get_domains(),
+            'resources': [unicode(r) for r in catalogue.get_resources()],
+        }
+        for domain, messages in catalogue.all().items():
+            if u'\x04' in locale or u'\x04' in domain:
+                raise ValueError(
+                    'Cannot share domain "{0}" of locale "{1}"'.format(domain, locale))
+            for id, message in messages.items():
+                if not isinstance(id, (str, unicode)) \
+                        or not isinstance(message, (str, unicode)) \
+                        or u'\x04' in id:
+                    raise ValueError(
+                        'Cannot share message "{0}" of domain "{1}"'.format(id, domain))
+                key = id if case_sensitive else id.lower()
+                entries[_encode_key(locale, domain, key)] = (
+                    id.encode('utf-8'), message.encode('utf-8'))
+
+    metadata = json.dumps(
+        {'case_sensitive': case_sensitive, 'locales': locales}).encode('utf-8')
+
+    count = len(entries)
+    bucket_count = 8
+    while bucket_count < 2 * count:
+        bucket_count *= 2
+    mask = bucket_count - 1
+
+    buckets = [(0, 0)] * bucket_count
+    entry_table = []
+    strings = []
+    offset = HEADER.size + len(metadata) + BUCKET.size * bucket_count \
+        + ENTRY.size * count
+    for index, (key, (id, message)) in enumerate(sorted(entries.items())):
+        hval = _hash(key)
+        slot = hval & mask
+        while buckets[slot][1]:
+            slot = (slot + 1) & mask
+        buckets[slot] = (hval, index + 1)
+
+        entry_table.append((offset, len(key), offset + len(key), len(id),
+                            offset + len(key) + len(id), len(message)))
+        strings.extend((key, id, message))
+        offset += len(key) + len(id) + len(message)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(metadata), count, bucket_count))
+            f.write(metadata)
+            f.write(b''.join(BUCKET.pack(*bucket) for bucket in buckets))
+            f.write(b''.join(ENTRY.pack(*entry) for entry in entry_table))
+            f.write(b''.join(strings))
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class SharedCatalogues(object):
+
+    """
+    Catalogues compiled by write_shared_catalogues, memory-mapped read-only
+    so that every process opening the file shares the same pages. Nothing
+    is indexed or decoded when the file is opened: lookups probe the hash
+    table of the file and messages are decoded on each access.
+
+    Attributes:
+        path            str
+        case_sensitive  bool
+        locales         dict[str, dict]  Fallback locale, domains and
+                                         resources of each locale
+    """
+
+    def __init__(self, path):
+        """
+        @type path: str
+
+        @raises: ValueError If the file is not a valid shared catalogues file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            if f.tell() < HEADER.size:
+                raise ValueError('"{0}" is not a shared catalogues file'.format(path))
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, metadata_size, self._count, bucket_count = \
+            HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('"{0}" is not a shared catalogues file'.format(path))
+
+        metadata = json.loads(
+            self._buffer[HEADER.size:HEADER.size + metadata_size].decode('utf-8'))
+        self.case_sensitive = metadata['case_sensitive']
+        self.locales = metadata['locales']
+        self._buckets = HEADER.size + metadata_size
+        self._mask = bucket_count - 1
+        self._entries = self._buckets + BUCKET.size * bucket_count
+        self._catalogues = {}
+
+    def _find(self, key):
+        buffer = self._buffer
+        hval = _hash(key)
+        slot = hval & self._mask
+        while True:
+            bucket_hash, index = BUCKET.unpack_from(
+                buffer, self._buckets + BUCKET.size * slot)
+            if not index:
+                return None
+            if bucket_hash == hval:
+                entry = ENTRY.unpack_from(
+                    buffer, self._entries + ENTRY.size * (index - 1))
+                if buffer[entry[0]:entry[0] + entry[1]] == key:
+                    return entry
+            slot = (slot + 1) & self._mask
+
+    def fold(self, id):
+        """
+        Returns the key messages are indexed with.
+        """
+        return id if self.case_sensitive else id.lower()
+
+    def lookup(self, locale, domain, key):
+        """
+        Returns the message defined for a folded id by one catalogue,
+        without falling back.
+
+        @rtype: str|None
+        """
+        entry = self._find(_encode_key(locale, domain, key))
+        if entry is None:
+            return None
+        return self._buffer[entry[4]:entry[4] + entry[5]].decode('utf-8')
+
+    def messages(self, locale, domain):
+        """
+        Decodes all messages of a catalogue domain.
+
+        @rtype: dict
+        """
+        prefix = _encode_key(locale, domain, u'')
+        buffer = self._buffer
+        messages = {}
+        for index in range(self._count):
+            entry = ENTRY.unpack_from(buffer, self._entries + ENTRY.size * index)
+            if buffer[entry[0]:entry[0] + len(prefix)] == prefix:
+                messages[buffer[entry[2]:entry[2] + entry[3]].decode('utf-8')] = \
+                    buffer[entry[4]:entry[4] + entry[5]].decode('utf-8')
+        return messages
+
+    def get_catalogue(self, locale):
+        """
+        @rtype: SharedCatalogue
+        @raises: KeyError If the locale was not compiled in the file
+        """
+        catalogue = self._catalogues.get(locale)
+        if catalogue is None:
+            if locale not in self.locales:
+                raise KeyError(locale)
+            catalogue = self._catalogues[locale] = SharedCatalogue(self, locale)
+        return catalogue
+
+    def close(self):
+        self._buffer.close()
+
+
+class SharedCatalogue(object):
+
+    """
+    Read-only catalogue of one locale of SharedCatalogues, with the
+    read methods of MessageCatalogue.
+
+    Attributes:
+        locale  str
+    """
+
+    def __init__(self, catalogues, locale):
+        self.locale = locale
+        self._catalogues = catalogues
+        self._info = catalogues.locales[locale]
+
+    @property
+    def case_sensitive(self):
+        return self._catalogues.case_sensitive
+
+    @property
+    def fallback_catalogue(self):
+        fallback = self._info['fallback']
+        if fallback is None:
+            return None
+        return self._catalogues.get_catalogue(fallback)
+
+    def get_domains(self):
+        return list(self._info['domains'])
+
+    def get_resources(self):
+        return list(self._info['resources'])
+
+    def all(self, domain=None):
+        if domain is None:
+            return {d: self._catalogues.messages(self.locale, d)
+                    for d in self._info['domains']}
+        return self._catalogues.messages(self.locale, domain)
+
+    def defines(self, id, domain='messages'):
+        return self._catalogues.lookup(
+            self.locale, domain, self._catalogues.fold(id)) is not None
+
+    def has(self, id, domain):
+        catalogue = self
+        while catalogue is not None:
+            if catalogue.defines(id, domain):
+                return True
+            catalogue = catalogue.fallback_catalogue
+        return False
+
+    def get(self, id, domain='messages'):
+        key = self._catalogues.fold(id)
+        catalogue = self
+        while catalogue is not None:
+            message = self._catalogues.lookup(catalogue.locale, domain, key)
+            if message is not None:
+                return message
+            catalogue = catalogue.fallback_catalogue
+        return id
+
+
+class SharedLookupTable(object):
+
+    """
+    The LookupTable of a domain of SharedCatalogues: looks messages up in
+    the catalogue and its fallback catalogues, decoding them on access.
+    Like with LookupTable, table[key] returns None for missing ids.
+
+    Attributes:
+        locales         list[str]  Locales of the fallback chain
+        last_locale     str
+        case_sensitive  bool
+        stale           bool  Always False, shared catalogues do not change
+    """
+
+    stale = False
+
+    def __init__(self, catalogues, locale, domain):
+        self.case_sensitive = catalogues.case_sensitive
+        self._catalogues = catalogues
+        self._domain = domain
+        self.locales = []
+        while locale is not None:
+            self.locales.append(locale)
+            locale = catalogues.locales[locale]['fallback']
+        self.last_locale = self.locales[-1]
+
+    def get(self, key, default=None):
+        """
+        @type key: str
+        @param key: Folded message id
+
+        @rtype: (str, str)|None
+        @return: The message and the locale of the catalogue defining it
+        """
+        lookup = self._catalogues.lookup
+        for locale in self.locales:
+            message = lookup(locale, self._domain, key)
+            if message is not None:
+                return message, locale
+        return default
+
+    def __getitem__(self, key):
+        return self.get(key)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import unittest
+
+from python_translate.utils import CaseInsensitiveIndex
+
+
+class CaseInsensitiveIndexTest(unittest.TestCase):
+
+    def testGetSet(self):
+        index = CaseInsensitiveIndex({'Foo': 'foo'})
+        index['BAR'] = 'bar'
+
+        self.assertEquals('foo', index['foo'])
+        self.assertEquals('bar', index['Bar'])
+        self.assertEquals('bar', index.get('bar'))
+        self.assertIsNone(index.get('baz'))
+        self.assertIn('FOO', index)
+        self.assertNotIn('baz', index)
+        self.assertRaises(KeyError, lambda: index['baz'])
+
+    def testRemembersCaseOfLastKeySet(self):
+        index = CaseInsensitiveIndex({'Foo': 'foo'})
+        index['FOO'] = 'bar'
+
+        self.assertEquals(['FOO'], list(index))
+        self.assertEquals({'FOO': 'bar'}, dict(index.items()))
+        self.assertEquals([('foo', 'bar')], list(index.lower_items()))
+        self.assertEquals(1, len(index))
+
+    def testDelete(self):
+        index = CaseInsensitiveIndex({'Foo': 'foo', 'bar': 'bar'})
+        del index['FOO']
+
+        self.assertEquals(['bar'], list(index))
+
+    def testUpdateAndCopy(self):
+        index = CaseInsensitiveIndex({'Foo': 'foo'})
+        other = CaseInsensitiveIndex({'foo': 'bar', 'Baz': 'baz'})
+        index.update(other)
+        copy = index.copy()
+        copy['new'] = 'new'
+
+        self.assertEquals({'foo': 'bar', 'Baz': 'baz'}, dict(index.items()))
+        self.assertNotIn('new', index)
+        self.assertEquals(index, {'FOO': 'bar', 'baz': 'baz'})
+
+    def testCaseSensitive(self):
+        index = CaseInsensitiveIndex({'Foo': 'foo'}, case_sensitive=True)
+        index['foo'] = 'bar'
+
+        self.assertEquals('foo', index['Foo'])
+        self.assertEquals('bar', index['foo'])
+        self.assertNotIn('FOO', index)
+        self.assertEquals(sorted(['Foo', 'foo']), sorted(index))
+
+if __name__ == '__main__':
+    unittest.main()
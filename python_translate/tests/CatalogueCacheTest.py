@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from python_translate import loaders
+from python_translate.cache import CatalogueCache
+from python_translate.mofile import MoMessages
+from python_translate.translations import Translator, MessageCatalogue
+
+
+class CatalogueCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.resource = os.path.join(self.directory, 'messages.json')
+        with open(self.resource, 'w') as f:
+            f.write('{"foo": "bar", "Baz": "z\\u00f3\\u0142w", "nested": {"a": "b"}}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testDumpAndLoad(self):
+        catalogue = MessageCatalogue('en')
+        catalogue.add({'foo': 'bar', 'Baz': u'zółw'})
+        catalogue.add({'foo': 'admin bar'}, 'admin')
+        catalogue.add_resource('resource.json')
+        cache = CatalogueCache(os.path.join(self.directory, 'cache'))
+
+        self.assertTrue(cache.dump(catalogue, 'key'))
+
+        loaded = MessageCatalogue('en')
+        self.assertFalse(cache.load('en', 'other', loaded))
+        self.assertTrue(cache.load('en', 'key', loaded))
+        self.assertIsInstance(loaded.messages['messages'], MoMessages)
+        self.assertEquals(catalogue.all(), loaded.all())
+        self.assertEquals(u'zółw', loaded.get('baz'))
+        self.assertEquals(['resource.json'], loaded.get_resources())
+
+    def testDumpAndLoadNonStringMessages(self):
+        resource = os.path.join(self.directory, 'messages.yml')
+        with open(resource, 'w') as f:
+            f.write('foo: 1\nbar: ~\nbaz: 1.5\nqux: "qux"\n')
+        catalogue = loaders.YamlFileLoader().load(resource, 'en')
+        cache = CatalogueCache(self.directory)
+
+        self.assertTrue(cache.dump(catalogue, 'key'))
+
+        loaded = MessageCatalogue('en')
+        self.assertTrue(cache.load('en', 'key', loaded))
+        self.assertEquals(1, loaded.get('foo'))
+        self.assertIsNone(loaded.get('bar'))
+        self.assertEquals(
+            dict(foo=1, bar=None, baz=1.5, qux='qux'), loaded.all('messages'))
+
+    def testDumpSkipsUnencodableMessages(self):
+        catalogue = MessageCatalogue('en')
+        catalogue.add({'foo': object()})
+        cache = CatalogueCache(self.directory)
+
+        with self.assertLogs('python_translate.cache', 'WARNING'):
+            self.assertFalse(cache.dump(catalogue, 'key'))
+        self.assertFalse(cache.load('en', 'key', MessageCatalogue('en')))
+
+    def testTranslatorUsesCache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+
+        translator = self.createTranslator(cache_dir)
+        self.assertEquals('bar', translator.trans('foo'))
+        self.assertEquals(1, len(os.listdir(cache_dir)))
+
+        translator = self.createTranslator(cache_dir)
+        self.assertEquals(u'zółw', translator.trans('baz'))
+        self.assertEquals('b', translator.trans('nested.a'))
+        self.assertIsInstance(
+            translator.get_catalogue('en').messages['messages'], MoMessages)
+
+    def testTranslatorRebuildsStaleCache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+
+        translator = self.createTranslator(cache_dir)
+        self.assertEquals('bar', translator.trans('foo'))
+        stale = os.listdir(cache_dir)
+
+        with open(self.resource, 'w') as f:
+            f.write('{"foo": "changed bar"}')
+        stat = os.stat(self.resource)
+        os.utime(self.resource, (stat.st_atime, stat.st_mtime + 10))
+
+        translator = self.createTranslator(cache_dir)
+        self.assertEquals('changed bar', translator.trans('foo'))
+        self.assertEquals(1, len(os.listdir(cache_dir)))
+        self.assertNotEquals(stale, os.listdir(cache_dir))
+
+    def createTranslator(self, cache_dir):
+        translator = Translator('en', cache_dir=cache_dir)
+        translator.add_loader('json', loaders.JSONFileLoader())
+        translator.add_resource('json', self.resource, 'en')
+        return translator
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+
+from python_translate import loaders
+from python_translate.mofile import write_mo_file
+from python_translate.translations import DebugTranslator
+
+
+class DebugTranslatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.loader = CountingJSONFileLoader()
+        self.translator = DebugTranslator('fr')
+        self.translator.set_fallback_locales(['en'])
+        self.translator.add_loader('json', self.loader)
+        self.translator.add_resource('json', self.write('fr.json', '{"foo": "foo (fr)"}'), 'fr')
+        self.translator.add_resource('json', self.write('admin.fr.json', '{"foo": "admin (fr)"}'), 'fr', 'admin')
+        self.translator.add_resource('json', self.write('en.json', '{"bar": "bar (en)"}'), 'en')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testTrans(self):
+        self.assertEquals('foo (fr)', self.translator.trans('foo'))
+        self.assertEquals('bar (en)', self.translator.trans('bar'))
+        self.assertRaises(RuntimeError, lambda: self.translator.trans('missing'))
+
+    def testUnchangedResourcesAreNotReloaded(self):
+        catalogue = self.translator.get_catalogue('fr')
+        self.expireReloadInterval()
+
+        self.assertIs(catalogue, self.translator.get_catalogue('fr'))
+        self.assertEquals(3, len(self.loader.resources))
+
+    def testChangedResourcesAreReloaded(self):
+        self.assertEquals('foo (fr)', self.translator.trans('foo'))
+
+        self.write('fr.json', '{"foo": "changed foo (fr)"}')
+        self.assertEquals('foo (fr)', self.translator.trans('foo'))
+
+        self.expireReloadInterval()
+        self.assertEquals('changed foo (fr)', self.translator.trans('foo'))
+        self.assertEquals('admin (fr)', self.translator.trans('foo', domain='admin'))
+        self.assertEquals(
+            ['fr.json', 'admin.fr.json', 'en.json', 'fr.json'],
+            [os.path.basename(r) for r in self.loader.resources])
+
+    def testChangedFallbackResourcesAreReloaded(self):
+        self.assertEquals('bar (en)', self.translator.trans('bar'))
+
+        self.write('en.json', '{"bar": "changed bar (en)"}')
+        self.expireReloadInterval()
+
+        self.assertEquals('changed bar (en)', self.translator.trans('bar'))
+        self.assertEquals('changed bar (en)', self.translator.trans('bar', locale='en'))
+        self.assertEquals(4, len(self.loader.resources))
+
+    def testReplacedMoFilesStayReadableByOtherCatalogues(self):
+        translator = DebugTranslator('fr')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('mo', loaders.MoFileLoader())
+        en = self.writeMo('en.mo', [(b'a', b'a (en)'), (b'b', b'b (en)')])
+        translator.add_resource('mo', en, 'en')
+        translator.add_resource('mo', self.writeMo('fr.mo', []), 'fr')
+        translator.add_resource('mo', self.writeMo('de.mo', []), 'de')
+        self.assertEquals('a (en)', translator.trans('a', locale='fr'))
+        self.assertEquals('a (en)', translator.trans('a', locale='de'))
+
+        self.writeMo('en.mo', [(b'a', b'changed a (en)'), (b'b', b'changed b (en)')])
+        translator.last_reload -= timedelta(seconds=2)
+
+        self.assertEquals('changed a (en)', translator.trans('a', locale='fr'))
+        self.assertEquals('b (en)', translator.trans('b', locale='de'))
+
+    def writeMo(self, filename, entries):
+        # replaced the way deployments do, by renaming a new file over it
+        path = os.path.join(self.directory, filename)
+        mtime = os.stat(path).st_mtime if os.path.exists(path) else None
+        write_mo_file(path + '.tmp', entries)
+        os.rename(path + '.tmp', path)
+        if mtime is not None:
+            os.utime(path, (mtime + 10, mtime + 10))
+        return path
+
+    def write(self, filename, contents):
+        path = os.path.join(self.directory, filename)
+        mtime = None
+        if os.path.exists(path):
+            mtime = os.stat(path).st_mtime
+        with open(path, 'w') as f:
+            f.write(contents)
+        if mtime is not None:
+            # make sure the change is visible even with a coarse mtime
+            os.utime(path, (mtime + 10, mtime + 10))
+        return path
+
+    def expireReloadInterval(self):
+        self.translator.last_reload -= timedelta(seconds=2)
+
+
+class CountingJSONFileLoader(loaders.JSONFileLoader):
+
+    def __init__(self):
+        self.resources = []
+
+    def load(self, resource, locale, domain='messages'):
+        self.resources.append(resource)
+        return super(CountingJSONFileLoader, self).load(resource, locale, domain)
+
+if __name__ == '__main__':
+    unittest.main()
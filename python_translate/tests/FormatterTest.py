@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import string
+import collections
+import unittest
+
+from python_translate.formatter import compile_message
+from python_translate.translations import Translator
+
+
+class FormatterTest(unittest.TestCase):
+
+    def testFormatMatchesStringFormatter(self):
+        for message, parameters in self.getFormatTests():
+            expected = string.Formatter().vformat(
+                message, (), collections.defaultdict(str, **parameters))
+            self.assertEquals(
+                expected, compile_message(message).format(parameters))
+
+    def testFormatMissingParameters(self):
+        template = compile_message('Hello {name}, you have {count} messages')
+
+        self.assertEquals(
+            'Hello , you have 3 messages', template.format({'count': 3}))
+        self.assertEquals('Hello , you have  messages', template.format({}))
+
+    def testFormatInvalidMessage(self):
+        self.assertRaises(ValueError, lambda: compile_message('Hello {name'))
+        self.assertRaises(IndexError, lambda: compile_message('{0}').format({}))
+
+    def testTranslatorCachesTemplates(self):
+        translator = Translator('en')
+        translator.templates.maxsize = 2
+
+        self.assertEquals('a 1', translator.format('a {x}', {'x': 1}))
+        self.assertEquals('b 2', translator.format('b {x}', {'x': 2}))
+        self.assertEquals('c 3', translator.format('c {x}', {'x': 3}))
+
+        self.assertEquals(2, len(translator.templates))
+        self.assertNotIn('a {x}', translator.templates)
+        self.assertIn('c {x}', translator.templates)
+
+    def getFormatTests(self):
+        return [
+            ['Symfony is great!', {}],
+            ['Symfony is {what}!', {'what': 'awesome'}],
+            ['Symfony is {what}!', {}],
+            ['{{escaped}} {what}', {'what': 'x'}],
+            ['{count} apples', {'count': 10}],
+            ['{price:.2f} EUR', {'price': 3.14159}],
+            ['{name!r} and {name:>6}', {'name': 'foo'}],
+            ['{user[name]}', {'user': {'name': 'bar'}}],
+            ['{value:{width}}', {'value': 'x', 'width': 4}],
+        ]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from python_translate import loaders
+from python_translate import dumpers
+from python_translate.instrumentation import Instrumentation, MetricsCollector, \
+    MissingTranslationCollector, CompositeInstrumentation
+from python_translate.translations import Translator, DebugTranslator
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def testLookups(self):
+        translator = self.createTranslator()
+        translator.instrumentation = metrics = MetricsCollector()
+
+        self.assertEquals('foo (fr_FR)', translator.trans('foo'))
+        self.assertEquals('bar (fr)', translator.trans('bar'))
+        self.assertEquals('baz (en)', translator.trans('baz'))
+        self.assertEquals('missing', translator.trans('missing'))
+        self.assertEquals('2 apples', translator.transchoice('apples', 2))
+        self.assertEquals('admin (en)', translator.trans('foo', domain='admin', locale='en'))
+
+        snapshot = metrics.snapshot()
+        self.assertEquals([
+            {'locale': 'en', 'domain': 'admin', 'hits': 1, 'fallbacks': 0, 'misses': 0},
+            {'locale': 'fr_FR', 'domain': 'messages', 'hits': 1, 'fallbacks': 3, 'misses': 1},
+        ], snapshot['lookups'])
+        self.assertEquals({1: 2, 2: 1}, snapshot['fallback_hops'])
+        self.assertEquals(6, snapshot['format']['count'])
+
+    def testManyLookups(self):
+        translator = self.createTranslator()
+        translator.instrumentation = metrics = MetricsCollector()
+
+        translator.trans_many([('foo', None), ('missing', None)])
+        translator.transchoice_many([('apples', 1, None)])
+
+        snapshot = metrics.snapshot()
+        self.assertEquals([
+            {'locale': 'fr_FR', 'domain': 'messages', 'hits': 1, 'fallbacks': 1, 'misses': 1},
+        ], snapshot['lookups'])
+        self.assertEquals(3, snapshot['format']['count'])
+
+    def testDebugTranslatorLookups(self):
+        translator = self.createTranslator(DebugTranslator)
+        translator.instrumentation = recorder = RecordingInstrumentation()
+
+        translator.trans('baz')
+        translator.transchoice('apples', 2)
+        translator.trans_many([('foo', None)])
+        self.assertRaises(RuntimeError, lambda: translator.trans('missing'))
+
+        self.assertEquals([
+            ('fr_FR', 'messages', 'baz', 'en', 2),
+            ('fr_FR', 'messages', 'apples', 'fr', 1),
+            ('fr_FR', 'messages', 'foo', 'fr_FR', 0),
+            ('fr_FR', 'messages', 'missing', None, 0),
+        ], recorder.lookups)
+        self.assertEquals(3, recorder.formats)
+
+    def testLoads(self):
+        translator = self.createTranslator()
+        translator.instrumentation = metrics = MetricsCollector()
+        translator.trans('foo')
+
+        snapshot = metrics.snapshot()
+        self.assertEquals(
+            ['en', 'fr', 'fr_FR'],
+            [timing['locale'] for timing in snapshot['catalogues']])
+        self.assertEquals(
+            [('en', 'admin'), ('en', 'messages'), ('fr', 'messages'), ('fr_FR', 'messages')],
+            [(timing['locale'], timing['domain']) for timing in snapshot['resources']])
+        self.assertEquals(
+            set(['<dict>']), set(timing['resource'] for timing in snapshot['resources']))
+        self.assertTrue(all(timing['count'] == 1 for timing in snapshot['resources']))
+
+        # snapshots can be scraped as JSON
+        json.dumps(snapshot)
+
+    def testSampling(self):
+        translator = self.createTranslator()
+        translator.instrumentation = metrics = MetricsCollector(0)
+        translator.trans('foo')
+
+        snapshot = metrics.snapshot()
+        self.assertEquals([], snapshot['lookups'])
+        self.assertEquals(0, snapshot['format']['count'])
+        self.assertEquals(3, len(snapshot['catalogues']))
+
+        self.assertRaises(ValueError, lambda: MetricsCollector(2))
+
+    def testSamplingExtrapolatesCounts(self):
+        metrics = MetricsCollector(0.5)
+        metrics.lookup('fr', 'messages', 'foo', 'fr', 0)
+        metrics.lookup('fr', 'messages', 'foo', 'en', 1)
+
+        snapshot = metrics.snapshot()
+        self.assertEquals(2, snapshot['lookups'][0]['hits'])
+        self.assertEquals(2, snapshot['lookups'][0]['fallbacks'])
+        self.assertEquals({1: 2}, snapshot['fallback_hops'])
+
+    def testSnapshotReset(self):
+        translator = self.createTranslator()
+        translator.instrumentation = metrics = MetricsCollector()
+        translator.trans('foo')
+
+        self.assertEquals(1, len(metrics.snapshot(reset=True)['lookups']))
+        self.assertEquals([], metrics.snapshot()['lookups'])
+        self.assertEquals([], metrics.snapshot()['catalogues'])
+
+    def testCustomInstrumentation(self):
+        translator = self.createTranslator()
+        translator.instrumentation = recorder = RecordingInstrumentation()
+
+        translator.trans('baz')
+        translator.trans('missing', locale='fr')
+
+        self.assertEquals([
+            ('fr_FR', 'messages', 'baz', 'en', 2),
+            ('fr', 'messages', 'missing', None, 0),
+        ], recorder.lookups)
+
+    def testMissingTranslations(self):
+        translator = self.createTranslator()
+        translator.instrumentation = missing = MissingTranslationCollector()
+
+        translator.trans('foo')
+        translator.trans('missing')
+        translator.trans('missing')
+        translator.transchoice('missing apples', 3)
+        translator.trans('missing', domain='admin', locale='fr')
+        translator.trans_many([('missing', None)])
+
+        self.assertEquals([
+            ('fr_FR', 'messages', 'missing', 3, 0),
+            ('fr', 'admin', 'missing', 1, 0),
+            ('fr_FR', 'messages', 'missing apples', 1, 0),
+        ], missing.get_missing())
+        self.assertEquals(
+            [('fr', 'admin', 'missing', 1, 0)], missing.get_missing('fr'))
+
+        missing.reset()
+        self.assertEquals([], missing.get_missing())
+
+    def testCompositeInstrumentation(self):
+        translator = self.createTranslator()
+        metrics = MetricsCollector()
+        unsampled = MetricsCollector(0)
+        missing = MissingTranslationCollector()
+        translator.instrumentation = CompositeInstrumentation(
+            [metrics, unsampled, missing])
+
+        translator.trans('foo')
+        translator.trans_many([('missing', None)])
+        translator.transchoice_many([('apples', 2, None)])
+
+        snapshot = metrics.snapshot()
+        self.assertEquals([
+            {'locale': 'fr_FR', 'domain': 'messages', 'hits': 1, 'fallbacks': 1, 'misses': 1},
+        ], snapshot['lookups'])
+        self.assertEquals(3, snapshot['format']['count'])
+        self.assertEquals(3, len(snapshot['catalogues']))
+
+        snapshot = unsampled.snapshot()
+        self.assertEquals([], snapshot['lookups'])
+        self.assertEquals(0, snapshot['format']['count'])
+        self.assertEquals(3, len(snapshot['catalogues']))
+
+        self.assertEquals(
+            [('fr_FR', 'messages', 'missing', 1, 0)], missing.get_missing())
+
+    def testMissingTranslationsAreBounded(self):
+        missing = MissingTranslationCollector(capacity=2, max_length=10)
+        for id in ['a', 'a', 'a', 'b', 'c', 'd', 'a', 'x' * 11]:
+            missing.lookup('en', 'messages', id, None, 0)
+
+        # d replaced c, which replaced b, inheriting their counts
+        self.assertEquals([
+            ('en', 'messages', 'a', 4, 0),
+            ('en', 'messages', 'd', 3, 2),
+        ], missing.get_missing())
+        self.assertEquals(1, missing.ignored)
+
+        self.assertRaises(ValueError, lambda: MissingTranslationCollector(0))
+
+    def testMissingTranslationsCatalogue(self):
+        missing = MissingTranslationCollector()
+        missing.lookup('en', 'messages', 'foo', None, 0)
+        missing.lookup('en', 'admin', 'bar', None, 0)
+        missing.lookup('fr', 'messages', 'baz', None, 0)
+        missing.lookup('en', 'messages', 'found', 'en', 0)
+
+        catalogue = missing.get_catalogue('en')
+        self.assertEquals(
+            {'messages': {'foo': 'foo'}, 'admin': {'bar': 'bar'}}, catalogue.all())
+
+        directory = tempfile.mkdtemp()
+        try:
+            dumpers.JSONFileDumper().dump(catalogue, {'path': directory})
+            loaded = loaders.JSONFileLoader().load(
+                os.path.join(directory, 'admin.en.json'), 'en', 'admin')
+            self.assertEquals({'bar': 'bar'}, loaded.all('admin'))
+        finally:
+            shutil.rmtree(directory)
+
+    def createTranslator(self, translator_class=Translator):
+        translator = translator_class('fr_FR')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr_FR)'}, 'fr_FR')
+        translator.add_resource('dict', {
+            'bar': 'bar (fr)',
+            'apples': '{0} no apples|{1} one apple|]1,Inf] {count} apples',
+        }, 'fr')
+        translator.add_resource('dict', {'baz': 'baz (en)'}, 'en')
+        translator.add_resource('dict', {'foo': 'admin (en)'}, 'en', 'admin')
+        return translator
+
+
+class RecordingInstrumentation(Instrumentation):
+
+    def __init__(self):
+        self.lookups = []
+        self.formats = 0
+
+    def lookup(self, locale, domain, id, found_locale, hops):
+        self.lookups.append((locale, domain, id, found_locale, hops))
+
+    def formatted(self, seconds):
+        self.formats += 1
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,6 +27,13 @@ class IntervalTest(unittest.TestCase):
         self.assertFalse(test_interval(2, ']1,2['))
         self.assertTrue(test_interval(float('-Inf'), '[-Inf,2['))
         self.assertTrue(test_interval(float('+Inf'), '[-1,+Inf]'))
+        self.assertTrue(test_interval(1, '{1.0}'))
+        self.assertTrue(test_interval(0.5, '{0.5, 2}'))
+        self.assertFalse(test_interval(0.7, '{0.7}'))
+        self.assertTrue(test_interval('1', '{1}'))
+        self.assertTrue(test_interval('1.0', '{0,1}'))
+        self.assertTrue(test_interval('0.7', '{0.7}'))
+        self.assertFalse(test_interval('2', '{1}'))
 
     def test_exception(self):
         self.assertRaises(ValueError, lambda: test_interval(1, 'foobar'))
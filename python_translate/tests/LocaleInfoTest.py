@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import unittest
+
+from python_translate import localeinfo
+from python_translate.localeinfo import get_locale_info
+from python_translate.selector import PluralizationRules
+
+
+class LocaleInfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = dict(PluralizationRules._rules)
+
+    def tearDown(self):
+        PluralizationRules._rules = self.rules
+        localeinfo.clear_locale_infos()
+
+    def testGetLocaleInfo(self):
+        info = get_locale_info('fr_FR')
+        self.assertEquals('fr_FR', info.locale)
+        self.assertEquals('fr', info.language)
+        self.assertTrue(info.valid)
+        self.assertIs(PluralizationRules._rules['fr'], info.plural)
+        self.assertIs(info, get_locale_info('fr_FR'))
+
+        self.assertEquals('', get_locale_info('').language)
+        self.assertFalse(get_locale_info('fr FR').valid)
+        self.assertEquals(0, get_locale_info('tlh').plural(5))
+
+    def testSetPluralRuleClearsLocaleInfos(self):
+        info = get_locale_info('fr_FR')
+        PluralizationRules.set(lambda number: 1, 'fr')
+
+        self.assertIsNot(info, get_locale_info('fr_FR'))
+        self.assertEquals(1, get_locale_info('fr_FR').plural(0))
+        self.assertEquals(1, PluralizationRules.get(0, 'fr_FR'))
+
+    def testInvalidLocalesAreNotRemembered(self):
+        self.assertFalse(get_locale_info('fr FR').valid)
+        self.assertNotIn('fr FR', localeinfo._infos)
+
+    def testLocaleInfosAreBounded(self):
+        limit = localeinfo._INFOS_LIMIT
+        localeinfo._INFOS_LIMIT = 2
+        try:
+            localeinfo.clear_locale_infos()
+            for locale in ['a', 'b']:
+                get_locale_info(locale)
+            self.assertEquals(set(['a', 'b']), set(localeinfo._infos))
+            self.assertTrue(get_locale_info('c').valid)
+            self.assertEquals(set(['c']), set(localeinfo._infos))
+        finally:
+            localeinfo._INFOS_LIMIT = limit
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,7 +13,7 @@ files that were distributed with this source code.
 import collections
 import unittest
 
-from python_translate.translations import MessageCatalogue
+from python_translate.translations import MessageCatalogue, FrozenCatalogue
 
 
 class TranslatorTest(unittest.TestCase):
@@ -76,6 +76,18 @@ class TranslatorTest(unittest.TestCase):
         catalogue.add(dict(foo='bar'), 'domain88')
         self.assertEquals('bar', catalogue.get('foo', 'domain88'))
 
+    def testCaseSensitive(self):
+        catalogue = MessageCatalogue(
+            'en', dict(domain1=dict(Foo='foo')), case_sensitive=True)
+        catalogue.add(dict(foo='bar'), 'domain1')
+
+        self.assertEquals('foo', catalogue.get('Foo', 'domain1'))
+        self.assertEquals('bar', catalogue.get('foo', 'domain1'))
+        self.assertFalse(catalogue.has('FOO', 'domain1'))
+
+        catalogue = MessageCatalogue('en', dict(domain1=dict(Foo='foo')))
+        self.assertTrue(catalogue.has('FOO', 'domain1'))
+
     def testReplace(self):
         messages = dict(domain1=dict(foo='foo'), domain2=dict(bar='bar'))
         catalogue = MessageCatalogue('en', messages)
@@ -85,6 +97,42 @@ class TranslatorTest(unittest.TestCase):
 
         self.assertEquals(messages, catalogue.all('domain1'))
 
+    def testLazyDomain(self):
+        loaded = []
+
+        def load(catalogue):
+            loaded.append(catalogue.locale)
+            catalogue.add(dict(foo='lazy foo'), 'domain2')
+
+        catalogue = MessageCatalogue('en', dict(domain1=dict(foo='foo')))
+        catalogue.add_lazy_domain('domain2', load)
+
+        self.assertEquals(['domain1', 'domain2'], sorted(catalogue.get_domains()))
+        self.assertEquals('foo', catalogue.get('foo', 'domain1'))
+        self.assertEquals([], loaded)
+
+        self.assertEquals('lazy foo', catalogue.get('foo', 'domain2'))
+        self.assertTrue(catalogue.defines('foo', 'domain2'))
+        self.assertEquals(
+            dict(domain1=dict(foo='foo'), domain2=dict(foo='lazy foo')),
+            catalogue.all())
+        self.assertEquals(['en'], loaded)
+
+    def testLazyDomainIsRetriedAfterError(self):
+        attempts = []
+
+        def load(catalogue):
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise IOError()
+            catalogue.add(dict(foo='bar'), 'domain1')
+
+        catalogue = MessageCatalogue('en')
+        catalogue.add_lazy_domain('domain1', load)
+
+        self.assertRaises(IOError, lambda: catalogue.get('foo', 'domain1'))
+        self.assertEquals('bar', catalogue.get('foo', 'domain1'))
+
     def testAddCatalogue(self):
         catalogue = MessageCatalogue(
             'en', dict(
@@ -105,6 +153,86 @@ class TranslatorTest(unittest.TestCase):
         resources.sort(key=len)
         self.assertEquals(['r', 'r1'], resources)
 
+    def testAddCatalogueSharesNewDomains(self):
+        catalogue = MessageCatalogue('en', dict(domain1=dict(foo='foo')))
+        catalogue1 = MessageCatalogue(
+            'en', dict(domain1=dict(foo1='foo1'), domain2=dict(bar='bar')))
+
+        catalogue.add_catalogue(catalogue1)
+        self.assertIs(catalogue1.messages['domain2'], catalogue.messages['domain2'])
+
+        catalogue.add(dict(baz='baz'), 'domain2')
+        catalogue1.add(dict(qux='qux'), 'domain2')
+
+        self.assertEquals(dict(bar='bar', baz='baz'), catalogue.all('domain2'))
+        self.assertEquals(dict(bar='bar', qux='qux'), catalogue1.all('domain2'))
+
+    def testFreeze(self):
+        catalogue = MessageCatalogue('en', dict(domain1=dict(foo='foo')))
+        catalogue.add_resource('r')
+        frozen = catalogue.freeze()
+
+        self.assertIsInstance(frozen, FrozenCatalogue)
+        self.assertIs(frozen, frozen.freeze())
+        self.assertIs(catalogue.messages['domain1'], frozen.messages['domain1'])
+        self.assertEquals(catalogue, frozen)
+        self.assertEquals(frozen, catalogue)
+        self.assertEquals(hash(frozen), hash(catalogue.freeze()))
+        self.assertEquals('foo', frozen.get('FOO', 'domain1'))
+        self.assertEquals(['r'], frozen.get_resources())
+
+        self.assertRaises(TypeError, lambda: frozen.set('foo', 'bar', 'domain1'))
+        self.assertRaises(TypeError, lambda: frozen.add(dict(foo='bar')))
+        self.assertRaises(TypeError, lambda: frozen.replace(dict(foo='bar')))
+        self.assertRaises(TypeError, lambda: frozen.add_resource('r1'))
+        self.assertRaises(
+            TypeError, lambda: frozen.add_catalogue(MessageCatalogue('en')))
+
+        catalogue.add(dict(foo='bar'), 'domain1')
+        self.assertEquals('foo', frozen.get('foo', 'domain1'))
+        self.assertEquals('bar', catalogue.get('foo', 'domain1'))
+
+    def testFreezeFallbackCatalogues(self):
+        catalogue = MessageCatalogue('en_US')
+        fallback = MessageCatalogue('en', dict(domain1=dict(foo='foo')))
+        catalogue.add_fallback_catalogue(fallback)
+        frozen = catalogue.freeze()
+
+        self.assertIsInstance(frozen.fallback_catalogue, FrozenCatalogue)
+        self.assertIs(frozen, frozen.fallback_catalogue.parent)
+        self.assertEquals('foo', frozen.get('foo', 'domain1'))
+        self.assertEquals(catalogue, frozen)
+        self.assertEquals(frozen, catalogue.freeze())
+
+        other = MessageCatalogue('fr')
+        self.assertRaises(
+            TypeError, lambda: frozen.add_fallback_catalogue(other))
+        self.assertIsNone(other.parent)
+        self.assertIs(fallback, catalogue.fallback_catalogue)
+
+    def testFreezeLazyDomains(self):
+        loads = []
+
+        def load(catalogue):
+            loads.append(catalogue)
+            catalogue.add(dict(foo='lazy foo'), 'domain2')
+
+        catalogue = MessageCatalogue('en', dict(domain1=dict(foo='foo')))
+        catalogue.add_lazy_domain('domain2', load)
+        frozen = catalogue.freeze()
+        frozen_hash = hash(frozen)
+
+        self.assertEquals('lazy foo', frozen.get('foo', 'domain2'))
+        self.assertEquals('lazy foo', catalogue.get('foo', 'domain2'))
+        self.assertEquals(1, len(loads))
+        self.assertIs(catalogue.messages['domain2'], frozen.messages['domain2'])
+        self.assertEquals(frozen_hash, hash(frozen))
+        self.assertEquals(catalogue, frozen)
+        self.assertEquals(hash(frozen), hash(catalogue.freeze()))
+
+        catalogue.add(dict(bar='bar'), 'domain2')
+        self.assertFalse(frozen.defines('bar', 'domain2'))
+
     def testadd_fallback_catalogue(self):
         catalogue = MessageCatalogue(
             'en_US', dict(
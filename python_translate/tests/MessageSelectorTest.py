@@ -13,7 +13,7 @@ files that were distributed with this source code.
 import collections
 import unittest
 
-from python_translate.selector import select_message
+from python_translate.selector import select_message, compile_choice
 
 
 class PluralizationRulesTest(unittest.TestCase):
@@ -39,6 +39,15 @@ class PluralizationRulesTest(unittest.TestCase):
                     number,
                     'en'))
 
+    def testCompiledChoiceIsReused(self):
+        message = '{0} There are no apples|one: There is one apple|more: There are {count} apples'
+        choice = compile_choice(message)
+
+        self.assertIs(choice, compile_choice(message))
+        self.assertEquals(['There is one apple', 'There are {count} apples'], choice.standard_rules)
+        self.assertEquals('There are no apples', choice.select(0, 'en'))
+        self.assertEquals('There are {count} apples', choice.select(3, 'en'))
+
     def getNonMatchingMessages(self):
         return [
             ['{0} There are no apples|{1} There is one apple', 2],
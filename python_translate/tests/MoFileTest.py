@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from python_translate.mofile import MoFile, MoMessages, write_mo_file
+from python_translate.utils import CaseInsensitiveIndex
+
+__DIR__ = os.path.dirname(os.path.abspath(__file__))
+
+
+class MoFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testFind(self):
+        mo = MoFile(__DIR__ + '/fixtures/plurals.mo')
+
+        self.assertEquals(1, len(mo))
+        self.assertEquals(0, mo.find(b'foo'))
+        self.assertIsNone(mo.find(b'foos'))
+        self.assertIsNone(mo.find(b'bar'))
+        self.assertEquals(['bar', 'bars'], mo.translation_forms(0))
+
+    def testEntries(self):
+        mo = MoFile(__DIR__ + '/fixtures/resources.mo')
+
+        self.assertEquals(
+            [(None, '', None, 0), (None, 'foo', None, 1)], mo.entries())
+
+    def testInvalidFile(self):
+        self.assertRaises(
+            ValueError,
+            lambda: MoFile(__DIR__ + '/fixtures/empty.mo'))
+        self.assertRaises(
+            ValueError,
+            lambda: MoFile(__DIR__ + '/fixtures/resources.po'))
+
+    def testMessagesAreDecodedOnAccess(self):
+        messages = MoMessages(MoFile(__DIR__ + '/fixtures/plurals.mo'))
+
+        self.assertIn('FOO', messages)
+        self.assertEquals(2, len(messages))
+        self.assertEquals({}, messages._values)
+        self.assertEquals('bar|bars', messages['foos'])
+        self.assertEquals(['foos'], list(messages._values))
+        self.assertEquals({'foo': 'bar', 'foos': 'bar|bars'}, dict(messages.items()))
+
+    def testCaseSensitiveMessagesUseHashTable(self):
+        messages = MoMessages(
+            MoFile(__DIR__ + '/fixtures/plurals.mo'), case_sensitive=True)
+
+        self.assertEquals('bar|bars', messages['foos'])
+        self.assertNotIn('FOO', messages)
+
+    def testCopyIsIndependent(self):
+        messages = MoMessages(MoFile(__DIR__ + '/fixtures/resources.mo'))
+        copy = messages.copy()
+        copy['foo'] = 'baz'
+
+        self.assertEquals('bar', messages['foo'])
+        self.assertEquals('baz', copy['FOO'])
+
+    def testPickle(self):
+        messages = MoMessages(MoFile(__DIR__ + '/fixtures/plurals.mo'))
+        unpickled = pickle.loads(pickle.dumps(messages))
+
+        self.assertIsInstance(unpickled, CaseInsensitiveIndex)
+        self.assertEquals(messages, unpickled)
+        self.assertEquals('bar|bars', unpickled['FOOS'])
+
+    def testEntriesWithoutContextTakePrecedence(self):
+        path = self.write([
+            (b'Open', b'Ouvrir'),
+            (b'menu\x04Open', b'Ouvrir (menu)'),
+            (b'zzz\x04Open', b'Ouvrir (zzz)'),
+            (b'zzz\x04Close', b'Fermer (zzz)')])
+
+        for case_sensitive in (True, False):
+            # looked up before the ids are indexed
+            messages = MoMessages(MoFile(path), case_sensitive=case_sensitive)
+            self.assertEquals('Ouvrir', messages['Open'])
+            self.assertEquals('Fermer (zzz)', messages['Close'])
+
+            # and after
+            messages = MoMessages(MoFile(path), case_sensitive=case_sensitive)
+            messages._index()
+            self.assertEquals('Ouvrir', messages['Open'])
+            self.assertEquals('Fermer (zzz)', messages['Close'])
+
+    def testTruncatedFileIsNotRead(self):
+        path = self.write([(b'foo', b'bar'), (b'baz', b'qux')])
+        messages = MoMessages(MoFile(path))
+        self.assertEquals('bar', messages['foo'])
+
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+
+        self.assertRaises(ValueError, lambda: messages['baz'])
+        self.assertEquals('bar', messages['foo'])
+
+    def testClose(self):
+        path = self.write([(b'foo', b'bar'), (b'baz', b'qux')])
+        mo = MoFile(path)
+        messages = MoMessages(mo)
+        self.assertEquals('bar', messages['foo'])
+
+        messages.close()
+        messages.close()
+
+        self.assertTrue(mo.closed)
+        self.assertRaises(ValueError, lambda: messages['baz'])
+        self.assertEquals('bar', messages['foo'])
+
+    def write(self, entries):
+        path = os.path.join(self.directory, 'messages.mo')
+        write_mo_file(path, entries)
+        return path
+
+if __name__ == '__main__':
+    unittest.main()
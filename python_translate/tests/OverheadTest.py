@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import timeit
+import unittest
+
+from python_translate import loaders
+from python_translate import localeinfo
+from python_translate.translations import Translator, MessageCatalogue
+
+
+@unittest.skipUnless(
+    os.environ.get('PYTHON_TRANSLATE_BENCHMARKS'),
+    'set PYTHON_TRANSLATE_BENCHMARKS=1 to run the microbenchmarks')
+class OverheadTest(unittest.TestCase):
+
+    """
+    Measures the per-call overhead of validating locales and of the checks
+    of catalogue lookups. Timings are printed, not asserted.
+    """
+
+    number = 100000
+
+    def testTransWithLocale(self):
+        translator = Translator('en')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr_FR')
+        translator.trans('foo', locale='fr_FR')
+
+        remembered = self.measure(lambda: translator.trans('foo', locale='fr_FR'))
+
+        infos = localeinfo._infos
+        localeinfo._infos = ForgetfulDict()
+        try:
+            validated = self.measure(lambda: translator.trans('foo', locale='fr_FR'))
+        finally:
+            localeinfo._infos = infos
+
+        self.report('trans() validating the locale', validated)
+        self.report('trans() with a remembered locale', remembered)
+
+    def testCatalogueLookups(self):
+        fallback = MessageCatalogue('en', {'messages': {'bar': 'bar (en)'}})
+        catalogue = MessageCatalogue('fr', {'messages': {'foo': 'foo (fr)'}})
+        catalogue.add_fallback_catalogue(fallback)
+
+        self.report('MessageCatalogue.get()',
+                    self.measure(lambda: catalogue.get('bar')))
+        self.report('MessageCatalogue._get()',
+                    self.measure(lambda: catalogue._get('bar', 'messages')))
+        self.report('MessageCatalogue.has()',
+                    self.measure(lambda: catalogue.has('bar', 'messages')))
+        self.report('MessageCatalogue._has()',
+                    self.measure(lambda: catalogue._has('bar', 'messages')))
+
+    def measure(self, func):
+        return min(timeit.repeat(func, number=self.number, repeat=5)) / self.number
+
+    def report(self, name, seconds):
+        print('\n{0:<40} {1:8.3f} us/call'.format(name, seconds * 1e6))
+
+
+class ForgetfulDict(dict):
+
+    """
+    Never remembers a locale, as when every call validated its locale.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+if __name__ == '__main__':
+    unittest.main()
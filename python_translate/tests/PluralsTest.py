@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import array
+import unittest
+from decimal import Decimal
+
+from python_translate import loaders
+from python_translate import localeinfo
+from python_translate.cldr import CARDINAL_RULES
+from python_translate.plurals import compile_rule, operands
+from python_translate.selector import PluralizationRules, select_message, \
+    select_messages
+from python_translate.translations import Translator
+
+
+class PluralsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = dict(PluralizationRules._rules)
+
+    def tearDown(self):
+        PluralizationRules._rules = self.rules
+        localeinfo.clear_locale_infos()
+
+    def testOperands(self):
+        self.assertEquals((3, 3, 0, 0, 0, 0, 0, 0), operands(3))
+        self.assertEquals((3, 3, 0, 0, 0, 0, 0, 0), operands(-3))
+        self.assertEquals((3, 3, 0, 0, 0, 0, 0, 0), operands(3.0))
+        self.assertEquals((1.0, 1, 1, 0, 0, 0, 0, 0), operands('1.0'))
+        self.assertEquals((1.5, 1, 2, 1, 50, 5, 0, 0), operands('1.50'))
+        self.assertEquals((1.5, 1, 2, 1, 50, 5, 0, 0), operands(Decimal('-1.50')))
+        self.assertEquals((2.25, 2, 2, 2, 25, 25, 0, 0), operands(2.25))
+        self.assertEquals((1200, 1200, 0, 0, 0, 0, 0, 0), operands('1.2e3'))
+        self.assertRaises(ValueError, lambda: operands('one'))
+
+    def testCompileRule(self):
+        for rules, categories in self.getCategoriesTests():
+            rule = compile_rule(rules)
+            for number, category in categories:
+                self.assertEquals(
+                    category, rule.category(number),
+                    '{0} is "{1}" with {2}'.format(number, category, rules))
+                self.assertEquals(rule.categories.index(category), rule(number))
+
+    def testCompileRuleIsCached(self):
+        self.assertIs(compile_rule('one: n = 1'), compile_rule('one: n = 1'))
+        self.assertEquals(
+            ['one', 'few', 'other'],
+            compile_rule({'few': 'n = 2..4', 'one': 'n = 1 @integer 1'}).categories)
+        self.assertEquals(['other'], compile_rule('').categories)
+
+    def testInvalidRules(self):
+        for rules in [
+                'one n = 1',
+                'single: n = 1',
+                'one: n = ',
+                'one: n == 1',
+                'one: x = 1',
+                'one: n = 1 and',
+                'one: n = 1..',
+                'one: n % = 1',
+                'other: n = 1',
+                'one:']:
+            self.assertRaises(ValueError, lambda: compile_rule(rules))
+
+    def testIntegerTable(self):
+        rule = compile_rule(CARDINAL_RULES['ru'])
+        for number in range(2 * rule.table_size):
+            self.assertEquals(rule._integer(number), rule(number))
+            self.assertEquals(rule(number), rule(-number))
+            self.assertEquals(rule(number), rule(str(number)))
+
+    def testBundledRules(self):
+        for rules in set(CARDINAL_RULES.values()):
+            rule = compile_rule(rules)
+            self.assertEquals('other', rule.categories[-1])
+            for number in list(range(0, 201)) + [1000000, '0.5', '1.25', '2.0']:
+                self.assertTrue(0 <= rule(number) < len(rule.categories))
+
+    def testSetCldrRule(self):
+        PluralizationRules.set('one: n = 1; few: n = 2..4', 'xx')
+        self.assertEquals(0, PluralizationRules.get(1, 'xx'))
+        self.assertEquals(1, PluralizationRules.get(3, 'xx_YY'))
+        self.assertEquals(2, PluralizationRules.get(5, 'xx'))
+
+        # resolved rules are dropped when a rule changes
+        PluralizationRules.set(lambda number: 1, 'xx')
+        self.assertEquals(1, PluralizationRules.get(5, 'xx'))
+        self.assertEquals(1, PluralizationRules.get(1, 'xx_YY'))
+
+        self.assertRaises(ValueError, lambda: PluralizationRules.set('one n', 'xx'))
+        self.assertRaises(ValueError, lambda: PluralizationRules.set(1, 'xx'))
+
+    def testLoadCldr(self):
+        self.assertEquals(0, PluralizationRules.get(2, 'kk'))
+        self.assertEquals(2, PluralizationRules.get(1.5, 'ru'))
+
+        PluralizationRules.load_cldr(['kk', 'ru_RU'])
+        self.assertEquals(1, PluralizationRules.get(2, 'kk'))
+        self.assertEquals(2, PluralizationRules.get(5, 'ru'))
+        self.assertEquals(3, PluralizationRules.get(1.5, 'ru'))
+        self.assertEquals(
+            'many', select_message('one|few|many|other', 25, 'ru'))
+
+        PluralizationRules.load_cldr()
+        self.assertEquals(0, PluralizationRules.get(0, 'pt_BR'))
+        self.assertEquals(2, PluralizationRules.get(3, 'gd'))
+        self.assertEquals(3, PluralizationRules.get(20, 'gd'))
+        self.assertRaises(KeyError, lambda: PluralizationRules.load_cldr(['tlh']))
+
+    def testGetMany(self):
+        numbers = [0, 1, 2, 5, 21, 1, 2.5, 5, 1.0]
+        for locale in ['en', 'fr', 'ru', 'pl', 'xx']:
+            expected = [PluralizationRules.get(n, locale) for n in numbers]
+            self.assertEquals(expected, PluralizationRules.get_many(numbers, locale))
+            self.assertEquals(
+                expected, PluralizationRules.get_many(iter(numbers), locale))
+            self.assertEquals(
+                expected, PluralizationRules.get_many(array.array('d', numbers), locale))
+
+        # equal decimals and strings may have a different category
+        PluralizationRules.load_cldr(['en'])
+        self.assertEquals(
+            [0, 1, 1, 0], PluralizationRules.get_many(
+                [1, Decimal('1.0'), '1.0', Decimal('1')], 'en'))
+
+    def testSelectMessages(self):
+        message = '{0} none|{1} one|]1,Inf] many'
+        self.assertEquals(
+            ['none', 'one', 'many', 'many'],
+            select_messages(message, [0, 1, 2, 5], 'en'))
+        self.assertEquals([], select_messages(message, [], 'en'))
+
+        PluralizationRules.load_cldr(['ru'])
+        self.assertEquals(
+            ['one', 'few', 'many', 'other'],
+            select_messages('one|few|many|other', [21, 3, 11, 1.5], 'ru'))
+
+    def testExplicitRulesAreMatchedFirst(self):
+        def rule(number):
+            if number == 0:
+                raise ValueError('no plural position for 0')
+            return 0 if number == 1 else 1
+
+        PluralizationRules.set(rule, 'xx')
+        message = '{0} none|one|many'
+        self.assertEquals(
+            ['none', 'one', 'many'], select_messages(message, [0, 1, 2], 'xx'))
+
+        translator = Translator('xx')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'apples': message}, 'xx')
+        messages = [('apples', number, None) for number in [0, 1, 2]]
+        self.assertEquals(
+            [translator.transchoice(*message) for message in messages],
+            translator.transchoice_many(messages))
+
+    def getCategoriesTests(self):
+        return [
+            [CARDINAL_RULES['en'], [
+                (0, 'other'), (1, 'one'), (2, 'other'), ('1.0', 'other'), (1.5, 'other')]],
+            [CARDINAL_RULES['fr'], [
+                (0, 'one'), (1, 'one'), (1.5, 'one'), (2, 'other'),
+                (1000000, 'many'), (1000001, 'other'), ('1000000.0', 'other')]],
+            [CARDINAL_RULES['ru'], [
+                (1, 'one'), (21, 'one'), (11, 'many'), (2, 'few'), (24, 'few'),
+                (12, 'many'), (5, 'many'), (100, 'many'), (1.5, 'other')]],
+            [CARDINAL_RULES['pl'], [
+                (1, 'one'), (0, 'many'), (21, 'many'), (22, 'few'), (12, 'many'),
+                ('0.5', 'other')]],
+            [CARDINAL_RULES['cs'], [
+                (1, 'one'), (3, 'few'), (5, 'other'), ('1.5', 'many')]],
+            [CARDINAL_RULES['lt'], [
+                (1, 'one'), (11, 'other'), (2, 'few'),
+                (19, 'other'), (0.5, 'many'), ('1.0', 'one')]],
+            [CARDINAL_RULES['lv'], [
+                (0, 'zero'), (11, 'zero'), (1, 'one'), (21, 'one'), (2, 'other'),
+                ('0.11', 'zero'), ('0.1', 'one'), ('0.2', 'other')]],
+            [CARDINAL_RULES['ar'], [
+                (0, 'zero'), (1, 'one'), (2, 'two'), (3, 'few'), (110, 'few'),
+                (11, 'many'), (99, 'many'), (100, 'other'), (102, 'other')]],
+            [CARDINAL_RULES['cy'], [
+                (0, 'zero'), (3, 'few'), (6, 'many'), (7, 'other')]],
+            [CARDINAL_RULES['is'], [
+                (1, 'one'), (11, 'other'), (21, 'one'), ('0.1', 'one'), ('0.2', 'other')]],
+            [CARDINAL_RULES['br'], [
+                (1, 'one'), (71, 'other'), (2, 'two'), (3, 'few'), (9, 'few'),
+                (19, 'other'), (1000000, 'many')]],
+            [CARDINAL_RULES['ja'], [(0, 'other'), (1, 'other'), ('1.5', 'other')]],
+            ['one: n = 0..1', [(0, 'one'), (1, 'one'), ('0.5', 'other'), ('1.0', 'one')]],
+            ['one: n % 10 = 2..4', [(3, 'one'), (13, 'one'), (2.5, 'other')]],
+        ]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import unittest
+
+from python_translate.pofile import iter_entries, iter_messages, PoSyntaxError
+
+PO = b'''# translator comment
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+#: src/foo.py:12
+#, fuzzy
+msgctxt "menu"
+msgid "Open"
+msgstr "Ouvrir"
+
+msgid ""
+"multi "
+"line"
+msgstr "sur "
+"plusieurs\\tlignes\\n"
+
+msgid "apple"
+msgid_plural "apples"
+msgstr[0] "pomme"
+msgstr[1] "pommes"
+
+#~ msgid "old"
+#~ msgstr "vieux"
+'''
+
+
+class PoFileTest(unittest.TestCase):
+
+    def testEntries(self):
+        entries = list(iter_entries(PO.splitlines(True)))
+
+        self.assertEquals([
+            (None, '', None, ['Content-Type: text/plain; charset=UTF-8\n']),
+            ('menu', 'Open', None, ['Ouvrir']),
+            (None, 'multi line', None, ['sur plusieurs\tlignes\n']),
+            (None, 'apple', 'apples', ['pomme', 'pommes']),
+            (None, 'old', None, ['vieux']),
+        ], entries)
+
+    def testMessages(self):
+        self.assertEquals({
+            'Open': 'Ouvrir',
+            'multi line': 'sur plusieurs\tlignes\n',
+            'apple': 'pomme',
+            'apples': 'pomme|pommes',
+            'old': 'vieux',
+        }, dict(iter_messages(PO.splitlines(True))))
+
+    def testSyntaxError(self):
+        self.assertRaises(
+            PoSyntaxError,
+            lambda: list(iter_entries([b'msgid "foo"', b'msgstr foo'])))
+        self.assertRaises(
+            PoSyntaxError,
+            lambda: list(iter_entries([b'msgstr "foo"'])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from python_translate import loaders
+from python_translate.shared import SharedCatalogues, SharedCatalogue, \
+    write_shared_catalogues
+from python_translate.translations import Translator, MessageCatalogue
+
+
+class SharedCataloguesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'catalogues.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testCatalogue(self):
+        catalogue = MessageCatalogue(
+            'fr', dict(messages=dict(Foo=u'foo (fr)', bar=u'bär (fr)')))
+        catalogue.add_resource('r')
+        fallback = MessageCatalogue(
+            'en', dict(messages=dict(baz='baz (en)'), admin=dict(foo='admin')))
+        catalogue.add_fallback_catalogue(fallback)
+
+        write_shared_catalogues(self.path, [catalogue])
+        shared = SharedCatalogues(self.path)
+
+        self.assertEquals(['en', 'fr'], sorted(shared.locales))
+        self.assertFalse(shared.case_sensitive)
+
+        fr = shared.get_catalogue('fr')
+        self.assertIsInstance(fr, SharedCatalogue)
+        self.assertIs(shared.get_catalogue('en'), fr.fallback_catalogue)
+        self.assertEquals(['messages'], fr.get_domains())
+        self.assertEquals(['r'], fr.get_resources())
+        self.assertEquals(catalogue.all(), fr.all())
+        self.assertEquals(fallback.all(), fr.fallback_catalogue.all())
+
+        self.assertEquals(u'foo (fr)', fr.get('FOO'))
+        self.assertEquals(u'bär (fr)', fr.get('bar'))
+        self.assertEquals('baz (en)', fr.get('baz'))
+        self.assertEquals('admin', fr.get('foo', 'admin'))
+        self.assertEquals('missing', fr.get('missing'))
+        self.assertTrue(fr.defines('foo'))
+        self.assertFalse(fr.defines('baz'))
+        self.assertTrue(fr.has('baz', 'messages'))
+        self.assertFalse(fr.has('missing', 'messages'))
+
+        self.assertRaises(KeyError, lambda: shared.get_catalogue('de'))
+        shared.close()
+
+    def testCaseSensitive(self):
+        catalogue = MessageCatalogue(
+            'en', dict(messages=dict(Foo='Foo', foo='foo')), case_sensitive=True)
+
+        write_shared_catalogues(self.path, [catalogue])
+        shared = SharedCatalogues(self.path)
+
+        self.assertTrue(shared.case_sensitive)
+        self.assertEquals('Foo', shared.get_catalogue('en').get('Foo'))
+        self.assertEquals('foo', shared.get_catalogue('en').get('foo'))
+        self.assertFalse(shared.get_catalogue('en').defines('FOO'))
+
+    def testInvalidMessages(self):
+        self.assertRaises(
+            ValueError,
+            lambda: write_shared_catalogues(
+                self.path, [MessageCatalogue('en', dict(messages=dict(foo=1)))]))
+        self.assertFalse(os.path.exists(self.path))
+
+    def testInvalidFile(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a shared catalogues file')
+
+        self.assertRaises(ValueError, lambda: SharedCatalogues(self.path))
+
+    def testTranslator(self):
+        translator = Translator('fr_FR')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'foo': 'foo (fr_FR)'}, 'fr_FR')
+        translator.add_resource('dict', {
+            'bar': 'bar (en)',
+            'apples': '{0} no apples|{1} one apple|]1,Inf] {count} apples',
+        }, 'en')
+        translator.add_resource('dict', {'baz': 'baz (de)'}, 'de')
+        translator.dump_shared(self.path, ['fr_FR'])
+
+        attached = Translator('fr_FR')
+        attached.set_fallback_locales(['en'])
+        attached.add_loader('dict', loaders.DictLoader())
+        attached.add_resource('dict', {'baz': 'baz (de)'}, 'de')
+        attached.attach_shared(self.path)
+
+        self.assertEquals('foo (fr_FR)', attached.trans('foo'))
+        self.assertEquals('foo (fr)', attached.trans('FOO', locale='fr'))
+        self.assertEquals('bar (en)', attached.trans('bar'))
+        self.assertEquals('3 apples', attached.transchoice('apples', 3))
+        self.assertEquals('baz (de)', attached.trans('baz', locale='de'))
+        self.assertEquals(
+            translator.get_messages('fr_FR'), attached.get_messages('fr_FR'))
+        self.assertIsInstance(attached.get_catalogue('en'), SharedCatalogue)
+
+        attached.add_resource('dict', {'foo': 'foo (fr_FR) 2'}, 'fr_FR')
+        self.assertIsNone(attached.shared)
+        self.assertEquals('foo (fr_FR) 2', attached.trans('foo'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import sys
+import time
+import threading
+import unittest
+
+from python_translate import loaders
+from python_translate.translations import Translator
+
+
+class ThreadSafetyTest(unittest.TestCase):
+
+    def setUp(self):
+        if hasattr(sys, 'setswitchinterval'):
+            self.switch_interval = sys.getswitchinterval()
+            # switch threads as often as possible to expose races
+            sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        if hasattr(sys, 'setswitchinterval'):
+            sys.setswitchinterval(self.switch_interval)
+
+    def testConcurrentFirstUseLoadsOnce(self):
+        for lazy_domains in [False, True]:
+            loader = SlowDictLoader()
+            translator = Translator('fr', lazy_domains=lazy_domains)
+            translator.set_fallback_locales(['en'])
+            translator.add_loader('dict', loader)
+            translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+            translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+            translator.add_resource('dict', {'foo': 'foo (admin)'}, 'en', 'admin')
+
+            results = self.runThreads(16, lambda: (
+                translator.trans('foo'),
+                translator.trans('bar'),
+                translator.trans('foo', domain='admin')))
+
+            self.assertEquals(
+                [('foo (fr)', 'bar (en)', 'foo (admin)')] * 16, results)
+            self.assertEquals(
+                sorted(['fr', 'en', 'en']), sorted(loader.locales))
+
+    def testTransWhileAddingResources(self):
+        translator = Translator('fr_FR')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+
+        expected = {
+            'foo': set(['foo (fr)']),
+            'bar': set(['bar (en)', 'bar (fr)']),
+            'baz': set(['baz', 'baz (en)']),
+        }
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                for id, choices in expected.items():
+                    translated = translator.trans(id)
+                    if translated not in choices:
+                        return translated
+                    translator.transchoice(id, 2)
+
+        def write():
+            try:
+                for i in range(50):
+                    locale = 'en' if i % 2 else 'fr'
+                    translator.add_resource(
+                        'dict', {'extra%d' % i: 'extra'}, locale)
+                    if i == 10:
+                        translator.add_resource(
+                            'dict', {'bar': 'bar (fr)'}, 'fr')
+                    if i == 20:
+                        translator.add_resource(
+                            'dict', {'baz': 'baz (en)'}, 'en')
+                    if i % 10 == 5:
+                        translator.set_fallback_locales(['en'])
+                    time.sleep(0.001)
+            finally:
+                done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        results = self.runThreads(8, read)
+        writer.join()
+
+        self.assertEquals([None] * 8, results)
+        self.assertEquals('bar (fr)', translator.trans('bar'))
+        self.assertEquals('baz (en)', translator.trans('baz'))
+        self.assertEquals('extra', translator.trans('extra49'))
+
+    def runThreads(self, count, target):
+        start = threading.Event()
+        results = [None] * count
+        errors = []
+
+        def run(i):
+            start.wait()
+            try:
+                results[i] = target()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+
+class SlowDictLoader(loaders.DictLoader):
+
+    def __init__(self):
+        self.locales = []
+
+    def load(self, resource, locale, domain='messages'):
+        self.locales.append(locale)
+        time.sleep(0.01)
+        return super(SlowDictLoader, self).load(resource, locale, domain)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,12 +12,17 @@ files that were distributed with this source code.
 
 import os
 import collections
+import shutil
+import tempfile
 import unittest
 
 from python_translate.selector import select_message
 from python_translate import loaders
 from python_translate import dumpers
-from python_translate.translations import Translator, MessageCatalogue
+from python_translate import localeinfo
+from python_translate.instrumentation import MetricsCollector
+from python_translate.mofile import write_mo_file
+from python_translate.translations import Translator, MessageCatalogue, FrozenCatalogue
 
 __DIR__ = os.path.dirname(os.path.abspath(__file__))
 
@@ -118,6 +123,17 @@ class TranslatorTest(unittest.TestCase):
 
         self.assertEquals('foobar', translator.trans('bar'))
 
+    def testFallbackChainsAreComputedOnce(self):
+        translator = Translator('fr_FR')
+        translator.set_fallback_locales(['en', 'fr'])
+        chain = translator._compute_fallback_locales('fr_FR')
+        self.assertEquals(['fr', 'en'], chain)
+        self.assertIs(chain, translator._compute_fallback_locales('fr_FR'))
+        self.assertEquals(['en'], translator._compute_fallback_locales('fr'))
+
+        translator.set_fallback_locales(['de'])
+        self.assertEquals(['fr', 'de'], translator._compute_fallback_locales('fr_FR'))
+
     def testadd_resourceInvalidLocales(self):
         for locale, in self.getInvalidLocalesTests():
             translator = Translator('fr')
@@ -145,6 +161,163 @@ class TranslatorTest(unittest.TestCase):
         translator.add_resource('dict', {'bar': 'foobar'}, 'en')
         self.assertEquals('foobar', translator.trans('bar'))
 
+    def testTransLookupTableResolvesFallbacks(self):
+        translator = Translator('fr_CA')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr_CA)'}, 'fr_CA')
+        translator.add_resource('dict', {'foo': 'foo (fr)', 'Bar': 'bar (fr)'}, 'fr')
+        translator.add_resource('dict', {'bar': 'bar (en)', 'baz': 'baz (en)'}, 'en')
+
+        self.assertEquals('foo (fr_CA)', translator.trans('foo'))
+        self.assertEquals('bar (fr)', translator.trans('bar'))
+        self.assertEquals('baz (en)', translator.trans('BAZ'))
+        self.assertEquals('missing', translator.trans('missing'))
+
+        catalogue = translator.get_catalogue()
+        self.assertNotIsInstance(catalogue, FrozenCatalogue)
+        self.assertIs(translator.get_catalogue('fr'), catalogue.fallback_catalogue)
+        catalogue.set('qux', 'qux (fr_CA)')
+
+        frozen = translator.get_frozen_catalogue()
+        self.assertIsInstance(frozen, FrozenCatalogue)
+        self.assertIsInstance(frozen.fallback_catalogue, FrozenCatalogue)
+        self.assertEquals(catalogue, frozen)
+        self.assertEquals('baz (en)', frozen.get('baz', 'messages'))
+        self.assertRaises(TypeError, lambda: frozen.set('qux', 'changed'))
+
+    def testTransLookupTableIsInvalidated(self):
+        translator = Translator('fr')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+
+        self.assertEquals('bar', translator.trans('bar'))
+
+        translator.set_fallback_locales(['en'])
+        self.assertEquals('bar (en)', translator.trans('bar'))
+
+        translator.add_resource('dict', {'bar': 'bar (fr)'}, 'fr')
+        self.assertEquals('bar (fr)', translator.trans('bar'))
+
+    def testTransSeesChangedCatalogues(self):
+        translator = Translator('fr')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+        self.assertEquals('bar (en)', translator.trans('bar'))
+
+        translator.get_catalogue('fr').set('foo', 'changed')
+        translator.get_catalogue('en').add({'bar': 'changed (en)'})
+        self.assertEquals('changed', translator.trans('foo'))
+        self.assertEquals('changed (en)', translator.trans('bar'))
+        self.assertEquals(
+            ['changed (en)'], translator.trans_many([('bar', {})]))
+
+        translator.get_catalogue('fr').replace({'baz': 'baz (fr)'})
+        self.assertEquals('foo', translator.trans('foo'))
+        self.assertEquals('baz (fr)', translator.trans('baz'))
+
+        self.assertEquals('qux', translator.trans('qux', domain='other'))
+        other = MessageCatalogue('fr')
+        other.set('qux', 'qux (fr)', 'other')
+        translator.get_catalogue('fr').add_catalogue(other)
+        self.assertEquals('qux (fr)', translator.trans('qux', domain='other'))
+
+    def testTransOnlyDecodesRequestedMessages(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'messages.fr.mo')
+        write_mo_file(path, [
+            (b'foo', b'foo (fr)'), (b'bar', b'bar (fr)'), (b'baz', b'baz (fr)')])
+
+        translator = Translator('fr')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('mo', loaders.MoFileLoader())
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('mo', path, 'fr')
+        translator.add_resource('dict', {'qux': 'qux (en)'}, 'en')
+
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+        self.assertEquals('qux (en)', translator.trans('qux'))
+        self.assertEquals('missing', translator.trans('missing'))
+
+        messages = translator.catalogues['fr'].messages['messages']
+        self.assertEquals(['foo'], list(messages._values))
+
+    def testTransWithLazyDomains(self):
+        loader = CountingDictLoader()
+        translator = Translator('fr', lazy_domains=True)
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loader)
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'foo': 'foo (admin fr)'}, 'fr', 'admin')
+        translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+        translator.add_resource('dict', {'bar': 'bar (admin en)'}, 'en', 'admin')
+
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+        self.assertEquals('bar (en)', translator.trans('bar'))
+        self.assertEquals(['messages', 'messages'], loader.domains)
+
+        self.assertEquals('bar (admin en)', translator.trans('bar', domain='admin'))
+        self.assertEquals(4, len(loader.domains))
+
+        self.assertEquals(
+            {'messages': {'foo': 'foo (fr)', 'bar': 'bar (en)'},
+             'admin': {'foo': 'foo (admin fr)', 'bar': 'bar (admin en)'}},
+            translator.get_messages())
+
+    def testTransWithLazyDomainsMissingResource(self):
+        translator = Translator('en', lazy_domains=True)
+        translator.add_loader('yml', loaders.YamlFileLoader())
+        translator.add_resource('yml', __DIR__ + '/fixtures/non-existing', 'en')
+        translator.add_resource('yml', __DIR__ + '/fixtures/resources.yml', 'en', 'admin')
+
+        self.assertEquals('bar', translator.trans('foo', domain='admin'))
+        self.assertRaises(
+            loaders.NotFoundResourceException,
+            lambda: translator.trans('foo'))
+
+    def testWarmUp(self):
+        for executor in ['thread', 'process']:
+            serial = self.createWarmUpTranslator()
+            translator = self.createWarmUpTranslator()
+            translator.warm_up(['fr_FR', 'en'], workers=2, executor=executor)
+
+            self.assertEquals(['en', 'fr', 'fr_FR'], sorted(translator.catalogues))
+            for locale in ['fr_FR', 'en']:
+                self.assertEquals(
+                    serial.get_messages(locale),
+                    translator.get_messages(locale))
+            self.assertEquals('foo (fr)', translator.trans('foo', locale='fr_FR'))
+            self.assertEquals('bar', translator.trans('foo', domain='po', locale='fr_FR'))
+
+    def testWarmUpReportsLoadedResources(self):
+        serial = self.createWarmUpTranslator()
+        serial.instrumentation = expected = MetricsCollector()
+        serial.get_catalogue('fr_FR')
+
+        translator = self.createWarmUpTranslator()
+        translator.instrumentation = metrics = MetricsCollector()
+        translator.warm_up(['fr_FR'], workers=2, executor='thread')
+
+        self.assertTrue(expected.snapshot()['resources'])
+        self.assertEquals(
+            [(r['locale'], r['domain'], r['count']) for r in expected.snapshot()['resources']],
+            [(r['locale'], r['domain'], r['count']) for r in metrics.snapshot()['resources']])
+
+    def testWarmUpMissingResource(self):
+        translator = Translator('en')
+        translator.add_loader('yml', loaders.YamlFileLoader())
+        translator.add_resource('yml', __DIR__ + '/fixtures/non-existing', 'en')
+
+        self.assertRaises(
+            loaders.NotFoundResourceException,
+            lambda: translator.warm_up(executor='thread'))
+
     def testTransWithoutFallbackLocaleFile(self):
         for format, loader in self.getTransFileTests():
             loader_class = getattr(loaders, loader)
@@ -255,6 +428,22 @@ class TranslatorTest(unittest.TestCase):
                     '',
                     locale))
 
+    def testValidatedLocalesAreRemembered(self):
+        translator = Translator('en')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foofoo'}, 'fr_CA')
+
+        self.assertEquals('foofoo', translator.trans('foo', locale='fr_CA'))
+        self.assertTrue(localeinfo._infos['fr_CA'].valid)
+        self.assertEquals('foofoo', translator.trans('foo', locale='fr_CA'))
+
+        for locale, in self.getInvalidLocalesTests():
+            self.assertRaises(
+                ValueError, lambda: translator.trans('foo', locale=locale))
+            self.assertNotIn(locale, localeinfo._infos)
+            self.assertRaises(
+                ValueError, lambda: translator.trans('foo', locale=locale))
+
     def testTransValidLocale(self):
         for locale, in self.getValidLocalesTests():
             translator = Translator('en')
@@ -291,6 +480,85 @@ class TranslatorTest(unittest.TestCase):
                     domain,
                     locale))
 
+    def testTransMany(self):
+        translator = Translator('fr')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'foo': 'foo {x} (fr)'}, 'fr')
+        translator.add_resource('dict', {'bar': 'bar (en)'}, 'en')
+        translator.add_resource('dict', {'foo': 'foo (admin)'}, 'fr', 'admin')
+        messages = [
+            ('foo', {'x': 1}),
+            ('bar', None),
+            ('bar',),
+            ('missing {x}', {'x': 2}),
+            ('foo', None, 'admin'),
+            ('foo', {'x': 3}, None),
+        ]
+
+        self.assertEquals(
+            [translator.trans(*message) for message in messages],
+            translator.trans_many(messages))
+        self.assertEquals(
+            ['foo (admin)', 'bar'],
+            translator.trans_many([('foo', {}), ('bar', {})], 'admin', 'fr'))
+        self.assertEquals([], translator.trans_many([]))
+        self.assertRaises(
+            ValueError, lambda: translator.trans_many([('foo', {})], locale='fr/FR'))
+
+    def testTransChoiceMany(self):
+        tests = self.gettranschoiceTests()
+        translator = Translator('en')
+        translator.add_loader('dict', loaders.DictLoader())
+        for expected, id, translation, number, parameters, locale, domain in tests:
+            translator.add_resource('dict', {str(id): translation}, locale, domain)
+
+        for expected, id, translation, number, parameters, locale, domain in tests:
+            self.assertEquals(
+                [expected],
+                translator.transchoice_many(
+                    [(id, number, dict(parameters), domain)], locale=locale))
+
+        messages = [(test[1], test[3], None) for test in tests]
+        self.assertEquals(
+            [translator.transchoice(*message, locale='fr') for message in messages],
+            translator.transchoice_many(messages, locale='fr'))
+
+        # positions follow the locale of the catalogue defining the message
+        translator = Translator('fr')
+        translator.set_fallback_locales(['ru'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'fr': 'un|plusieurs'}, 'fr')
+        translator.add_resource('dict', {'ru': 'one|few|many'}, 'ru')
+        messages = [(id, number, None) for number in [0, 1, 2, 5] for id in ['fr', 'ru']]
+        self.assertEquals(
+            [translator.transchoice(*message) for message in messages],
+            translator.transchoice_many(messages))
+        self.assertEquals(
+            ['un', 'many', 'un', 'one', 'plusieurs', 'few', 'plusieurs', 'many'],
+            translator.transchoice_many(messages))
+
+    def testTransChoiceManySharedParameters(self):
+        translator = Translator('en')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'apples': '{count} apple|{count} apples'}, 'en')
+        parameters = {}
+
+        self.assertEquals(
+            ['1 apple', '5 apples'],
+            translator.transchoice_many(
+                [('apples', 1, parameters), ('apples', 5, parameters)]))
+        self.assertEquals(5, parameters['count'])
+
+    def testTransChoiceManyWithoutParameters(self):
+        translator = Translator('en')
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_resource('dict', {'apples': '{count} apple|{count} apples'}, 'en')
+
+        self.assertEquals(
+            ['1 apple', '5 apples'],
+            translator.transchoice_many([('apples', 1), ('apples', 5, None)]))
+
     def testtranschoiceInvalidLocale(self):
         for locale, in self.getInvalidLocalesTests():
             translator = Translator('en')
@@ -316,6 +584,19 @@ class TranslatorTest(unittest.TestCase):
             # no assertion. self method just asserts that no exception is
             # thrown
 
+    def createWarmUpTranslator(self):
+        translator = Translator('fr_FR')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('dict', loaders.DictLoader())
+        translator.add_loader('yml', loaders.YamlFileLoader())
+        translator.add_loader('po', loaders.PoFileLoader())
+        translator.add_resource('yml', __DIR__ + '/fixtures/resources.yml', 'en')
+        translator.add_resource('dict', {'foo': 'foo (en)', 'bar': 'bar (en)'}, 'en')
+        translator.add_resource('po', __DIR__ + '/fixtures/resources.po', 'fr', 'po')
+        translator.add_resource('dict', {'foo': 'foo (fr)'}, 'fr')
+        translator.add_resource('dict', {'baz': 'baz (fr_FR)'}, 'fr_FR')
+        return translator
+
     def getTransFileTests(self):
         return [
             # ['csv', 'CsvFileLoader'],
@@ -627,5 +908,15 @@ class TranslatorTest(unittest.TestCase):
              ],
         ]
 
+
+class CountingDictLoader(loaders.DictLoader):
+
+    def __init__(self):
+        self.domains = []
+
+    def load(self, resource, locale, domain='messages'):
+        self.domains.append(domain)
+        return super(CountingDictLoader, self).load(resource, locale, domain)
+
 if __name__ == '__main__':
     unittest.main()
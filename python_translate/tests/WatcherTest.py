@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from python_translate import loaders
+from python_translate.translations import Translator
+from python_translate.watcher import ResourceWatcher
+
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fr = self.write('fr.json', '{"foo": "foo (fr)"}')
+        self.en = self.write('en.json', '{"bar": "bar (en)"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testPollingWatcher(self):
+        self.assertWatcherReportsChanges(False)
+
+    def testInotifyWatcher(self):
+        self.assertWatcherReportsChanges(True)
+
+    def testTranslatorReload(self):
+        translator = self.createTranslator()
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+        self.assertEquals('bar (en)', translator.trans('bar', locale='en'))
+        tables = dict(translator._lookup_tables)
+
+        self.write('en.json', '{"bar": "changed bar (en)"}')
+        translator.reload(['en'])
+
+        self.assertEquals(set(tables), set(translator._lookup_tables))
+        for key, table in tables.items():
+            self.assertIsNot(table, translator._lookup_tables[key])
+        self.assertEquals('changed bar (en)', translator.trans('bar'))
+        self.assertEquals('changed bar (en)', translator.trans('bar', locale='en'))
+
+    def testTranslatorReloadFailureKeepsCatalogues(self):
+        translator = self.createTranslator()
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+
+        self.write('fr.json', '{"foo": ')
+        self.assertRaises(
+            loaders.InvalidResourceException, lambda: translator.reload(['fr']))
+        self.assertEquals('foo (fr)', translator.trans('foo'))
+
+    def testTranslatorWatch(self):
+        for use_inotify in [False, True]:
+            self.write('fr.json', '{"foo": "foo (fr)"}')
+            translator = self.createTranslator()
+            self.assertEquals('foo (fr)', translator.trans('foo'))
+
+            watcher = translator.watch(interval=0.01, use_inotify=use_inotify)
+            try:
+                self.write('fr.json', '{"foo": "changed %s"}' % watcher.backend)
+                self.assertTrue(self.waitFor(
+                    lambda: translator.trans('foo') == 'changed ' + watcher.backend))
+            finally:
+                translator.unwatch()
+            self.assertIsNone(translator.watcher)
+
+    def assertWatcherReportsChanges(self, use_inotify):
+        changes = []
+        event = threading.Event()
+
+        def callback(paths):
+            changes.append(paths)
+            event.set()
+
+        watcher = ResourceWatcher(callback, [self.fr, self.en], 0.01, use_inotify)
+        if use_inotify and watcher.backend != 'inotify':
+            watcher.stop()
+            self.skipTest('inotify is not available')
+
+        watcher.start()
+        try:
+            time.sleep(0.05)
+            self.write('fr.json', '{"foo": "changed"}')
+            self.assertTrue(event.wait(5))
+        finally:
+            watcher.stop()
+
+        self.assertEquals(set([self.fr]), changes[0])
+
+    def testFailedCallbackIsRetried(self):
+        for use_inotify in [False, True]:
+            calls = []
+
+            def callback(paths):
+                calls.append(paths)
+                if len(calls) == 1:
+                    raise RuntimeError('reload failed')
+
+            watcher = ResourceWatcher(callback, [self.fr, self.en], 0.01, use_inotify)
+            watcher.start()
+            try:
+                time.sleep(0.05)
+                with self.assertLogs('python_translate.watcher', 'ERROR'):
+                    self.write('fr.json', '{"foo": "changed %s"}' % watcher.backend)
+                    self.assertTrue(self.waitFor(lambda: len(calls) >= 2))
+                time.sleep(0.05)
+            finally:
+                watcher.stop()
+
+            self.assertEquals([set([self.fr]), set([self.fr])], calls)
+
+    def createTranslator(self):
+        translator = Translator('fr')
+        translator.set_fallback_locales(['en'])
+        translator.add_loader('json', loaders.JSONFileLoader())
+        translator.add_resource('json', self.fr, 'fr')
+        translator.add_resource('json', self.en, 'en')
+        return translator
+
+    def write(self, filename, contents):
+        path = os.path.join(self.directory, filename)
+        mtime = os.stat(path).st_mtime if os.path.exists(path) else None
+        with open(path, 'w') as f:
+            f.write(contents)
+        if mtime is not None:
+            # make sure polling notices the change even with a coarse mtime
+            os.utime(path, (mtime + 10, mtime + 10))
+        return path
+
+    def waitFor(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+if __name__ == '__main__':
+    unittest.main()
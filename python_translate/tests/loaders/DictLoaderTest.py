@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import sys
+import collections
+import unittest
+
+from python_translate.loaders import DictLoader
+from python_translate.utils import CaseInsensitiveIndex
+
+
+class DictLoaderTest(unittest.TestCase):
+
+    def testLoad(self):
+        loader = DictLoader()
+        catalogue = loader.load({'foo': {'bar': 'foobar'}, 'baz': 'baz'}, 'en', 'domain1')
+
+        self.assertEquals({'foo.bar': 'foobar', 'baz': 'baz'}, catalogue.all('domain1'))
+        self.assertEquals('en', catalogue.locale)
+
+    def testFlatten(self):
+        loader = DictLoader()
+        self.assertEquals({
+            'a.b': 1,
+            'a.c.d': 'e',
+            'a.f': None,
+            'g': ['h'],
+            'i.1': 'j',
+        }, loader.flatten({
+            'a': {'b': 1, 'c': {'d': 'e'}, 'f': None, 'empty': {}},
+            'g': ['h'],
+            'i': {1: 'j'},
+        }))
+        self.assertEquals({'x.a': 1}, loader.flatten({'a': 1}, 'x'))
+        self.assertEquals({}, loader.flatten({}))
+
+    def testFlattenKeepsLastValue(self):
+        loader = DictLoader()
+        messages = collections.OrderedDict([
+            ('a.b', 1), ('a', {'b': 2, 'c': 3}), ('a.c', 4)])
+        self.assertEquals({'a.b': 2, 'a.c': 4}, loader.flatten(messages))
+
+    def testFlattenIntoOutput(self):
+        loader = DictLoader()
+        output = CaseInsensitiveIndex({'Foo': 'foo'})
+        self.assertIs(output, loader.flatten({'Bar': {'Baz': 'baz'}}, output=output))
+        self.assertEquals('baz', output['bar.baz'])
+        self.assertEquals('foo', output['foo'])
+
+    def testFlattenDeepTree(self):
+        loader = DictLoader()
+        messages = node = {}
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = node.setdefault('a', {})
+        node['b'] = 'c'
+
+        flattened = loader.flatten(messages)
+        self.assertEquals(['c'], list(flattened.values()))
+        self.assertEquals(sys.getrecursionlimit() * 2, list(flattened)[0].count('.'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,10 +10,13 @@ For the full copyright and license information, please view the LICENSE and LICE
 files that were distributed with this source code.
 """
 
+import io
 import os
+import json
 import collections
 import unittest
 
+from python_translate import loaders
 from python_translate.loaders import JSONFileLoader, InvalidResourceException, NotFoundResourceException
 
 __DIR__ = os.path.dirname(os.path.abspath(__file__))
@@ -59,5 +62,60 @@ class FileLoaderTest(unittest.TestCase):
                 'en',
                 'domain1'))
 
+    def testLoadNested(self):
+        for streaming in [False, True]:
+            loader = JSONFileLoader()
+            loader.streaming = streaming
+            resource = __DIR__ + '/../fixtures/nested.json'
+            catalogue = loader.load(resource, 'en', 'domain1')
+
+            self.assertEquals({
+                'foo.bar': 'foobar',
+                'foo.baz.qux': 'fooqux',
+                'count': 3,
+                'list': ['a', {'b': 'c'}],
+                'none': None,
+            }, catalogue.all('domain1'))
+            self.assertEquals([resource], catalogue.get_resources())
+
+    def testStreaming(self):
+        loader = JSONFileLoader()
+        loader.streaming = True
+        for test in ['testLoad', 'testLoadDoesNothingIfEmpty',
+                     'testLoadNonExistingResource',
+                     'testLoadThrowsAnExceptionIfNotAnArray']:
+            original = JSONFileLoader.streaming
+            JSONFileLoader.streaming = True
+            try:
+                getattr(self, test)()
+            finally:
+                JSONFileLoader.streaming = original
+
+    def testFlattenStream(self):
+        loader = JSONFileLoader()
+        loader.chunk_size = 3
+        for document in [
+                u'{}',
+                u'{"a": {"b": 1, "c": {"d": true}}, "e": null, "f": {}}',
+                u' {"n": 12345678901234, "x": -1.5e10, "s": "\\u00e9t\\u00e9 \\"q\\""} ',
+                u'{"cl\u00e9": "\u00e9t\u00e9"}',
+                u'{"a.b": 1, "a": {"b": 2}}']:
+            self.assertEquals(
+                loader.flatten(json.loads(document)),
+                loader.flatten_stream(io.BytesIO(document.encode('utf-8'))))
+
+        for document in [
+                b'',
+                b'null',
+                b'[1]',
+                b'{"a": 1,}',
+                b'{"a": 1} x',
+                b'{"a": tru}',
+                b'{"a": {"b": 1}, "a": {"c": 2}}',
+                b'{"a": "\xff"}']:
+            self.assertRaises(
+                loaders._Unsupported,
+                lambda: loader.flatten_stream(io.BytesIO(document)))
+
 if __name__ == '__main__':
     unittest.main()
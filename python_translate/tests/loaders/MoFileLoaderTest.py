@@ -40,6 +40,14 @@ class FileLoaderTest(unittest.TestCase):
         self.assertEquals('en', catalogue.locale)
         self.assertEquals([resource], catalogue.get_resources())
 
+    def testLoadUnknownCharset(self):
+        loader = MoFileLoader()
+        resource = __DIR__ + '/../fixtures/unknown-charset.mo'
+        catalogue = loader.load(resource, 'en', 'domain1')
+
+        self.assertEquals('bar', catalogue.get('foo', 'domain1'))
+        self.assertEquals({'foo': 'bar'}, catalogue.all('domain1'))
+
     def testLoadNonExistingResource(self):
         loader = MoFileLoader()
         resource = __DIR__ + '/../fixtures/non-existing.mo'
@@ -62,6 +70,15 @@ class FileLoaderTest(unittest.TestCase):
             )
         )
 
+    def testLoadWithPolib(self):
+        loader = MoFileLoader()
+        loader.native = False
+        for fixture in ('resources.mo', 'plurals.mo', 'empty-translation.mo'):
+            resource = __DIR__ + '/../fixtures/' + fixture
+            self.assertEquals(
+                MoFileLoader().load(resource, 'en', 'domain1').all(),
+                loader.load(resource, 'en', 'domain1').all())
+
     def testLoadEmptyTranslation(self):
         loader = MoFileLoader()
         resource = __DIR__ + '/../fixtures/empty-translation.mo'
@@ -80,6 +80,34 @@ class FileLoaderTest(unittest.TestCase):
             'escaped "bar"|escaped "bars"',
             messages['escaped "foos"'])
 
+    def testNativeParserMatchesPolib(self):
+        loader = PoFileLoader()
+        native = PoFileLoader()
+        native.native = True
+        for fixture in ('resources.po', 'plurals.po', 'empty.po',
+                        'empty-translation.po', 'escaped-id.po',
+                        'escaped-id-plurals.po', 'unknown-charset.po'):
+            resource = __DIR__ + '/../fixtures/' + fixture
+            self.assertEquals(
+                loader.load(resource, 'en', 'domain1').all(),
+                native.load(resource, 'en', 'domain1').all())
+
+    def testNativeParserUnknownCharset(self):
+        loader = PoFileLoader()
+        loader.native = True
+        resource = __DIR__ + '/../fixtures/unknown-charset.po'
+        catalogue = loader.load(resource, 'en', 'domain1')
+
+        self.assertEquals({'foo': u'b\xe4r'}, catalogue.all('domain1'))
+
+    def testNativeParserInvalidResource(self):
+        loader = PoFileLoader()
+        loader.native = True
+        resource = __DIR__ + '/../fixtures/resources.yml'
+        self.assertRaises(
+            InvalidResourceException,
+            lambda: loader.load(resource, 'en', 'domain1'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,6 +14,9 @@ import os
 import collections
 import unittest
 
+import yaml
+
+from python_translate import loaders
 from python_translate.loaders import YamlFileLoader, InvalidResourceException, NotFoundResourceException
 
 __DIR__ = os.path.dirname(os.path.abspath(__file__))
@@ -30,6 +33,64 @@ class FileLoaderTest(unittest.TestCase):
         self.assertEquals('en', catalogue.locale)
         self.assertEquals([resource], catalogue.get_resources())
 
+    def testLoadNested(self):
+        loader = YamlFileLoader()
+        resource = __DIR__ + '/../fixtures/nested.yml'
+        catalogue = loader.load(resource, 'en', 'domain1')
+
+        self.assertEquals({
+            'foo.bar': 'foobar',
+            'foo.baz.qux': 'fooqux',
+            'count': 3,
+            'empty': None,
+        }, catalogue.all('domain1'))
+
+    def testLoadFallsBackToYamlLoad(self):
+        loader = YamlFileLoader()
+        resource = __DIR__ + '/../fixtures/aliases.yml'
+        catalogue = loader.load(resource, 'en', 'domain1')
+
+        self.assertEquals({
+            'defaults.ok': 'oui',
+            'defaults.close': 'fermer',
+            'buttons.ok': 'oui',
+            'buttons.close': 'fermer',
+            'buttons.cancel': 'annuler',
+            'list': ['a', 'b'],
+        }, catalogue.all('domain1'))
+
+    def testFlattenEvents(self):
+        loader = YamlFileLoader()
+        for document in [
+                'foo: bar',
+                'a: {b: 1, c: {d: true}}\ne: null\nf: {}\n',
+                "a: !!str 3\nb: 0x10\n'': {c: d}\n",
+                'a.b: 1\na: {b: 2}']:
+            self.assertEquals(
+                loader.flatten(yaml.safe_load(document)),
+                loader.flatten_events(document))
+
+        for document in [
+                '',
+                'foo',
+                'a: [1, 2]',
+                'a: {b: 1}\na: {c: 2}',
+                'a: &x {b: 1}\nc: *x',
+                'a: !!set {x, y}',
+                'a: 1\n---\nb: 2']:
+            self.assertRaises(
+                loaders._Unsupported, lambda: loader.flatten_events(document))
+
+    def testLoadWithoutLibyaml(self):
+        yaml_loader = loaders.YAML_LOADER
+        loaders.YAML_LOADER = yaml.SafeLoader
+        try:
+            self.testLoadNested()
+            self.testLoadFallsBackToYamlLoad()
+            self.testLoadThrowsAnExceptionIfNotAnArray()
+        finally:
+            loaders.YAML_LOADER = yaml_loader
+
     def testLoadDoesNothingIfEmpty(self):
         loader = YamlFileLoader()
         resource = __DIR__ + '/../fixtures/empty.yml'
@@ -10,14 +10,25 @@ For the full copyright and license information, please view the LICENSE and LICE
 files that were distributed with this source code.
 """
 
-import re
+import os
+import functools
+import timeit
+import weakref
+import threading
 import collections
-import string
 from datetime import datetime, timedelta
-from python_translate.utils import recursive_update, CaseInsensitiveDict
+from python_translate.utils import recursive_update, CaseInsensitiveDict, CaseInsensitiveIndex, LRUCache
+from python_translate.formatter import compile_message
+from python_translate.cache import CatalogueCache, file_signature
+from python_translate.shared import SharedCatalogues, SharedLookupTable, \
+    write_shared_catalogues
 import python_translate.selector as selector
+import python_translate.localeinfo as localeinfo
+from python_translate.localeinfo import LOCALE_REGEX
 
-LOCALE_REGEX = re.compile('^[a-z0-9@_\\.\\-]*$', re.I)
+# Serializes loading lazy domains; catalogues themselves hold no lock so
+# that they can be pickled
+_lazy_domains_lock = threading.RLock()
 
 # For python 2 compatibility
 try:
@@ -27,23 +38,64 @@ except NameError:
     
 class MessageCatalogue(object):
 
-    def __init__(self, locale, messages=None):
+    """
+    MessageCatalogue
+
+    Message ids are case-insensitive unless the catalogue is created with
+    case_sensitive=True.
+
+    Domains can be registered lazily (see add_lazy_domain): their messages
+    are loaded the first time the domain is queried.
+
+    Merging catalogues shares the messages of domains the target does not
+    have yet; a shared domain is copied before either catalogue changes it
+    through add(). freeze() returns an immutable snapshot.
+
+    Attributes:
+        locale          str
+        messages        dict[str, CaseInsensitiveIndex]  Messages by domain
+        case_sensitive  bool
+    """
+
+    def __init__(self, locale, messages=None, case_sensitive=False):
         self.locale = locale
+        self.case_sensitive = case_sensitive
         self.messages = messages or {}
-        self.messages = {k: CaseInsensitiveDict(v) for k,v in list(self.messages.items())}
+        self.messages = {
+            k: CaseInsensitiveIndex(v, case_sensitive)
+            for k, v in list(self.messages.items())}
         self.resources = {}
         self.metadata = None
         self.parent = None
         self.fallback_catalogue = None
+        self._lazy_domains = {}
+        # messages of lazy domains loaded for frozen snapshots, shared with
+        # them (see _load_domain)
+        self._lazy_results = None
+        self._shared = set()
+        # lookup tables reading the catalogue, created on first use (see
+        # _changed)
+        self._tables = None
         super(MessageCatalogue, self).__init__()
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_tables'] = None
+        return state
+
     def __eq__(self, other):
-        return (isinstance(other, self.__class__)
-                and self.__dict__ == other.__dict__)
+        return (isinstance(other, MessageCatalogue)
+                and self._public_attributes() == other._public_attributes())
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def _public_attributes(self):
+        # parent is a back-reference from the fallback catalogue, comparing
+        # it would compare the catalogues again
+        return {k: v for k, v in self.__dict__.items()
+                if not k.startswith('_') and k != 'parent'}
+
     def get_domains(self):
         """
         Gets the domains.
@@ -51,7 +103,9 @@ class MessageCatalogue(object):
         @rtype: list
         @return: A list of domains
         """
-        return list(self.messages.keys())
+        domains = list(self.messages.keys())
+        domains.extend(d for d in self._lazy_domains if d not in self.messages)
+        return domains
 
     def all(self, domain=None):
         """
@@ -66,9 +120,14 @@ class MessageCatalogue(object):
         @return: A dict of messages
         """
         if domain is None:
-            return {k: dict(v) for k, v in list(self.messages.items())}
+            self._load_lazy_domains()
+            return {k: dict(v.items()) for k, v in list(self.messages.items())}
 
-        return dict(self.messages.get(domain, {}))
+        self._load_domain(domain)
+        if domain not in self.messages:
+            return {}
+
+        return dict(self.messages[domain].items())
 
     def set(self, id, translation, domain='messages'):
         """
@@ -90,13 +149,7 @@ class MessageCatalogue(object):
         assert isinstance(id, (str, unicode))
         assert isinstance(domain, (str, unicode))
 
-        if self.defines(id, domain):
-            return True
-
-        if self.fallback_catalogue is not None:
-            return self.fallback_catalogue.has(id, domain)
-
-        return False
+        return self._has(id, domain)
 
     def defines(self, id, domain='messages'):
         """
@@ -109,7 +162,7 @@ class MessageCatalogue(object):
         assert isinstance(id, (str, unicode))
         assert isinstance(domain, (str, unicode))
 
-        return id in self.messages.get(domain, {})
+        return self._defines(id, domain)
 
     def get(self, id, domain='messages'):
         """
@@ -121,35 +174,42 @@ class MessageCatalogue(object):
         assert isinstance(id, (str, unicode))
         assert isinstance(domain, (str, unicode))
 
-        if self.defines(id, domain):
-            return self.messages[domain][id]
-
-        if self.fallback_catalogue is not None:
-            return self.fallback_catalogue.get(id, domain)
-
-        return id
+        return self._get(id, domain)
 
     def replace(self, messages, domain='messages'):
         """
         Sets translations for a given domain.
         """
-        assert isinstance(messages, (dict, CaseInsensitiveDict))
+        assert isinstance(messages, (dict, CaseInsensitiveDict, CaseInsensitiveIndex))
         assert isinstance(domain, (str, unicode))
 
-        self.messages[domain] = CaseInsensitiveDict({})
+        self._load_domain(domain)
+        self.messages[domain] = CaseInsensitiveIndex(None, self.case_sensitive)
+        self._shared.discard(domain)
         self.add(messages, domain)
 
     def add(self, messages, domain='messages'):
         """
         Adds translations for a given domain.
         """
-        assert isinstance(messages, (dict, CaseInsensitiveDict))
+        assert isinstance(messages, (dict, CaseInsensitiveDict, CaseInsensitiveIndex))
         assert isinstance(domain, (str, unicode))
 
+        if domain in self._lazy_domains:
+            self._load_domain(domain)
+
         if domain not in self.messages:
-            self.messages[domain] = CaseInsensitiveDict(messages)
+            if isinstance(messages, CaseInsensitiveIndex) \
+                    and messages.case_sensitive == self.case_sensitive:
+                self.messages[domain] = messages.copy()
+            else:
+                self.messages[domain] = CaseInsensitiveIndex(messages, self.case_sensitive)
         else:
+            if domain in self._shared:
+                self.messages[domain] = self.messages[domain].copy()
+                self._shared.discard(domain)
             self.messages[domain].update(messages)
+        self._changed()
 
     def add_catalogue(self, catalogue):
         """
@@ -168,8 +228,16 @@ class MessageCatalogue(object):
                 'current locale for this catalogue is "%s"' %
                 (catalogue.locale, self.locale))
 
-        for domain, messages in list(catalogue.all().items()):
-            self.add(messages, domain)
+        catalogue._load_lazy_domains()
+        for domain, messages in list(catalogue.messages.items()):
+            if domain not in self.messages and domain not in self._lazy_domains \
+                    and messages.case_sensitive == self.case_sensitive:
+                self.messages[domain] = messages
+                self._shared.add(domain)
+                catalogue._shared.add(domain)
+                self._changed()
+            else:
+                self.add(messages, domain)
 
         for resource in catalogue.resources:
             self.add_resource(resource)
@@ -202,9 +270,10 @@ class MessageCatalogue(object):
 
         catalogue.parent = self
         self.fallback_catalogue = catalogue
+        self._changed()
 
         for resource in catalogue.resources:
-            self.add_resource(resource)
+            self.resources[unicode(resource)] = resource
 
     def get_resources(self):
         """
@@ -212,6 +281,7 @@ class MessageCatalogue(object):
         @rtype: list
         @return:s: An array of resources
         """
+        self._load_lazy_domains()
         return list(self.resources.values())
 
     def add_resource(self, resource):
@@ -221,25 +291,296 @@ class MessageCatalogue(object):
         """
         self.resources[unicode(resource)] = resource
 
+    def add_lazy_domain(self, domain, loader):
+        """
+        Defers loading messages of a domain until the domain is first
+        queried. Resources of a lazy domain are only recorded once it is
+        loaded.
+
+        @type domain: str
+
+        @type loader: callable
+        @param loader: Called with the catalogue, it is expected to add the
+                       messages of the domain to it
+        """
+        self._lazy_domains.setdefault(domain, []).append(loader)
+
+    def freeze(self):
+        """
+        Returns an immutable snapshot of the catalogue and of its fallback
+        catalogues. The snapshot shares the messages of the catalogue
+        instead of copying them. Lazy domains stay lazy, and are loaded
+        once for the catalogue and its snapshots.
+
+        @rtype: FrozenCatalogue
+        """
+        return FrozenCatalogue(self)
+
+    def _load_domain(self, domain):
+        if domain not in self._lazy_domains:
+            return
+
+        with _lazy_domains_lock:
+            loaders = self._lazy_domains.get(domain)
+            if loaders is None:
+                return
+
+            # messages are loaded aside and published once complete, the
+            # domain stays lazy (and is retried) if a loader fails
+            results = self._lazy_results
+            key = (domain, tuple(loaders))
+            loaded = None if results is None else results.get(key)
+            if loaded is None:
+                loaded = MessageCatalogue(self.locale, case_sensitive=self.case_sensitive)
+                for loader in loaders:
+                    loader(loaded)
+                if results is not None:
+                    results[key] = loaded
+
+            for name, messages in list(loaded.messages.items()):
+                if name in self.messages:
+                    merged = self.messages[name].copy()
+                    merged.update(messages)
+                    messages = merged
+                else:
+                    # may be adopted by a snapshot as well
+                    self._shared.add(name)
+                self.messages[name] = messages
+            for resource in loaded.resources.values():
+                self.resources[unicode(resource)] = resource
+
+            del self._lazy_domains[domain]
+            self._changed()
+
+    # Lookups without argument checks, used internally and by translators
+    # once arguments are known to be strings
+
+    def _has(self, id, domain):
+        catalogue = self
+        while catalogue is not None:
+            if catalogue._defines(id, domain):
+                return True
+            catalogue = catalogue.fallback_catalogue
+        return False
+
+    def _defines(self, id, domain):
+        if domain in self._lazy_domains:
+            self._load_domain(domain)
+
+        messages = self.messages.get(domain)
+        return messages is not None and id in messages
+
+    def _get(self, id, domain):
+        catalogue = self
+        while catalogue is not None:
+            if catalogue._defines(id, domain):
+                return catalogue.messages[domain][id]
+            catalogue = catalogue.fallback_catalogue
+        return id
+
+    def _load_lazy_domains(self):
+        for domain in list(self._lazy_domains):
+            self._load_domain(domain)
+
+    def _changed(self):
+        # tables built from the previous messages or fallback catalogue
+        # are rebuilt by translators on their next lookup
+        tables = self._tables
+        if tables:
+            for table in list(tables.values()):
+                table.stale = True
+            tables.clear()
+
+
+class FrozenCatalogue(MessageCatalogue):
+
+    """
+    An immutable MessageCatalogue, see MessageCatalogue.freeze(). Methods
+    changing messages, resources or the fallback catalogue raise a
+    TypeError. Lazy domains are still loaded when first queried.
+
+    Frozen catalogues are hashable.
+    """
+
+    def __init__(self, catalogue, parent=None):
+        """
+        @type catalogue: MessageCatalogue
+
+        @type parent: FrozenCatalogue|None
+        @param parent: The snapshot having this one as fallback catalogue
+        """
+        super(FrozenCatalogue, self).__init__(
+            catalogue.locale, case_sensitive=catalogue.case_sensitive)
+        self.messages = dict(catalogue.messages)
+        self.resources = dict(catalogue.resources)
+        self.metadata = catalogue.metadata
+        self.parent = parent
+        if catalogue.fallback_catalogue is not None:
+            self.fallback_catalogue = FrozenCatalogue(
+                catalogue.fallback_catalogue, self)
+        self._lazy_domains = dict(
+            (domain, list(loaders))
+            for domain, loaders in catalogue._lazy_domains.items())
+        if self._lazy_domains:
+            with _lazy_domains_lock:
+                if catalogue._lazy_results is None:
+                    catalogue._lazy_results = {}
+                self._lazy_results = catalogue._lazy_results
+        catalogue._shared.update(self.messages)
+
+    def __hash__(self):
+        # only what equal catalogues have in common and does not change
+        # when lazy domains are loaded
+        return hash((self.locale, self.case_sensitive))
+
+    def freeze(self):
+        return self
+
+    def _raise_frozen(self, *args, **kwargs):
+        raise TypeError('Cannot modify a frozen catalogue')
+
+    set = add = replace = add_catalogue = add_resource = add_lazy_domain = \
+        add_fallback_catalogue = _raise_frozen
+
+
+_missing = object()
+
+
+class LookupTable(dict):
+
+    """
+    Read-only view of one domain of a catalogue with its fallback catalogues
+    already merged in. Maps lowercased message ids to (translation, locale)
+    tuples, where locale is the one of the catalogue defining the message.
+    Ids are only kept as they are when every catalogue of the chain is
+    case-sensitive.
+
+    Messages are looked up in the catalogues of the chain on first use and
+    then remembered, so lazily decoded messages (see MoMessages) are only
+    decoded when requested. Missing ids are not remembered: table[id]
+    returns None for them.
+
+    The table is marked stale once a catalogue of the chain changes, and
+    must then be built again.
+
+    Attributes:
+        locales         list[str]  Locales of the catalogues of the fallback
+                                   chain, starting with the requested one
+        last_locale     str   Locale of the last catalogue of the fallback chain
+        case_sensitive  bool
+        stale           bool
+    """
+
+    def __init__(self, catalogue, domain):
+        chain = []
+        while catalogue is not None:
+            chain.append(catalogue)
+            catalogue = catalogue.fallback_catalogue
+
+        super(LookupTable, self).__init__()
+        self.case_sensitive = all(c.case_sensitive for c in chain)
+        self._chain = []
+        for catalogue in chain:
+            catalogue._load_domain(domain)
+            messages = catalogue.messages.get(domain)
+            if messages:
+                if messages.case_sensitive and not self.case_sensitive:
+                    # can not be looked up by lowercased id
+                    messages = dict(
+                        (key.lower(), message)
+                        for key, message in messages.lower_items())
+                self._chain.append((messages, catalogue.locale))
+
+        self.locales = [c.locale for c in chain]
+        self.last_locale = self.locales[-1]
+        self.stale = False
+        for catalogue in chain:
+            if catalogue._tables is None:
+                catalogue._tables = weakref.WeakValueDictionary()
+            catalogue._tables[id(self)] = self
+
+    def __missing__(self, key):
+        for messages, locale in self._chain:
+            message = messages.get(key, _missing)
+            if message is not _missing:
+                found = self[key] = (message, locale)
+                return found
+        return None
+
+
+def _load_resource(loader, resource, locale, domain):
+    # module level so that it can be sent to worker processes, timed there
+    # for Instrumentation.resource_loaded()
+    start = timeit.default_timer()
+    catalogue = loader.load(resource, locale, domain)
+    return catalogue, timeit.default_timer() - start
+
 
 class Translator(object):
 
     """
     Translator
 
+    A translator can be shared between threads. Reads do not lock: loaded
+    catalogues and lookup tables are built aside and then published by
+    replacing the dicts holding them. Loading, and changes to resources,
+    loaders and fallback locales, are serialized by a lock, so a catalogue
+    used for the first time by many threads at once is loaded only once.
+
     Attributes:
         catalogues         list   A list of handled MessageCatalogue
         locale             str    Locale of this Translator
         resources          list[str]
         loaders            list[Loader]
         fallback_locales   list[str]
+        templates          LRUCache  Compiled messages, indexed by message
+        case_sensitive     bool   Whether loaded catalogues are case-sensitive
+        cache              CatalogueCache|None
+        lazy_domains       bool   Whether resources of a domain are only
+                                  loaded when the domain is first queried
+        shared             SharedCatalogues|None  Catalogues attached with
+                                  attach_shared()
+        watcher            ResourceWatcher|None  Started by watch()
+        instrumentation    Instrumentation|None  Receives lookups, load
+                                  and formatting times (see
+                                  python_translate.instrumentation,
+                                  CompositeInstrumentation to set several)
     """
 
-    def __init__(self, locale):
+    template_cache_size = 4096
+    case_sensitive = False
+
+    def __init__(self, locale, cache_dir=None, lazy_domains=False):
+        """
+        @type locale: str
+        @param locale: The default locale
+
+        @type cache_dir: str|None
+        @param cache_dir: Directory where loaded catalogues are compiled to,
+                          to be reused by other processes. A catalogue is
+                          rebuilt as soon as its resources, or the mtime or
+                          size of its resource files, change.
+
+        @type lazy_domains: bool
+        @param lazy_domains: Defer loading the resources of each domain until
+                             the domain is first queried. Catalogues that are
+                             not found in the cache are loaded at once, as
+                             they need all their domains to be cached.
+        """
         self.catalogues = {}
         self.resources = collections.defaultdict(lambda: [])
         self.loaders = {}
         self.fallback_locales = []
+        self._fallback_chains = {}
+        self.templates = LRUCache(self.template_cache_size)
+        self.cache = CatalogueCache(cache_dir) if cache_dir is not None else None
+        self.lazy_domains = lazy_domains
+        self._preloaded = {}
+        self._lookup_tables = {}
+        self._lock = threading.RLock()
+        self.shared = None
+        self.watcher = None
+        self.instrumentation = None
         self.locale = locale
         super(Translator, self).__init__()
 
@@ -289,12 +630,27 @@ class Translator(object):
         if locale is None:
             locale = self.locale
         else:
-            self._assert_valid_locale(locale)
+            if not localeinfo.get_locale_info(locale).valid:
+                self._assert_valid_locale(locale)
 
         if domain is None:
             domain = 'messages'
 
-        msg = self.get_catalogue(locale).get(id, domain)
+        table = self._lookup_tables.get((locale, domain))
+        if table is None or table.stale:
+            table = self._get_lookup_table(locale, domain)
+
+        found = table[id if table.case_sensitive else id.lower()]
+        msg = id if found is None else found[0]
+
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.sample():
+            self._record_lookup(instrumentation, table, locale, domain, id, found)
+            start = timeit.default_timer()
+            msg = self.format(msg, parameters)
+            instrumentation.formatted(timeit.default_timer() - start)
+            return msg
+
         return self.format(msg, parameters)
 
     def transchoice(self, id, number, parameters=None, domain=None, locale=None):
@@ -329,39 +685,239 @@ class Translator(object):
         if locale is None:
             locale = self.locale
         else:
-            self._assert_valid_locale(locale)
+            if not localeinfo.get_locale_info(locale).valid:
+                self._assert_valid_locale(locale)
 
         if domain is None:
             domain = 'messages'
 
-        catalogue = self.get_catalogue(locale)
-        while not catalogue.defines(id, domain):
-            cat = catalogue.fallback_catalogue
-            if cat:
-                catalogue = cat
-                locale = catalogue.locale
-            else:
-                break
+        table = self._lookup_tables.get((locale, domain))
+        if table is None or table.stale:
+            table = self._get_lookup_table(locale, domain)
+
+        found = table[id if table.case_sensitive else id.lower()]
+
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.sample():
+            self._record_lookup(instrumentation, table, locale, domain, id, found)
+            start = timeit.default_timer()
+        else:
+            instrumentation = None
+
+        if found is None:
+            msg, locale = id, table.last_locale
+        else:
+            msg, locale = found
 
         parameters['count'] = number
-        msg = selector.select_message(
-            catalogue.get(
-                id,
-                domain
-            ),
-            number,
-            locale)
-        return self.format(msg, parameters)
+        msg = selector.select_message(msg, number, locale)
+        msg = self.format(msg, parameters)
+
+        if instrumentation is not None:
+            instrumentation.formatted(timeit.default_timer() - start)
+        return msg
+
+    def trans_many(self, messages, domain=None, locale=None):
+        """
+        Translates many messages at once, returning what trans() would
+        return for each of them. The locale is validated and catalogues are
+        resolved once for the whole batch.
+
+        @type messages: iterable
+        @param messages: (id,), (id, parameters) or (id, parameters, domain)
+                         tuples, parameters and domain may be None
+
+        @type domain: str
+        @param domain: The default domain for the messages
+
+        @type locale: str
+        @param locale: The locale or null to use the default
+
+        @rtype: list[str]
+        @return: Translated messages
+        """
+        if locale is None:
+            locale = self.locale
+        else:
+            self._assert_valid_locale(locale)
+
+        if domain is None:
+            domain = 'messages'
+
+        instrumentation = self.instrumentation
+        templates = {}
+        tables = {}
+        translated = []
+        for message in messages:
+            id = message[0]
+            parameters = message[1] if len(message) > 1 else None
+            if parameters is None:
+                parameters = {}
+            assert isinstance(parameters, dict)
+
+            message_domain = message[2] if len(message) > 2 else None
+            if message_domain is None:
+                message_domain = domain
+
+            table = tables.get(message_domain)
+            if table is None:
+                table = self._lookup_tables.get((locale, message_domain))
+                if table is None or table.stale:
+                    table = self._get_lookup_table(locale, message_domain)
+                tables[message_domain] = table
+
+            found = table[id if table.case_sensitive else id.lower()]
+            sampled = instrumentation is not None and instrumentation.sample()
+            if sampled:
+                self._record_lookup(
+                    instrumentation, table, locale, message_domain, id, found)
+                start = timeit.default_timer()
+
+            msg = id if found is None else found[0]
+            template = templates.get(msg)
+            if template is None:
+                template = templates[msg] = self._get_template(msg)
+            translated.append(template.format(parameters))
+
+            if sampled:
+                instrumentation.formatted(timeit.default_timer() - start)
+
+        return translated
+
+    def transchoice_many(self, messages, domain=None, locale=None):
+        """
+        Translates many choice messages at once, returning what
+        transchoice() would return for each of them. Plural positions are
+        computed in bulk for each locale (see PluralizationRules.get_many).
+
+        @type messages: iterable
+        @param messages: (id, number), (id, number, parameters) or
+                         (id, number, parameters, domain) tuples, parameters
+                         and domain may be None
+
+        @type domain: str
+        @param domain: The default domain for the messages
+
+        @type locale: str
+        @param locale: The locale or null to use the default
+
+        @raises: ValueError
+
+        @rtype: list[str]
+        @return: Translated messages
+        """
+        if locale is None:
+            locale = self.locale
+        else:
+            self._assert_valid_locale(locale)
+
+        if domain is None:
+            domain = 'messages'
+
+        instrumentation = self.instrumentation
+        tables = {}
+        choices = {}
+        entries = []
+        numbers = collections.defaultdict(list)
+        for message in messages:
+            id, number = message[0], message[1]
+            parameters = message[2] if len(message) > 2 else None
+            if parameters is None:
+                parameters = {}
+            assert isinstance(parameters, dict)
+
+            message_domain = message[3] if len(message) > 3 else None
+            if message_domain is None:
+                message_domain = domain
+
+            table = tables.get(message_domain)
+            if table is None:
+                table = self._lookup_tables.get((locale, message_domain))
+                if table is None or table.stale:
+                    table = self._get_lookup_table(locale, message_domain)
+                tables[message_domain] = table
+
+            found = table[id if table.case_sensitive else id.lower()]
+            if found is None:
+                msg, msg_locale = id, table.last_locale
+            else:
+                msg, msg_locale = found
+
+            choice = choices.get(msg)
+            if choice is None:
+                choice = choices[msg] = selector.compile_choice(msg)
+            # plural positions are only computed for the numbers no
+            # explicit rule matches
+            selected = choice.select_explicit(number)
+            if selected is None:
+                numbers[msg_locale].append(number)
+            entries.append((
+                selected, choice, msg_locale, number, parameters,
+                table, message_domain, id, found))
+
+        # plural positions are computed in bulk for each locale
+        positions = dict(
+            (msg_locale, iter(selector.PluralizationRules.get_many(values, msg_locale)))
+            for msg_locale, values in numbers.items())
+
+        templates = {}
+        translated = []
+        for msg, choice, msg_locale, number, parameters, table, message_domain, \
+                id, found in entries:
+            # lookups are reported once positions are known, so that each
+            # sampled call is followed by its own formatting time
+            sampled = instrumentation is not None and instrumentation.sample()
+            if sampled:
+                self._record_lookup(
+                    instrumentation, table, locale, message_domain, id, found)
+                start = timeit.default_timer()
+
+            if msg is None:
+                msg = choice.select_standard(
+                    number, msg_locale, next(positions[msg_locale]))
+            template = templates.get(msg)
+            if template is None:
+                template = templates[msg] = self._get_template(msg)
+            # set right before formatting, entries may share parameters
+            parameters['count'] = number
+            translated.append(template.format(parameters))
+
+            if sampled:
+                instrumentation.formatted(timeit.default_timer() - start)
+
+        return translated
 
     def format(self, msg, parameters):
-        return string.Formatter().vformat(
-            msg,
-            (),
-            collections.defaultdict(
-                str,
-                **parameters
-            )
-        )
+        """
+        Replaces placeholders in the message with given parameters. Messages
+        are compiled on first use and the compiled templates are kept in
+        an LRU cache.
+
+        @type msg: str
+        @param msg: The message
+
+        @type parameters: dict
+        @param parameters: A dict of parameters for the message
+
+        @rtype: str
+        @return: Formatted message
+        """
+        return self._get_template(msg).format(parameters)
+
+    def _get_template(self, msg):
+        template = self.templates.get(msg)
+        if template is None:
+            template = compile_message(msg)
+            self.templates.set(msg, template)
+
+        return template
+
+    def _record_lookup(self, instrumentation, table, locale, domain, id, found):
+        if found is None:
+            instrumentation.lookup(locale, domain, id, None, 0)
+        else:
+            instrumentation.lookup(
+                locale, domain, id, found[1], table.locales.index(found[1]))
 
     def set_fallback_locales(self, locales):
         """
@@ -372,17 +928,21 @@ class Translator(object):
 
         @raises: ValueError: If a locale contains invalid characters
         """
-        # needed as the fallback locales are linked to the already loaded
-        # catalogues
-        self.catalogues = {}
-
         for locale in locales:
             self._assert_valid_locale(locale)
 
-        self.fallback_locales = locales
+        with self._lock:
+            self.fallback_locales = locales
+            self._fallback_chains = {}
+            # needed as the fallback locales are linked to the already
+            # loaded catalogues
+            self.shared = None
+            self.catalogues = {}
+            self._lookup_tables = {}
 
     def add_loader(self, format, loader):
-        self.loaders[format] = loader
+        with self._lock:
+            self.loaders[format] = loader
 
     def add_resource(self, format, resource, locale, domain=None):
         """
@@ -403,11 +963,18 @@ class Translator(object):
             domain = 'messages'
 
         self._assert_valid_locale(locale)
-        self.resources[locale].append([format, resource, domain])
-        if locale in self.fallback_locales:
-            self.catalogues = {}
-        else:
-            self.catalogues.pop(locale, None)
+        with self._lock:
+            self.resources[locale].append([format, resource, domain])
+            self.shared = None
+            if self.watcher is not None:
+                self.watcher.set_paths(self._get_resource_files())
+            if locale in self.fallback_locales:
+                self.catalogues = {}
+            else:
+                catalogues = dict(self.catalogues)
+                catalogues.pop(locale, None)
+                self.catalogues = catalogues
+            self._lookup_tables = {}
 
     def get_catalogue(self, locale=None):
         """
@@ -417,10 +984,33 @@ class Translator(object):
         if locale is None:
             locale = self.locale
 
-        if locale not in self.catalogues:
-            self._load_catalogue(locale)
+        shared = self.shared
+        if shared is not None and locale in shared.locales:
+            return shared.get_catalogue(locale)
+
+        catalogue = self.catalogues.get(locale)
+        if catalogue is None:
+            with self._lock:
+                catalogue = self.catalogues.get(locale)
+                if catalogue is None:
+                    catalogue = self._load_catalogue(locale)
 
-        return self.catalogues[locale]
+        return catalogue
+
+    def get_frozen_catalogue(self, locale=None):
+        """
+        Returns an immutable snapshot of the catalogue of a locale and of its
+        fallback catalogues, see MessageCatalogue.freeze(). Catalogues of
+        attached SharedCatalogues are read-only already and are returned as
+        they are.
+
+        @type locale: str
+        @rtype: FrozenCatalogue
+        """
+        catalogue = self.get_catalogue(locale)
+        if isinstance(catalogue, MessageCatalogue):
+            catalogue = catalogue.freeze()
+        return catalogue
 
     def get_messages(self, locale=None):
         """
@@ -432,13 +1022,7 @@ class Translator(object):
         @rtype: dict:
         @return: dict indexed by catalog name
         """
-        if locale is None:
-            locale = self.locale
-
-        if locale not in self.catalogues:
-            self._load_catalogue(locale)
-
-        catalogues = [self.catalogues[locale]]
+        catalogues = [self.get_catalogue(locale)]
         catalogue = catalogues[0]
         while True:
             catalogue = catalogue.fallback_catalogue
@@ -452,63 +1036,408 @@ class Translator(object):
 
         return messages
 
-    def _load_catalogue(self, locale):
-        # @TODO: Caching
-        self._initialize_catalogue(locale)
+    def warm_up(self, locales=None, workers=None, executor='process'):
+        """
+        Loads the catalogues of the given locales and of their fallback
+        locales, running the resource loaders in parallel. Loaded resources
+        are merged in registration order, so catalogues end up the same as
+        when they are loaded one by one. Catalogues that are already loaded
+        or cached are skipped, lazy domains are loaded at once.
+
+        With the process executor, loaders and resources must be picklable.
+        Resources loaded by workers are reported to the instrumentation with
+        the time they took in the worker.
+
+        Loaded catalogues are pickled back from worker processes, so this is
+        not necessarily faster than loading serially; benchmarks/warm_up.py
+        compares both.
+
+        @type locales: list[str]|None
+        @param locales: Locales to load, all locales with resources by default
+
+        @type workers: int|None
+        @param workers: Number of workers, the executor default if None
+
+        @type executor: str|concurrent.futures.Executor
+        @param executor: "process" for CPU-bound loaders, "thread" for I/O
+                         bound ones, or an executor to submit loads to
+
+        @raises: ValueError If a locale contains invalid characters
+        """
+        from concurrent import futures
+
+        if locales is None:
+            locales = list(self.resources.keys())
+        for locale in locales:
+            self._assert_valid_locale(locale)
+
+        with self._lock:
+            pending = []
+            for locale in locales:
+                for loc in [locale] + self._compute_fallback_locales(locale):
+                    if loc not in self.catalogues and loc not in pending \
+                            and not self._is_cached(loc):
+                        pending.append(loc)
+
+            tasks = [(loc, resource)
+                     for loc in pending
+                     for resource in self.resources.get(loc, [])
+                     if resource[0] in self.loaders]
+
+            pool = None
+            if tasks:
+                if isinstance(executor, futures.Executor):
+                    pool = executor
+                elif executor == 'process':
+                    pool = futures.ProcessPoolExecutor(workers)
+                elif executor == 'thread':
+                    pool = futures.ThreadPoolExecutor(workers or len(tasks))
+                else:
+                    raise ValueError("Invalid executor '%s'" % executor)
+
+            try:
+                self._preloaded = {
+                    id(resource): pool.submit(
+                        _load_resource,
+                        self.loaders[resource[0]],
+                        resource[1],
+                        loc,
+                        resource[2]
+                    )
+                    for loc, resource in tasks
+                }
+                for locale in locales:
+                    self.get_catalogue(locale)
+            finally:
+                self._preloaded = {}
+                if pool is not None and pool is not executor:
+                    pool.shutdown()
+
+    def dump_shared(self, path, locales=None):
+        """
+        Compiles the catalogues of the given locales, with their fallback
+        catalogues, into a single file that processes can attach to with
+        attach_shared(), e.g. workers forked by a pre-fork server.
+
+        @type path: str
+
+        @type locales: list[str]|None
+        @param locales: Locales to compile, all locales with resources by
+                        default
+
+        @raises: ValueError If a message is not a string
+        """
+        with self._lock:
+            if locales is None:
+                locales = list(self.resources.keys())
+            write_shared_catalogues(
+                path, [self.get_catalogue(locale) for locale in locales])
+
+    def attach_shared(self, path):
+        """
+        Serves the locales compiled in a file written by dump_shared()
+        from that file. The file is memory-mapped, so processes attached to
+        the same file share its memory, and messages are decoded when they
+        are read. Other locales are loaded from resources as usual.
+
+        Adding resources or changing fallback locales detaches the file, as
+        it no longer matches the translator configuration.
 
-    def _initialize_catalogue(self, locale):
+        @type path: str
+        @raises: ValueError If the file is not valid
+        """
+        shared = SharedCatalogues(path)
+        with self._lock:
+            self.shared = shared
+            self._lookup_tables = {}
+
+    def reload(self, locales):
+        """
+        Loads the catalogues of the given locales again, with the loaded
+        catalogues falling back to them, and swaps them in at once. Lookup
+        tables in use are rebuilt before the swap, so that translating does
+        not pay for the reload. If loading fails, the current catalogues
+        are kept.
+
+        @type locales: iterable[str]
+        """
+        locales = set(locales)
+        with self._lock:
+            affected = set()
+            for locale, catalogue in self.catalogues.items():
+                while catalogue is not None:
+                    if catalogue.locale in locales:
+                        affected.add(locale)
+                        break
+                    catalogue = catalogue.fallback_catalogue
+            if not affected:
+                return
+
+            catalogues = dict(
+                (locale, catalogue)
+                for locale, catalogue in self.catalogues.items()
+                if locale not in affected)
+            for locale in sorted(affected):
+                if locale not in catalogues:
+                    self._initialize_catalogue(locale, catalogues)
+
+            tables = {}
+            for (locale, domain), table in self._lookup_tables.items():
+                if locale in affected:
+                    table = LookupTable(catalogues[locale], domain)
+                tables[(locale, domain)] = table
+
+            self.catalogues = catalogues
+            self._lookup_tables = tables
+
+    def watch(self, interval=1.0, use_inotify=True):
+        """
+        Starts a background thread reloading catalogues whenever one of
+        their resource files changes, see reload(). Files are watched with
+        inotify where available and polled with stat otherwise. Catalogues
+        attached with attach_shared() are not reloaded.
+
+        @type interval: float
+        @param interval: Seconds between polls when inotify is not used
+
+        @type use_inotify: bool
+
+        @rtype: ResourceWatcher
+        @return: The started watcher, stop it with unwatch()
+        """
+        from python_translate.watcher import ResourceWatcher
+
+        # not holding the lock, a running reload may be waiting for it
+        self.unwatch()
+        with self._lock:
+            watcher = ResourceWatcher(
+                self._on_resources_changed,
+                self._get_resource_files(),
+                interval,
+                use_inotify)
+            self.watcher = watcher
+        watcher.start()
+
+        return watcher
+
+    def unwatch(self):
+        """
+        Stops the thread started by watch().
+        """
+        watcher, self.watcher = self.watcher, None
+        if watcher is not None:
+            watcher.stop()
+
+    def _get_resource_files(self):
+        return set(
+            os.path.abspath(resource[1])
+            for resources in list(self.resources.values())
+            for resource in resources
+            if isinstance(resource[1], (str, unicode)))
+
+    def _on_resources_changed(self, paths):
+        self.reload(
+            locale
+            for locale, resources in list(self.resources.items())
+            for resource in resources
+            if isinstance(resource[1], (str, unicode))
+            and os.path.abspath(resource[1]) in paths)
+
+    def _is_cached(self, locale):
+        if self.cache is None:
+            return False
+        return self.cache.has(
+            locale, self.cache.get_key(locale, self._get_cache_key_parts(locale)))
+
+    def _get_lookup_table(self, locale, domain):
+        """
+        Returns the LookupTable of a domain, building it from the loaded
+        catalogues if needed. Tables are dropped whenever resources, fallback
+        locales or loaded catalogues change, and built again once a
+        catalogue returned by get_catalogue() is changed.
+
+        @rtype: LookupTable
+        """
+        with self._lock:
+            table = self._lookup_tables.get((locale, domain))
+            if table is None or table.stale:
+                shared = self.shared
+                if shared is not None and locale in shared.locales:
+                    table = SharedLookupTable(shared, locale, domain)
+                else:
+                    table = LookupTable(self.get_catalogue(locale), domain)
+                self._lookup_tables[(locale, domain)] = table
+
+        return table
+
+    def _load_catalogue(self, locale, discard=()):
+        """
+        Loads the catalogue of a locale with its fallback catalogues and
+        publishes them.
+
+        @type discard: iterable[str]
+        @param discard: Locales to load again even if they are loaded
+
+        @rtype: MessageCatalogue
+        """
+        with self._lock:
+            catalogues = dict(self.catalogues)
+            for discarded in discard:
+                catalogues.pop(discarded, None)
+            self._initialize_catalogue(locale, catalogues)
+            self.catalogues = catalogues
+            self._lookup_tables = {}
+
+        return catalogues[locale]
+
+    def _initialize_catalogue(self, locale, catalogues):
         from python_translate.loaders import NotFoundResourceException
 
         self._assert_valid_locale(locale)
 
         try:
-            self._do_load_catalogue(locale)
+            self._do_load_catalogue(locale, catalogues)
         except NotFoundResourceException as e:
             if not self._compute_fallback_locales(locale):
                 raise e
-        self._load_fallback_catalogues(locale)
+        self._load_fallback_catalogues(locale, catalogues)
+
+    def _do_load_catalogue(self, locale, catalogues):
+        instrumentation = self.instrumentation
+        start = timeit.default_timer()
+        catalogue = MessageCatalogue(
+            locale, case_sensitive=self.case_sensitive)
+        catalogues[locale] = catalogue
+        self._load_catalogue_resources(locale, catalogue)
+
+        if instrumentation is not None:
+            instrumentation.catalogue_loaded(
+                locale, timeit.default_timer() - start)
+
+    def _load_catalogue_resources(self, locale, catalogue):
+        key = None
+        if self.cache is not None:
+            key = self.cache.get_key(locale, self._get_cache_key_parts(locale))
+            if self.cache.load(locale, key, catalogue):
+                return
+
+        if self.lazy_domains and key is None and not self._preloaded:
+            domains = collections.OrderedDict()
+            for resource in self.resources.get(locale, []):
+                domains.setdefault(resource[2], []).append(resource)
+            for domain, resources in domains.items():
+                catalogue.add_lazy_domain(domain, functools.partial(
+                    self._load_domain_resources, locale, resources))
+            return
 
-    def _do_load_catalogue(self, locale):
-        self.catalogues[locale] = MessageCatalogue(locale)
         if locale in self.resources:
-            for resource in self.resources[locale]:
-                if resource[0] not in self.loaders:
-                    raise RuntimeError(
-                        'The "{0}" translation loader is not '
-                        'registered'.format(resource[0])
-                    )
-                self.catalogues[locale].add_catalogue(
-                    self.loaders[resource[0]].load(
-                        resource[1],
-                        locale,
-                        resource[2]
-                    )
-                )
+            self._load_resources(locale, self.resources[locale], catalogue)
+
+        if key is not None:
+            self.cache.dump(catalogue, key)
+
+    def _load_resources(self, locale, resources, catalogue):
+        for resource in resources:
+            catalogue.add_catalogue(self._load_resource(locale, resource))
+
+    def _load_resource(self, locale, resource):
+        """
+        Loads one registered resource.
+
+        @type resource: list
+        @param resource: [format, resource, domain]
+
+        @rtype: MessageCatalogue
+        """
+        if resource[0] not in self.loaders:
+            raise RuntimeError(
+                'The "{0}" translation loader is not '
+                'registered'.format(resource[0])
+            )
+        future = self._preloaded.get(id(resource))
+        if future is not None:
+            catalogue, seconds = future.result()
+        else:
+            catalogue, seconds = _load_resource(
+                self.loaders[resource[0]], resource[1], locale, resource[2])
+
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.resource_loaded(
+                locale, resource[0], resource[1], resource[2], seconds)
+        return catalogue
+
+    def _load_domain_resources(self, locale, resources, catalogue):
+        """
+        Loads the resources of a lazy domain into its catalogue. As when
+        loading a whole catalogue, missing resources are ignored if the
+        locale has fallback locales.
+        """
+        from python_translate.loaders import NotFoundResourceException
 
-    def _load_fallback_catalogues(self, locale):
-        current = self.catalogues[locale]
+        try:
+            self._load_resources(locale, resources, catalogue)
+        except NotFoundResourceException as e:
+            if not self._compute_fallback_locales(locale):
+                raise e
+
+    def _get_cache_key_parts(self, locale):
+        """
+        Returns what a cached catalogue of the locale depends on: the
+        registered resources, their loaders and the signature of resource
+        files.
+
+        @rtype: list
+        """
+        parts = [self.case_sensitive]
+        for format, resource, domain in self.resources.get(locale, []):
+            loader = self.loaders.get(format)
+            parts.append((
+                format,
+                None if loader is None else '{0}.{1}'.format(
+                    loader.__class__.__module__, loader.__class__.__name__),
+                resource,
+                domain,
+                file_signature(resource),
+            ))
+        return parts
+
+    def _load_fallback_catalogues(self, locale, catalogues):
+        current = catalogues[locale]
         for fallback in self._compute_fallback_locales(locale):
-            if fallback not in self.catalogues:
-                self._do_load_catalogue(fallback)
+            if fallback not in catalogues:
+                self._do_load_catalogue(fallback, catalogues)
 
-            current.add_fallback_catalogue(self.catalogues[fallback])
-            current = self.catalogues[fallback]
+            current.add_fallback_catalogue(catalogues[fallback])
+            current = catalogues[fallback]
 
     def _compute_fallback_locales(self, locale):
+        """
+        Returns the fallback chain of a locale, computed once until the
+        fallback locales change. The list must not be modified.
+
+        @rtype: list[str]
+        """
+        chain = self._fallback_chains.get(locale)
+        if chain is not None:
+            return chain
+
         locales = [loc for loc in self.fallback_locales if loc != locale]
         if "_" in locale:
-            locales.insert(0, locale.split("_")[0])
+            locales.insert(0, localeinfo.get_locale_info(locale).language)
         seen = set()
 
         # dedupe
-        return [
+        chain = [
             loc for loc in locales if loc not in seen and not seen.add(loc)]
+        self._fallback_chains[locale] = chain
+        return chain
 
     def _assert_valid_locale(self, locale):
         """
             Asserts that the locale is valid, throws a ValueError if not.
         """
-        if locale is not None and not LOCALE_REGEX.match(locale):
+        if locale is not None and not localeinfo.get_locale_info(locale).valid:
             raise ValueError("Invalid locale '%s'" % locale)
 
 
@@ -519,10 +1448,17 @@ class DebugTranslator(Translator):
 
     * Reloads translations on the fly - never restart dev server again
     * Raises a RuntimeError if a translation could not be loaded
+
+    At most once per second, the mtime and size of the resource files of a
+    catalogue are checked. Only changed files are loaded again; the other
+    resources are merged from what was loaded before. Resources that are
+    not files (e.g. dicts) are loaded once.
     """
 
     def __init__(self, locale):
         self.last_reload = datetime.now()
+        self._loaded_resources = {}
+        self._signatures = {}
         super(DebugTranslator, self).__init__(locale)
 
     def trans(self, id, parameters=None, domain=None, locale=None):
@@ -540,17 +1476,13 @@ class DebugTranslator(Translator):
         if domain is None:
             domain = 'messages'
 
-        catalogue = self.get_catalogue(locale)
-        if not catalogue.has(id, domain):
-            raise RuntimeError(
-                "There is no translation for {0} in domain {1}".format(
-                    id,
-                    domain
-                )
-            )
+        catalogue, instrumentation, start = self._find_catalogue(
+            self.get_catalogue(locale), id, domain)
 
-        msg = self.get_catalogue(locale).get(id, domain)
-        return self.format(msg, parameters)
+        msg = self.format(catalogue.get(id, domain), parameters)
+        if instrumentation is not None:
+            instrumentation.formatted(timeit.default_timer() - start)
+        return msg
 
     def transchoice(self, id, number, parameters=None, domain=None, locale=None):
         """
@@ -568,22 +1500,8 @@ class DebugTranslator(Translator):
         if domain is None:
             domain = 'messages'
 
-        catalogue = self.get_catalogue(locale)
-        while not catalogue.defines(id, domain):
-            cat = catalogue.fallback_catalogue
-            if cat:
-                catalogue = cat
-                locale = catalogue.locale
-            else:
-                break
-
-        if not catalogue.has(id, domain):
-            raise RuntimeError(
-                "There is no translation for {0} in domain {1}".format(
-                    id,
-                    domain
-                )
-            )
+        catalogue, instrumentation, start = self._find_catalogue(
+            self.get_catalogue(locale), id, domain)
 
         parameters['count'] = number
         msg = selector.select_message(
@@ -592,9 +1510,72 @@ class DebugTranslator(Translator):
                 domain
             ),
             number,
-            locale
+            catalogue.locale
         )
-        return self.format(msg, parameters)
+        msg = self.format(msg, parameters)
+        if instrumentation is not None:
+            instrumentation.formatted(timeit.default_timer() - start)
+        return msg
+
+    def _find_catalogue(self, catalogue, id, domain):
+        """
+        Finds the catalogue defining a message in a fallback chain and
+        reports the lookup to the instrumentation.
+
+        @rtype: (MessageCatalogue, Instrumentation|None, float|None)
+        @return: The catalogue, and the instrumentation and start time to
+                 report the formatting with, if the call is sampled
+        @raises: RuntimeError If no catalogue defines the message
+        """
+        requested = catalogue.locale
+        hops = 0
+        while catalogue is not None and not catalogue.defines(id, domain):
+            catalogue = catalogue.fallback_catalogue
+            hops += 1
+
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.sample():
+            if catalogue is None:
+                instrumentation.lookup(requested, domain, id, None, 0)
+            else:
+                instrumentation.lookup(
+                    requested, domain, id, catalogue.locale, hops)
+        else:
+            instrumentation = None
+
+        if catalogue is None:
+            raise RuntimeError(
+                "There is no translation for {0} in domain {1}".format(
+                    id,
+                    domain
+                )
+            )
+
+        return catalogue, instrumentation, timeit.default_timer()
+
+    def trans_many(self, messages, domain=None, locale=None):
+        """
+        Translates messages one by one, raising a RuntimeError whenever a
+        message is missing
+        """
+        return [
+            self.trans(message[0],
+                       message[1] if len(message) > 1 else None,
+                       (message[2] if len(message) > 2 else None) or domain,
+                       locale)
+            for message in messages]
+
+    def transchoice_many(self, messages, domain=None, locale=None):
+        """
+        Translates choice messages one by one, raising a RuntimeError
+        whenever a message is missing
+        """
+        return [
+            self.transchoice(message[0], message[1],
+                             message[2] if len(message) > 2 else None,
+                             (message[3] if len(message) > 3 else None) or domain,
+                             locale)
+            for message in messages]
 
     def get_catalogue(self, locale):
         """
@@ -604,8 +1585,50 @@ class DebugTranslator(Translator):
         if locale is None:
             locale = self.locale
 
-        if locale not in self.catalogues or datetime.now() - self.last_reload > timedelta(seconds=1):
-            self._load_catalogue(locale)
+        catalogue = self.catalogues.get(locale)
+        if catalogue is None:
+            return self._load_catalogue(locale)
+
+        if datetime.now() - self.last_reload > timedelta(seconds=1):
             self.last_reload = datetime.now()
+            if self._is_stale(catalogue):
+                catalogue = self._load_catalogue(
+                    locale, [locale] + self._compute_fallback_locales(locale))
+
+        return catalogue
 
-        return self.catalogues[locale]
+    def _is_stale(self, catalogue):
+        """
+        Checks if a resource of a catalogue, or of its fallback catalogues,
+        changed since it was loaded.
+        """
+        while catalogue is not None:
+            loaded, signatures = self._signatures.get(catalogue.locale, (None, ()))
+            if loaded is not catalogue:
+                return True
+            for resource, signature in signatures:
+                if file_signature(resource[1]) != signature:
+                    return True
+            catalogue = catalogue.fallback_catalogue
+        return False
+
+    def _do_load_catalogue(self, locale, catalogues):
+        try:
+            super(DebugTranslator, self)._do_load_catalogue(locale, catalogues)
+        finally:
+            signatures = []
+            for resource in self.resources.get(locale, []):
+                loaded = self._loaded_resources.get(id(resource))
+                signatures.append((
+                    resource, None if loaded is None else loaded[1]))
+            self._signatures[locale] = (catalogues[locale], signatures)
+
+    def _load_resource(self, locale, resource):
+        signature = file_signature(resource[1])
+        loaded = self._loaded_resources.get(id(resource))
+        if loaded is not None and loaded[0] is resource and loaded[1] == signature:
+            return loaded[2]
+
+        catalogue = super(DebugTranslator, self)._load_resource(locale, resource)
+        self._loaded_resources[id(resource)] = (resource, signature, catalogue)
+        return catalogue
@@ -14,6 +14,11 @@ import os
 import fnmatch
 import collections
 
+try:
+    from collections.abc import Mapping, MutableMapping, ItemsView
+except ImportError:
+    from collections import Mapping, MutableMapping, ItemsView
+
 
 def find_files(path, patterns):
     """
@@ -54,7 +59,7 @@ def recursive_update(_dict, _update):
     @return:
     """
     for k, v in _update.items():
-        if isinstance(v, collections.Mapping):
+        if isinstance(v, Mapping):
             r = recursive_update(_dict.get(k, {}), v)
             _dict[k] = r
         else:
@@ -62,6 +67,203 @@ def recursive_update(_dict, _update):
     return _dict
 
 
+class LRUCache(object):
+    """
+    A small bounded mapping that evicts the least recently used entry once
+    it holds more than maxsize items.
+
+    It can be shared between threads without locking: concurrent accesses
+    to the same key can at worst turn a hit into a miss.
+
+    Attributes:
+        maxsize  int  Maximum number of entries kept in the cache
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for a key and marks it as recently used.
+
+        @rtype: mixed
+        @return: The cached value or default if key is not cached
+        """
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            return default
+        self._data[key] = value
+        return value
+
+    def set(self, key, value):
+        """
+        Stores a value, evicting the least recently used entry if the cache
+        grows over its size.
+        """
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            try:
+                self._data.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CaseInsensitiveIndex(MutableMapping):
+    """
+    A case-insensitive mapping optimized for lookups, used to store the
+    messages of a catalogue domain.
+
+    Values live in a plain dict indexed by lowercased keys, the original
+    casing of the keys is kept in a side table, so reads only lowercase the
+    looked up key once. Like CaseInsensitiveDict, the structure remembers
+    the case of the last key to be set and iteration yields case-sensitive
+    keys. Iteration does not copy the mapping, so it must not be modified
+    while being iterated.
+
+    With case_sensitive=True keys are not folded at all and the mapping
+    behaves like a plain dict.
+
+    Attributes:
+        case_sensitive  bool
+    """
+
+    def __init__(self, data=None, case_sensitive=False, **kwargs):
+        self.case_sensitive = case_sensitive
+        self._values = {}
+        self._keys = None if case_sensitive else {}
+        if data is not None or kwargs:
+            self.update(data or {}, **kwargs)
+
+    def fold(self, key):
+        """
+        Returns the key used to index the given key.
+        """
+        if self._keys is None:
+            return key
+        return key.lower()
+
+    def __setitem__(self, key, value):
+        if self._keys is None:
+            self._values[key] = value
+        else:
+            folded = key.lower()
+            self._keys[folded] = key
+            self._values[folded] = value
+
+    def __getitem__(self, key):
+        if self._keys is None:
+            return self._values[key]
+        return self._values[key.lower()]
+
+    def __delitem__(self, key):
+        if self._keys is None:
+            del self._values[key]
+        else:
+            folded = key.lower()
+            del self._values[folded]
+            del self._keys[folded]
+
+    def __contains__(self, key):
+        if self._keys is None:
+            return key in self._values
+        return key.lower() in self._values
+
+    def __iter__(self):
+        if self._keys is None:
+            return iter(self._values)
+        return iter(self._keys.values())
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        if self._keys is None:
+            return self._values.get(key, default)
+        return self._values.get(key.lower(), default)
+
+    def items(self):
+        return _CaseInsensitiveIndexItemsView(self)
+
+    def values(self):
+        return self._values.values()
+
+    def lower_items(self):
+        """Like iteritems(), but with all lowercase keys."""
+        return iter(self._values.items())
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, CaseInsensitiveIndex) \
+                and other.case_sensitive == self.case_sensitive:
+            other._materialize()
+            self._values.update(other._values)
+            if self._keys is not None:
+                self._keys.update(other._keys)
+        elif isinstance(other, dict) and self._keys is None:
+            self._values.update(other)
+        elif isinstance(other, dict):
+            for key, value in other.items():
+                self[key] = value
+        else:
+            super(CaseInsensitiveIndex, self).update(other)
+        if kwargs:
+            self.update(kwargs)
+
+    def _materialize(self):
+        """
+        Hook for lazily populated subclasses, called before the internal
+        dicts of another index are read directly.
+        """
+
+    def __eq__(self, other):
+        if isinstance(other, CaseInsensitiveIndex) \
+                and other.case_sensitive == self.case_sensitive:
+            other._materialize()
+            return self._values == other._values
+        elif isinstance(other, Mapping):
+            other = CaseInsensitiveIndex(other, self.case_sensitive)
+        else:
+            return NotImplemented
+        return self._values == other._values
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def copy(self):
+        copy = CaseInsensitiveIndex(case_sensitive=self.case_sensitive)
+        copy._values = self._values.copy()
+        if self._keys is not None:
+            copy._keys = self._keys.copy()
+        return copy
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(list(self.items())))
+
+
+class _CaseInsensitiveIndexItemsView(ItemsView):
+
+    def __iter__(self):
+        keys = self._mapping._keys
+        if keys is None:
+            return iter(self._mapping._values.items())
+        return ((keys[folded], value)
+                for folded, value in self._mapping._values.items())
 
 
 # CaseInsensitiveDict is derived from code of the requests library (2015-04-20),
@@ -81,7 +283,7 @@ def recursive_update(_dict, _update):
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-class CaseInsensitiveDict(collections.MutableMapping):
+class CaseInsensitiveDict(MutableMapping):
     """
     A case-insensitive ``dict``-like object.
     Implements all methods and operations of
@@ -135,7 +337,7 @@ class CaseInsensitiveDict(collections.MutableMapping):
         )
 
     def __eq__(self, other):
-        if isinstance(other, collections.Mapping):
+        if isinstance(other, Mapping):
             other = CaseInsensitiveDict(other)
         else:
             return NotImplemented
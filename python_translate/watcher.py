@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+This file is a part of python_translate package
+(c) Adam Zieliński <adam@symfony2.guru>
+
+For the full copyright and license information, please view the LICENSE and LICENSE_SYMFONY_TRANSLATION
+files that were distributed with this source code.
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import logging
+import threading
+
+from python_translate.cache import file_signature
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO \
+    | IN_CREATE | IN_DELETE
+
+EVENT = struct.Struct('iIII')
+
+
+class Inotify(object):
+
+    """
+    Minimal ctypes binding of the Linux inotify API.
+
+    @raises: OSError If inotify is not available
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        self._libc = libc
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        """
+        @type path: str
+        @rtype: int
+        @return: The watch descriptor
+        """
+        import ctypes
+
+        wd = self._add_watch(self.fd, path.encode(sys.getfilesystemencoding()), mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def read(self, timeout):
+        """
+        Waits for events.
+
+        @type timeout: float
+        @param timeout: Seconds to wait for events
+
+        @rtype: list[(int, int, str)]
+        @return: (watch descriptor, mask, name) tuples
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b'\x00')
+            offset += length
+            events.append((wd, mask, name.decode(sys.getfilesystemencoding())))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ResourceWatcher(object):
+
+    """
+    Watches files from a background daemon thread and calls back with the
+    ones that changed.
+
+    Directories of the files are watched with inotify, so files replaced by
+    editors or deployment tools are noticed too. Where inotify is not
+    available, files are polled with stat at the given interval.
+
+    Changes are only recorded once the callback returns: if it raises, the
+    same paths are passed to it again after the interval.
+
+    Attributes:
+        paths     set[str]  Absolute paths of the watched files
+        interval  float     Seconds between polls, or between checks of the
+                            stop flag when using inotify
+        backend   str       "inotify" or "polling"
+    """
+
+    # seconds to wait for more events before calling back
+    delay = 0.05
+
+    def __init__(self, callback, paths=(), interval=1.0, use_inotify=True):
+        """
+        @type callback: callable
+        @param callback: Called with the set of changed paths, from the
+                         watcher thread
+
+        @type paths: iterable[str]
+        @type interval: float
+
+        @type use_inotify: bool
+        @param use_inotify: Whether to try inotify before falling back to
+                            polling
+        """
+        self.callback = callback
+        self.interval = interval
+        self.paths = set()
+        self._signatures = {}
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                logger.debug('Falling back to polling: %s', e)
+        self.backend = 'polling' if self._inotify is None else 'inotify'
+
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        """
+        Replaces the watched files.
+
+        @type paths: iterable[str]
+        """
+        paths = set(os.path.abspath(path) for path in paths)
+        with self._lock:
+            for path in paths - self.paths:
+                self._signatures[path] = file_signature(path)
+                if self._inotify is not None:
+                    directory = os.path.dirname(path)
+                    if directory not in self._watches.values():
+                        try:
+                            wd = self._inotify.add_watch(directory)
+                        except OSError as e:
+                            logger.warning('Cannot watch %s: %s', directory, e)
+                        else:
+                            self._watches[wd] = directory
+            for path in self.paths - paths:
+                self._signatures.pop(path, None)
+            self.paths = paths
+
+    def start(self):
+        """
+        Starts the watcher thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='python_translate watcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the watcher thread and waits for it to finish.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        # signatures of the changed paths the callback failed for
+        failed = {}
+        while not self._stop.is_set():
+            try:
+                if self._inotify is None:
+                    self._stop.wait(self.interval)
+                    changed = self._poll()
+                else:
+                    changed = self._wait_for_events()
+                failed.update(changed)
+                changed, failed = failed, {}
+                if changed and not self._stop.is_set():
+                    try:
+                        self.callback(set(changed))
+                    except Exception:
+                        failed = changed
+                        raise
+                    self._record(changed)
+            except Exception:
+                logger.exception('Reloading translation resources failed')
+
+    def _record(self, signatures):
+        with self._lock:
+            for path, signature in signatures.items():
+                if path in self.paths:
+                    self._signatures[path] = signature
+
+    def _poll(self):
+        changed = {}
+        with self._lock:
+            for path in self.paths:
+                signature = file_signature(path)
+                if signature != self._signatures.get(path):
+                    changed[path] = signature
+        return changed
+
+    def _wait_for_events(self):
+        events = self._inotify.read(self.interval)
+        if not events:
+            return {}
+
+        # coalesce the bursts of events a single save produces
+        while True:
+            more = self._inotify.read(self.delay)
+            if not more:
+                break
+            events.extend(more)
+
+        changed = {}
+        with self._lock:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(
+                        (path, file_signature(path)) for path in self.paths)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name)
+                if path in self.paths:
+                    changed[path] = file_signature(path)
+        return changed